@@ -0,0 +1,84 @@
+"""Times accrual.accrue on a large bank against a deposit and withdraw per account.
+
+A bank of --accounts accounts with random balances gets tiered interest and a monthly fee,
+once with accrue (including its single save_state) and once with Account.deposit and
+Account.withdraw calls with string amounts, as before, for the dictionary and columnar stores.
+The per-account loop is timed on --loop-sample accounts and extrapolated; it is timed without
+any commit, so it leaves out the persistence the old way needed on top.
+
+Usage:
+    python benchmarks/bench_accrual.py [--accounts 1000000] [--workers 0]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from accrual import Schedule, accrue, _charges
+from banking_system import BankingSystem
+
+SCHEDULE = Schedule(
+    rate=Decimal('0.00125'), fee=Decimal('2.50'), fee_waived_from=Decimal('1000'),
+    tiers=((Decimal('10000'), Decimal('0.0025')), (Decimal('100000'), Decimal('0.003'))),
+)
+
+
+def open_bank(path: str, n: int, columnar: bool) -> BankingSystem:
+    """Creates a bank of n accounts with log-normal balances and reopens it."""
+    rng = random.Random(0)
+    bank = BankingSystem(csv_path=path, durability='manual', columnar=columnar)
+    bank.create_accounts((f"Customer {i}", f"{rng.lognormvariate(7.0, 2.0):.2f}") for i in range(n))
+    bank.save_state()
+    bank.close()
+    return BankingSystem(csv_path=path, columnar=columnar)
+
+
+def per_account(bank: BankingSystem, sample: int) -> float:
+    """Charges the first accounts with deposit and withdraw calls; returns seconds per account."""
+    accounts = list(bank.accounts.values())[:sample]
+    # The amounts are computed up front, so only the deposit and withdraw calls are timed
+    charges = {account_id: (str(interest), str(fee)) for account_id, _, interest, fee
+               in _charges(SCHEDULE, [(account.id, account.balance) for account in accounts])}
+    start = time.perf_counter()
+    for account in accounts:
+        interest, fee = charges.get(account.id, ('0', '0'))
+        if interest != '0':
+            account.deposit(interest, bank)
+        if fee != '0':
+            account.withdraw(fee, bank)
+    return (time.perf_counter() - start) / len(accounts)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--accounts', type=int, default=1000000)
+    parser.add_argument('--workers', type=int, default=0)
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--loop-sample', type=int, default=100000)
+    args = parser.parse_args()
+
+    print(f"{args.accounts:,} accounts, {args.workers} workers")
+    print(f"{'store':<11} {'accrue':>9} {'of which save':>14} {'accounts/min':>14} {'deposit+withdraw':>18}")
+    for name, columnar in (('dictionary', False), ('columnar', True)):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            bank = open_bank(os.path.join(tmp_dir, 'accounts.csv'), args.accounts, columnar)
+            bank.totals  # built on first use, outside the timings
+            save_state = bank.save_state
+            saved = []
+
+            def timed_save():
+                start = time.perf_counter()
+                save_state()
+                saved.append(time.perf_counter() - start)
+            bank.save_state = timed_save
+            report = accrue(bank, SCHEDULE, args.workers, args.chunk_size)
+            assert bank.verify(full=True)[0]
+            loop_s = per_account(bank, min(args.loop_sample, args.accounts)) * args.accounts
+            bank.close()
+        print(f"{name:<11} {report['seconds']:>7.2f} s {sum(saved):>12.2f} s {report['accounts_per_min']:>14,.0f} "
+              f"{loop_s:>15.2f} s")
@@ -0,0 +1,77 @@
+"""Compares the throughput and commit latency of the durability policies and persistence modes.
+
+Every run applies the same deposits to a bank of --accounts accounts, committing after each one,
+and includes the final flush in the elapsed time. Latency is the time spent in commit() itself;
+under the 'group' and 'manual' policies a commit only schedules the write.
+
+Persistence modes: 'rewrite' rewrites the CSV file, 'delta' writes the accounts changed since
+the last snapshot (incremental=True), and 'journal' appends to the journal.
+
+Usage:
+    python benchmarks/bench_commit.py [--accounts 10000] [--ops 2000] [--fsync]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from banking_system import BankingSystem
+
+POLICIES = [
+    ('always', {'durability': 'always'}),
+    ('group 100 ops/50 ms', {'durability': 'group', 'group_size': 100, 'group_interval_ms': 50}),
+    ('manual', {'durability': 'manual'}),
+]
+
+MODES = [
+    ('rewrite', {}),
+    ('delta', {'incremental': True}),
+    ('journal', {'journal': True}),
+]
+
+
+def run(csv_path: str, n: int, ops: int, fsync: bool, options: dict) -> dict:
+    """Applies ops deposits under one policy and returns throughput and latency figures."""
+    bank = BankingSystem(csv_path=csv_path)
+    bank.create_accounts((f"Customer {i}", "100") for i in range(n))
+    bank = BankingSystem(csv_path=csv_path, fsync=fsync, **options)
+    rng = random.Random(n)
+    ids = [rng.randint(1, n) for _ in range(ops)]
+    latencies = []
+    clock = time.perf_counter
+    start = clock()
+    for account_id in ids:
+        account = bank.get_account(account_id)
+        account.deposit("1")
+        before = clock()
+        bank.commit(account)
+        latencies.append(clock() - before)
+    bank.close()
+    elapsed = clock() - start
+    latencies.sort()
+    return {
+        'ops_per_sec': ops / elapsed,
+        'p50_us': latencies[len(latencies) // 2] * 1e6,
+        'p99_us': latencies[int(len(latencies) * 0.99)] * 1e6,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--accounts', type=int, default=10000)
+    parser.add_argument('--ops', type=int, default=2000)
+    parser.add_argument('--fsync', action='store_true', help="force every persisted write to disk")
+    args = parser.parse_args()
+
+    print(f"{args.accounts:,} accounts, {args.ops:,} deposits, fsync {'on' if args.fsync else 'off'}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for mode, mode_options in MODES:
+            for name, options in POLICIES:
+                csv_path = os.path.join(tmp_dir, f"accounts_{mode}_{options['durability']}.csv")
+                result = run(csv_path, args.accounts, args.ops, args.fsync, {**mode_options, **options})
+                print(f"{mode:<8} {name:<20} {result['ops_per_sec']:>12,.1f} ops/s  "
+                      f"commit p50 {result['p50_us']:>10,.1f} us  p99 {result['p99_us']:>10,.1f} us", flush=True)
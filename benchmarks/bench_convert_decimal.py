@@ -0,0 +1,55 @@
+"""Compares utils.convert_decimal with the previous implementation on valid and invalid inputs.
+
+Usage:
+    python benchmarks/bench_convert_decimal.py [--number N]
+"""
+import argparse
+import os
+import sys
+import timeit
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from utils import convert_decimal
+
+# Repeated inputs, like amounts typed by users, and unique inputs that always miss the cache
+INPUTS = {
+    'valid': ["100", "12.50", "0.01", "99999.99", "-3.5"],
+    'invalid': ["abc", "NaN", "Infinity", "12a", ""],
+    'valid, unique': [f"{i}.{i % 100:02d}" for i in range(50000)],
+    'invalid, unique': [f"{i}x" for i in range(50000)],
+}
+
+
+def previous_convert_decimal(amount: str):
+    """The implementation before the fast path, kept for comparison."""
+    try:
+        amount = Decimal(amount)
+        if not amount.is_finite():
+            raise ValueError("Invalid input, please input numbers only!")
+        return amount
+    except:
+        raise ValueError("Invalid input, please input numbers only!")
+
+
+def time_inputs(convert, inputs, number: int) -> float:
+    """Returns the mean time per call, in nanoseconds."""
+    def run():
+        for amount in inputs:
+            try:
+                convert(amount)
+            except ValueError:
+                pass
+    return min(timeit.repeat(run, number=number, repeat=5)) / (number * len(inputs)) * 1e9
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--number', type=int, default=100000, help="approximate calls per input set")
+    args = parser.parse_args()
+    for kind, inputs in INPUTS.items():
+        number = max(args.number // len(inputs), 1)
+        before = time_inputs(previous_convert_decimal, inputs, number)
+        after = time_inputs(convert_decimal, inputs, number)
+        print(f"{kind:>15}: {before:7.0f} ns -> {after:7.0f} ns per call ({before / after:.2f}x)")
@@ -0,0 +1,188 @@
+"""Benchmarks the core banking operations at several account-count scales.
+
+For every scale, a snapshot of that many accounts is written and the operations below are timed.
+Each operation reports ops/sec, latency percentiles and the peak memory traced while running it.
+Results are saved as JSON so runs from different commits can be compared.
+
+Usage:
+    python benchmarks/bench_core.py [--scales 1000 100000 1000000] [--output results.json]
+                                    [--compare baseline.json] [--threshold 0.2]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from banking_system import BankingSystem
+from utils import convert_decimal
+
+# Number of timed calls per operation. Operations that rewrite or re-read the whole file get
+# fewer calls, since a single call at 1e6 accounts takes seconds.
+FAST_OPS = 10000
+SLOW_OPS = 3
+
+
+def build_snapshot(csv_path: str, n: int) -> None:
+    """Writes a snapshot of n accounts with varied names and balances."""
+    bank = BankingSystem(csv_path=csv_path)
+    bank.create_accounts((f"Customer {i % 10000}", f"{i % 100000}.{i % 100:02d}") for i in range(n))
+
+
+def time_calls(call: Callable[[int], object], count: int) -> List[float]:
+    """Times count calls of call(i), returning each latency in seconds."""
+    latencies = []
+    clock = time.perf_counter
+    for i in range(count):
+        start = clock()
+        call(i)
+        latencies.append(clock() - start)
+    return latencies
+
+
+def peak_memory(call: Callable[[int], object], count: int) -> int:
+    """Returns the peak traced memory, in bytes, allocated while making count calls."""
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for i in range(count):
+            call(i)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return max(peak - baseline, 0)
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Returns the nearest-rank percentile of already sorted values."""
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+def summarize(operation: str, scale: int, latencies: List[float], peak_bytes: int) -> dict:
+    """Builds the result record of one operation at one scale."""
+    latencies = sorted(latencies)
+    return {
+        'operation': operation,
+        'scale': scale,
+        'calls': len(latencies),
+        'ops_per_sec': len(latencies) / sum(latencies) if sum(latencies) else float('inf'),
+        'p50_us': percentile(latencies, 0.50) * 1e6,
+        'p90_us': percentile(latencies, 0.90) * 1e6,
+        'p99_us': percentile(latencies, 0.99) * 1e6,
+        'max_us': latencies[-1] * 1e6,
+        'peak_memory_bytes': peak_bytes,
+    }
+
+
+def operations(bank: BankingSystem, n: int) -> Dict[str, tuple]:
+    """Returns the benchmarked operations as {name: (call, number of calls)}.
+
+    Every call receives its call index, so calls can spread over different accounts.
+    """
+    rng = random.Random(n)
+    ids = [rng.randint(1, n) for _ in range(FAST_OPS)]
+    pairs = [(a, a % n + 1) for a in ids]
+    amounts = [f"{rng.randint(1, 999)}.{rng.randint(0, 99):02d}" for _ in range(FAST_OPS)]
+    get = bank.get_account
+    return {
+        'load_state': (lambda i: bank.load_state(), SLOW_OPS),
+        'save_state': (lambda i: bank.save_state(), SLOW_OPS),
+        'create_account': (lambda i: bank.create_account("Benchmark", "100"), SLOW_OPS),
+        'get_account': (lambda i: get(ids[i]), FAST_OPS),
+        'deposit': (lambda i: get(ids[i]).deposit(amounts[i]), FAST_OPS),
+        'withdraw': (lambda i: get(ids[i]).withdraw("0.01"), FAST_OPS),
+        'transfer': (lambda i: get(pairs[i][0]).transfer("0.01", pairs[i][1], bank), FAST_OPS),
+        'convert_decimal': (lambda i: convert_decimal(amounts[i]), FAST_OPS),
+    }
+
+
+def bench_scale(n: int, tmp_dir: str, selected: Optional[List[str]] = None) -> List[dict]:
+    """Runs every selected operation against a bank of n accounts."""
+    csv_path = os.path.join(tmp_dir, f"accounts_{n}.csv")
+    build_snapshot(csv_path, n)
+    bank = BankingSystem(csv_path=csv_path)
+    results = []
+    for name, (call, count) in operations(bank, n).items():
+        if selected and name not in selected:
+            continue
+        latencies = time_calls(call, count)
+        # Memory is traced in a separate pass, since tracing slows every allocation down
+        peak = peak_memory(call, min(count, 100))
+        results.append(summarize(name, n, latencies, peak))
+        print(f"{n:>9,} {name:<16} {results[-1]['ops_per_sec']:>12,.1f} ops/s  "
+              f"p50 {results[-1]['p50_us']:>11,.1f} us  p99 {results[-1]['p99_us']:>11,.1f} us  "
+              f"peak {peak / 1e6:>8.2f} MB", flush=True)
+    return results
+
+
+def git_revision() -> Optional[str]:
+    """Returns the current git commit, if the benchmarks run from a git checkout."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: List[dict], baseline: List[dict], threshold: float) -> List[str]:
+    """Lists operations whose throughput dropped by more than threshold against a baseline run."""
+    baseline_by_key = {(r['operation'], r['scale']): r for r in baseline}
+    regressions = []
+    for result in results:
+        before = baseline_by_key.get((result['operation'], result['scale']))
+        if before is None:
+            continue
+        change = result['ops_per_sec'] / before['ops_per_sec'] - 1
+        print(f"{result['scale']:>9,} {result['operation']:<16} {change:>+8.1%} ops/s vs baseline")
+        if change < -threshold:
+            regressions.append(f"{result['operation']} at {result['scale']:,} accounts: {change:+.1%}")
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[1000, 100000, 1000000])
+    parser.add_argument('--operations', nargs='+', help="only run these operations")
+    parser.add_argument('--output', help="where to save the JSON results, "
+                                         "defaults to benchmarks/results/<git revision>.json")
+    parser.add_argument('--compare', help="JSON results of a baseline run to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="relative throughput drop reported as a regression (default 0.2)")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for scale in args.scales:
+            results.extend(bench_scale(scale, tmp_dir, args.operations))
+
+    revision = git_revision()
+    output = args.output or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results', f"{revision or 'latest'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'revision': revision,
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'results': results,
+        }, f, indent=2)
+    print(f"Results saved to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f)['results'], args.threshold)
+        if regressions:
+            print("Regressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
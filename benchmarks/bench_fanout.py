@@ -0,0 +1,77 @@
+"""Compares a payroll run of one transfer per recipient with a single fan-out transfer.
+
+A bank of --accounts accounts pays --recipients of them from account 1, either with one
+committed Account.transfer per recipient or with one BankingSystem.transfer_many call, in the
+plain CSV rewrite mode and the journal mode. Separate transfers in rewrite mode rewrite the
+whole file per payment, so only --rewrite-sample of them are timed and the total is
+extrapolated.
+
+Usage:
+    python benchmarks/bench_fanout.py [--accounts 100000] [--recipients 10000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from banking_system import BankingSystem
+
+MODES = [
+    ('rewrite', {}),
+    ('journal', {'journal': True}),
+]
+
+
+def open_bank(path: str, n: int, options: dict) -> BankingSystem:
+    """Creates a bank whose account 1 can pay everyone else, and reopens it."""
+    bank = BankingSystem(csv_path=path, durability='manual', **options)
+    bank.create_accounts([("Employer", "100000000")] + [(f"Employee {i}", "0") for i in range(1, n)])
+    bank.save_state()
+    bank.close()
+    return BankingSystem(csv_path=path, **options)
+
+
+def separate(bank: BankingSystem, payments: list) -> float:
+    """Pays each recipient with its own committed transfer; returns seconds."""
+    sender = bank.get_account(1)
+    start = time.perf_counter()
+    for recipient_id, amount in payments:
+        sender.transfer(amount, recipient_id, bank)
+        bank.commit(sender, bank.get_account(recipient_id))
+    return time.perf_counter() - start
+
+
+def fanout(bank: BankingSystem, payments: list) -> float:
+    """Pays every recipient with one transfer_many call; returns seconds."""
+    start = time.perf_counter()
+    success, _ = bank.transfer_many(1, payments)
+    assert success
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--accounts', type=int, default=100000)
+    parser.add_argument('--recipients', type=int, default=10000)
+    parser.add_argument('--rewrite-sample', type=int, default=20, help="separate transfers timed in rewrite mode")
+    args = parser.parse_args()
+    payments = [(recipient_id, "1234.56") for recipient_id in range(2, args.recipients + 2)]
+
+    print(f"{args.recipients} payments from a bank of {args.accounts} accounts")
+    print(f"{'mode':<8} {'separate':>12} {'fan-out':>12} {'speedup':>9}")
+    for name, options in MODES:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            bank = open_bank(os.path.join(tmp_dir, 'separate.csv'), args.accounts, options)
+            sample = payments[:args.rewrite_sample] if name == 'rewrite' else payments
+            separate_s = separate(bank, sample) * len(payments) / len(sample)
+            bank.close()
+
+            bank = open_bank(os.path.join(tmp_dir, 'fanout.csv'), args.accounts, options)
+            fanout_s = fanout(bank, payments)
+            assert bank.verify(full=True)[0]
+            bank.close()
+        estimate = '~' if len(sample) < len(payments) else ' '
+        print(f"{name:<8} {estimate}{separate_s:>8.2f} s {fanout_s * 1e3:>9.1f} ms {separate_s / fanout_s:>8,.0f}x")
@@ -0,0 +1,41 @@
+"""Compares bulk import at several worker counts with BankingSystem.create_accounts.
+
+Usage:
+    python benchmarks/bench_import.py [--rows 1000000] [--workers 0 1 2 4]
+"""
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from banking_system import BankingSystem
+from bulk_import import import_csv
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 1, 2, 4])
+    args = parser.parse_args()
+
+    print(f"{args.rows:,} rows, {os.cpu_count()} CPUs")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        import_path = os.path.join(tmp_dir, 'import.csv')
+        with open(import_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['name', 'balance'])
+            # Distinct amounts, so convert_decimal's cache does not hide the parsing cost
+            writer.writerows((f"Customer {i}", f"{i}.{i % 100:02d}") for i in range(args.rows))
+        with open(import_path, newline='') as f:
+            rows = [tuple(row) for row in csv.reader(f)][1:]
+
+        start = time.perf_counter()
+        BankingSystem(csv_path=os.path.join(tmp_dir, 'create_accounts.csv')).create_accounts(rows)
+        print(f"create_accounts    {args.rows / (time.perf_counter() - start):>10,.0f} rows/s")
+        for workers in args.workers:
+            bank = BankingSystem(csv_path=os.path.join(tmp_dir, f"import_{workers}.csv"))
+            report = import_csv(bank, import_path, workers=workers)
+            print(f"import, {workers} workers {report['rows_per_sec']:>10,.0f} rows/s", flush=True)
@@ -0,0 +1,58 @@
+"""Measures the cost the ledger adds to deposits, and ledger queries on a large ledger.
+
+Usage:
+    python benchmarks/bench_ledger.py [--entries 1000000] [--accounts 10000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from account import Account
+from ledger import Ledger
+
+
+def per_call_us(call, count: int) -> float:
+    """Returns the mean time of count calls of call(i), in microseconds."""
+    start = time.perf_counter()
+    for i in range(count):
+        call(i)
+    return (time.perf_counter() - start) / count * 1e6
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--entries', type=int, default=1000000)
+    parser.add_argument('--accounts', type=int, default=10000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        ledger = Ledger(os.path.join(tmp_dir, 'accounts.csv.ledger'))
+        account = Account(id=1, name="Alice", balance=Decimal(0))
+        calls = 100000
+        plain = per_call_us(lambda i: account.deposit("1.25"), calls)
+        recorded = per_call_us(lambda i: account.deposit("1.25", ledger), calls)
+        print(f"deposit without ledger {plain:>10.2f} us")
+        print(f"deposit with ledger    {recorded:>10.2f} us  (+{recorded - plain:.2f} us)")
+
+        rng = random.Random(0)
+        first = time.time_ns()
+        start = time.perf_counter()
+        for i in range(args.entries - calls):
+            ledger.record('deposit', rng.randint(1, args.accounts), Decimal(1), Decimal(i))
+        ledger.close()
+        middle = (first + time.time_ns()) // 2
+        print(f"record                 {(time.perf_counter() - start) / (args.entries - calls) * 1e6:>10.2f} us")
+
+        start = time.perf_counter()
+        ledger = Ledger(ledger.path)
+        print(f"reopen {len(ledger):,} entries {time.perf_counter() - start:>8.3f} s")
+        ids = [rng.randint(1, args.accounts) for _ in range(1000)]
+        print(f"history, 50 newest     {per_call_us(lambda i: ledger.history(ids[i]), 1000):>10.2f} us")
+        print(f"between, 50 entries    {per_call_us(lambda i: ledger.between(middle, 2**63 - 1), 1000):>10.2f} us")
+        print(f"between, one account   {per_call_us(lambda i: ledger.between(middle, 2**63 - 1, account_id=ids[i]), 1000):>10.2f} us")
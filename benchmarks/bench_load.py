@@ -0,0 +1,36 @@
+"""Times BankingSystem.load_state in validating and trusted mode.
+
+Usage:
+    python benchmarks/bench_load.py [--accounts N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from banking_system import BankingSystem
+
+
+def write_snapshot(csv_path: str, n: int) -> None:
+    """Writes a snapshot of n accounts through save_state, so it carries a checksum."""
+    bank = BankingSystem(csv_path=csv_path)
+    bank.create_accounts((f"Customer {i}", f"{i % 100000}.{i % 100:02d}") for i in range(n))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--accounts', type=int, default=1_000_000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = os.path.join(tmp_dir, 'accounts.csv')
+        write_snapshot(csv_path, args.accounts)
+        for trusted in (False, True):
+            start = time.perf_counter()
+            bank = BankingSystem(csv_path=csv_path, trusted=trusted)
+            elapsed = time.perf_counter() - start
+            assert len(bank.accounts) == args.accounts
+            del bank
+            print(f"{'trusted' if trusted else 'validating':>10}: {elapsed:6.2f} s for {args.accounts:,} rows")
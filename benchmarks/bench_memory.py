@@ -0,0 +1,46 @@
+"""Measures memory per account for the dictionary and columnar account stores.
+
+Usage:
+    python benchmarks/bench_memory.py [--accounts N] [--layout dict|columnar|both]
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from account import Account
+from columnar_store import ColumnarAccounts
+
+
+def build(layout: str, n: int, n_names: int = 10000):
+    """Builds a store of n accounts, with names drawn from a pool of n_names distinct names."""
+    accounts = ColumnarAccounts(scale=2) if layout == 'columnar' else {}
+    for account_id in range(1, n + 1):
+        # Names and balances are created per row, like load_state parsing a CSV file
+        name = f"Customer {account_id % n_names}"
+        balance = Decimal(f"{account_id % 100000}.{account_id % 100:02d}")
+        accounts[account_id] = Account(id=account_id, name=name, balance=balance)
+    return accounts
+
+
+def measure(layout: str, n: int) -> float:
+    """Returns the traced bytes per account held by a store of n accounts."""
+    tracemalloc.start()
+    accounts = build(layout, n)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del accounts
+    return current / n
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--accounts', type=int, default=1_000_000)
+    parser.add_argument('--layout', choices=['dict', 'columnar', 'both'], default='both')
+    args = parser.parse_args()
+    layouts = ['dict', 'columnar'] if args.layout == 'both' else [args.layout]
+    for layout in layouts:
+        print(f"{layout:>8}: {measure(layout, args.accounts):8.1f} bytes/account at {args.accounts:,} accounts")
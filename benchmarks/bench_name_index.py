@@ -0,0 +1,60 @@
+"""Benchmarks name lookups with the name index against a full scan of the accounts.
+
+Usage:
+    python benchmarks/bench_name_index.py [--accounts 1000000] [--lookups 1000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from account import Account
+from name_index import NameIndex
+
+FIRST_NAMES = ["Alice", "Bob", "Carol", "Dave", "Eve", "Frank", "Grace", "Heidi", "Ivan", "Judy"]
+
+
+def make_accounts(n: int) -> dict:
+    """Builds n accounts named like 'Grace Customer 1234', 10,000 distinct names in all."""
+    return {
+        i: Account.from_trusted(id=i, name=f"{FIRST_NAMES[i % 10]} Customer {i % 10000}", balance=Decimal(100))
+        for i in range(1, n + 1)
+    }
+
+
+def per_call_us(call, count: int) -> float:
+    """Returns the mean time of count calls of call(i), in microseconds."""
+    start = time.perf_counter()
+    for i in range(count):
+        call(i)
+    return (time.perf_counter() - start) / count * 1e6
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--accounts', type=int, default=1000000)
+    parser.add_argument('--lookups', type=int, default=1000)
+    args = parser.parse_args()
+
+    accounts = make_accounts(args.accounts)
+    rng = random.Random(0)
+    names = [f"{FIRST_NAMES[rng.randrange(10)].upper()} customer {rng.randrange(10000)}" for _ in range(args.lookups)]
+    prefixes = [f"{FIRST_NAMES[rng.randrange(10)]} Customer {rng.randrange(1, 10)}" for _ in range(args.lookups)]
+
+    start = time.perf_counter()
+    index = NameIndex.build((account.id, account.name) for account in accounts.values())
+    print(f"{args.accounts:,} accounts, {len(index):,} distinct names")
+    print(f"build            {time.perf_counter() - start:>10.3f} s")
+    print(f"add (new name)   {per_call_us(lambda i: index.add(args.accounts + i + 1, f'New Name {i}'), args.lookups):>10.2f} us")
+    print(f"add (known name) {per_call_us(lambda i: index.add(args.accounts + i + 1, 'Alice Customer 0'), args.lookups):>10.2f} us")
+    print(f"exact            {per_call_us(lambda i: index.exact(names[i]), args.lookups):>10.2f} us")
+    print(f"prefix           {per_call_us(lambda i: index.prefix(prefixes[i]), args.lookups):>10.2f} us "
+          f"(~{len(index.prefix(prefixes[0]))} matches)")
+    scans = max(args.lookups // 100, 3)
+    folded = [name.casefold() for name in names]
+    scan = lambda i: [account.id for account in accounts.values() if account.name.casefold() == folded[i]]
+    print(f"full scan        {per_call_us(scan, scans):>10.2f} us")
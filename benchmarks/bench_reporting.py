@@ -0,0 +1,81 @@
+"""Compares BalanceReport with Decimal loops over all accounts.
+
+The dictionary store is measured at the smaller sizes only, since a million Pydantic accounts
+already take about a gigabyte; the columnar store is measured at every size.
+
+Usage:
+    python benchmarks/bench_reporting.py [--sizes 1000000 10000000] [--dict-limit 1000000]
+"""
+import argparse
+import bisect
+import heapq
+import os
+import random
+import sys
+import tempfile
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from account import Account
+from banking_system import BankingSystem
+from reporting import BalanceReport
+
+EDGES = ["0", "10", "100", "1000", "10000", "100000", "1000000"]
+PERCENTS = [50, 90, 99]
+
+
+def naive(balances):
+    """Computes the report with Decimal loops over (id, balance) pairs."""
+    total = sum(balance for _, balance in balances)
+    top = heapq.nsmallest(10, balances, key=lambda row: (-row[1], row[0]))
+    edges = [Decimal(edge) for edge in EDGES]
+    histogram = [0] * (len(edges) - 1)
+    for _, balance in balances:
+        bucket = bisect.bisect_right(edges, balance) - 1
+        if 0 <= bucket < len(histogram):
+            histogram[bucket] += 1
+    ordered = sorted(balance for _, balance in balances)
+    percentiles = [ordered[max(-(-percent * len(ordered) // 100), 1) - 1] for percent in PERCENTS]
+    return total, top, histogram, percentiles
+
+
+def vectorized(report: BalanceReport):
+    return report.total(), report.top(10), report.histogram(EDGES), report.percentiles(PERCENTS)
+
+
+def timed(call):
+    start = time.perf_counter()
+    result = call()
+    return result, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000000, 10000000])
+    parser.add_argument('--dict-limit', type=int, default=1000000)
+    args = parser.parse_args()
+
+    print(f"{'accounts':>10} {'store':>9} {'Decimal loop':>13} {'extract':>9} {'aggregate':>10} {'speedup':>8}")
+    for size in args.sizes:
+        for columnar in (False, True):
+            if not columnar and size > args.dict_limit:
+                continue
+            rng = random.Random(0)
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                bank = BankingSystem(csv_path=os.path.join(tmp_dir, 'accounts.csv'), columnar=columnar, durability='manual')
+                accounts = bank.accounts
+                for account_id in range(1, size + 1):
+                    accounts[account_id] = Account.from_trusted(account_id, "Customer", Decimal(rng.randint(0, 10**8)).scaleb(-2))
+                if columnar:
+                    # Reading balances back from the columns is part of the loop's cost
+                    load = lambda: [(account_id, balance) for account_id, _, balance in accounts.rows()]
+                else:
+                    load = lambda: [(account.id, account.balance) for account in accounts.values()]
+                expected, loop_time = timed(lambda: naive(load()))
+                report, extract_time = timed(lambda: BalanceReport.from_bank(bank))
+                result, aggregate_time = timed(lambda: vectorized(report))
+                assert result == expected
+                print(f"{size:>10,} {'columnar' if columnar else 'dict':>9} {loop_time:>11.2f} s {extract_time:>7.3f} s "
+                      f"{aggregate_time:>8.3f} s {loop_time / (extract_time + aggregate_time):>7.1f}x")
@@ -0,0 +1,62 @@
+"""Measures load time and deposit throughput of a ShardedBank at several shard counts.
+
+The same snapshot is split into every shard count. Throughput is measured with one client
+thread per shard, so shards can work in parallel on a machine with enough cores.
+
+Usage:
+    python benchmarks/bench_sharding.py [--accounts 1000000] [--shards 1 2 4] [--ops 20000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from banking_system import BankingSystem
+from sharding import ShardedBank, split_csv
+
+
+def run_deposits(bank: ShardedBank, n: int, ops: int, threads: int) -> float:
+    """Runs ops deposits from several threads and returns the elapsed seconds."""
+    def worker(seed: int) -> None:
+        rng = random.Random(seed)
+        for _ in range(ops // threads):
+            bank.deposit(rng.randint(1, n), "1")
+    workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--accounts', type=int, default=1000000)
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--ops', type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{args.accounts:,} accounts, {os.cpu_count()} CPUs")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = os.path.join(tmp_dir, 'accounts.csv')
+        BankingSystem(csv_path=csv_path).create_accounts(
+            (f"Customer {i}", f"{i % 1000}.{i % 100:02d}") for i in range(args.accounts)
+        )
+        for shards in args.shards:
+            base_path = os.path.join(tmp_dir, f"sharded{shards}.csv")
+            os.replace(csv_path, base_path)
+            split_csv(base_path, shards)
+            os.replace(base_path, csv_path)
+            start = time.perf_counter()
+            # Compaction is left out, so every shard count does the same work per deposit
+            bank = ShardedBank(csv_path=base_path, shards=shards, journal=True, compact_threshold=10**9)
+            load = time.perf_counter() - start
+            elapsed = run_deposits(bank, args.accounts, args.ops, shards)
+            bank.close()
+            print(f"{shards:>2} shards  load {load:>7.2f} s  deposits {args.ops / elapsed:>10,.0f} ops/s", flush=True)
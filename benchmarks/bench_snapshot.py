@@ -0,0 +1,98 @@
+"""Measures snapshot cost, and how much a full report slows transfers down, with and without snapshots.
+
+A writer thread runs transfers while the main thread computes the total of all balances, either
+by copying every balance with all account locks held (how save_state read accounts before) or
+through a snapshot.
+
+Usage:
+    python benchmarks/bench_snapshot.py [--accounts 1000000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from account import locked
+from banking_system import BankingSystem
+from totals import Totals
+
+
+def locked_copy(bank: BankingSystem) -> Totals:
+    """Copies all rows with every account lock held, like save_state did before snapshots."""
+    with locked():
+        rows = [(account.id, account.name, account.balance) for account in list(bank.accounts.values())]
+    return Totals.build(row[2] for row in rows)
+
+
+def snapshot_read(bank: BankingSystem) -> Totals:
+    """Reads all balances through a snapshot."""
+    with bank.snapshot() as snapshot:
+        return snapshot.totals()
+
+
+def transfer_rate(bank: BankingSystem, count: int) -> float:
+    """Runs transfers between random accounts on this thread and returns their mean time in microseconds."""
+    rng = random.Random(0)
+    size = len(bank.accounts)
+    pairs = [(rng.randint(1, size), rng.randint(1, size)) for _ in range(count)]
+    start = time.perf_counter()
+    for sender, recipient in pairs:
+        bank.accounts[sender].transfer("0.01", recipient, bank)
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def with_writer(bank: BankingSystem, read) -> tuple:
+    """Runs read(bank) while a writer thread transfers, returning the read time in seconds, the
+    writer's transfers per second meanwhile and its longest transfer in milliseconds."""
+    stop = threading.Event()
+    latencies = []
+
+    def writer():
+        rng = random.Random(1)
+        size = len(bank.accounts)
+        while not stop.is_set():
+            sender, recipient = rng.randint(1, size), rng.randint(1, size)
+            start = time.perf_counter()
+            bank.accounts[sender].transfer("0.01", recipient, bank)
+            latencies.append(time.perf_counter() - start)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    time.sleep(0.2)
+    before = len(latencies)
+    start = time.perf_counter()
+    totals = read(bank)
+    elapsed = time.perf_counter() - start
+    during = latencies[before:]
+    stop.set()
+    thread.join()
+    assert totals.count == len(bank.accounts)
+    return elapsed, len(during) / elapsed, max(during, default=0) * 1000
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--accounts', type=int, default=1000000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        bank = BankingSystem(csv_path=os.path.join(tmp_dir, 'accounts.csv'), durability='manual')
+        bank.create_accounts((f"Customer {i}", "100") for i in range(args.accounts))
+
+        start = time.perf_counter()
+        for _ in range(100):
+            bank.snapshot().close()
+        print(f"take a snapshot               {(time.perf_counter() - start) / 100 * 1e3:>9.3f} ms")
+        print(f"transfer, no snapshot open    {transfer_rate(bank, 100000):>9.2f} us")
+        with bank.snapshot():
+            print(f"transfer, snapshot open       {transfer_rate(bank, 100000):>9.2f} us")
+
+        for name, read in (('locked copy', locked_copy), ('snapshot', snapshot_read)):
+            elapsed, rate, longest = with_writer(bank, read)
+            print(f"report via {name:<12} {elapsed:>8.3f} s, writer {rate:>9,.0f} transfers/s, "
+                  f"longest transfer {longest:>8.1f} ms")
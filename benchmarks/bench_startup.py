@@ -0,0 +1,73 @@
+"""Measures how long the interactive program takes to show its first prompt and to log in.
+
+main.py is run as a subprocess on a CSV file of N accounts, once as it is (lazy loading, the
+bank opened in the background) and once opening the bank eagerly before the first prompt, the
+way it started before lazy loading. Each run times the first prompt, then answers 'yes' and an
+account ID and times the login message. The first lazy run also builds the offset index.
+
+Usage:
+    python benchmarks/bench_startup.py [--accounts 1000000] [--runs 3]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC)
+
+from banking_system import BankingSystem
+
+EAGER = ("import main\n"
+         "from banking_system import BankingSystem\n"
+         "main.main(BankingSystem(csv_path='data/accounts.csv'))\n")
+
+
+def read_until(process: subprocess.Popen, text: bytes) -> None:
+    """Reads the process's output until it contains text. Prompts end without a newline."""
+    output = b''
+    while text not in output:
+        chunk = os.read(process.stdout.fileno(), 65536)
+        if not chunk:
+            raise RuntimeError(f"Exited before printing {text!r}: {output[-500:]!r}")
+        output += chunk
+
+
+def run(command: list, cwd: str, account_id: int) -> tuple:
+    """Returns the seconds until the first prompt and until the login message."""
+    env = dict(os.environ, PYTHONPATH=SRC)
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=cwd, env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    read_until(process, b"Type 'yes'")
+    prompt = time.perf_counter() - start
+    process.stdin.write(f"yes\n{account_id}\n".encode())
+    process.stdin.flush()
+    read_until(process, b"Welcome back")
+    login = time.perf_counter() - start
+    process.stdin.write(b"q\n")
+    process.stdin.close()
+    process.wait()
+    return prompt, login
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--accounts', type=int, default=1000000)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.mkdir(os.path.join(tmp_dir, 'data'))
+        bank = BankingSystem(csv_path=os.path.join(tmp_dir, 'data', 'accounts.csv'), durability='manual')
+        bank.create_accounts((f"Customer {i}", "100") for i in range(args.accounts))
+        bank.save_state()
+        bank.close()
+        account_id = args.accounts // 2
+        main_py = os.path.join(SRC, 'main.py')
+        for name, command in (('lazy', [sys.executable, main_py]), ('eager', [sys.executable, '-c', EAGER])):
+            for attempt in range(args.runs):
+                prompt, login = run(command, tmp_dir, account_id)
+                print(f"{name:<6} run {attempt + 1}: first prompt {prompt * 1e3:>9.1f} ms, "
+                      f"logged in {login * 1e3:>9.1f} ms")
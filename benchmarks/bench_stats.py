@@ -0,0 +1,48 @@
+"""Measures the cost of stats recording on deposits and commits, switched off and on.
+
+Usage:
+    python benchmarks/bench_stats.py [--calls 200000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from banking_system import BankingSystem
+
+
+def per_call_us(call, count: int) -> float:
+    """Returns the best mean time of count calls of call(), over three runs, in microseconds."""
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(count):
+            call()
+        best = min(best, (time.perf_counter() - start) / count * 1e6)
+    return best
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=200000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        bank = BankingSystem(csv_path=os.path.join(tmp_dir, 'accounts.csv'), journal=True, compact_threshold=10**9)
+        bank.create_account("Alice", "0")
+        account = bank.get_account(1)
+        print(f"{'deposit, stats off':<28} {per_call_us(lambda: account.deposit('1.25', bank), args.calls):>8.3f} us")
+        commits = args.calls // 20
+        print(f"{'commit, stats off':<28} {per_call_us(lambda: bank.commit(account), commits):>8.3f} us")
+        # A bank passed to deposits that is not recording, while another one is
+        other = BankingSystem(csv_path=os.path.join(tmp_dir, 'other.csv'), stats=True)
+        print(f"{'deposit, other bank on':<28} {per_call_us(lambda: account.deposit('1.25', bank), args.calls):>8.3f} us")
+        bank.metrics.enabled = True
+        print(f"{'deposit, stats on':<28} {per_call_us(lambda: account.deposit('1.25', bank), args.calls):>8.3f} us")
+        print(f"{'commit, stats on':<28} {per_call_us(lambda: bank.commit(account), commits):>8.3f} us")
+        for name, series in bank.stats().items():
+            print(f"  {name:<16} count {series['count']:>8,}  p50 {series['p50_us']:>8.3f} us  "
+                  f"p99 {series['p99_us']:>8.3f} us  bytes {series['bytes']:,}")
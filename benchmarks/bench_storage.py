@@ -0,0 +1,108 @@
+"""Compares the CSV persistence modes with the SQLite backend.
+
+For each backend a bank of --accounts accounts is created and reopened, then timed on lookups of
+random accounts, deposits and transfers each committed with the 'always' policy, and --threads
+threads running committed transfers at once. Popular accounts follow a Zipf distribution, like
+workload.py. The CSV modes are the plain rewrite (only timed for a few commits, since each one
+rewrites the file), incremental deltas and the journal.
+
+Usage:
+    python benchmarks/bench_storage.py [--accounts 100000] [--ops 2000] [--threads 4]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from banking_system import BankingSystem
+from sqlite_store import SQLiteStorage
+from workload import Zipf
+
+BACKENDS = [
+    ('csv rewrite', 'accounts.csv', lambda path: {}),
+    ('csv delta', 'accounts.csv', lambda path: {'incremental': True}),
+    ('csv journal', 'accounts.csv', lambda path: {'journal': True}),
+    ('sqlite cache', 'accounts.db', lambda path: {'storage': SQLiteStorage(path, cache=True)}),
+    ('sqlite no cache', 'accounts.db', lambda path: {'storage': SQLiteStorage(path, cache=False)}),
+]
+
+
+def timed(ops: int, operation) -> float:
+    """Runs operation(i) ops times and returns the mean time in microseconds."""
+    start = time.perf_counter()
+    for i in range(ops):
+        operation(i)
+    return (time.perf_counter() - start) / ops * 1e6
+
+
+def run(path: str, n: int, ops: int, threads: int, options) -> dict:
+    """Creates, reopens and times one backend."""
+    bank = BankingSystem(csv_path=path, durability='manual', **options(path))
+    bank.create_accounts((f"Customer {i}", "1000") for i in range(n))
+    bank.save_state()
+    bank.close()
+
+    start = time.perf_counter()
+    bank = BankingSystem(csv_path=path, **options(path))
+    results = {'open_ms': (time.perf_counter() - start) * 1e3}
+    rng = random.Random(0)
+    popular = Zipf(n, 1.0, rng)
+    ids = [popular() for _ in range(2 * ops)]
+
+    results['lookup_us'] = timed(ops, lambda i: bank.get_account(rng.randint(1, n)))
+
+    def deposit(i):
+        account = bank.get_account(ids[i])
+        account.deposit("1", bank)
+        bank.commit(account)
+    results['deposit_us'] = timed(ops, deposit)
+
+    def transfer(i):
+        sender, recipient = ids[2 * i], ids[2 * i + 1]
+        if sender != recipient:
+            account = bank.get_account(sender)
+            account.transfer("1", recipient, bank)
+            bank.commit(account, bank.get_account(recipient))
+    results['transfer_us'] = timed(ops, transfer)
+
+    def worker(seed):
+        worker_rng = random.Random(seed)
+        for _ in range(ops // threads):
+            sender, recipient = worker_rng.choice(ids), worker_rng.choice(ids)
+            if sender != recipient:
+                account = bank.get_account(sender)
+                account.transfer("1", recipient, bank)
+                bank.commit(account, bank.get_account(recipient))
+    workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    results['threaded_per_s'] = (ops // threads) * threads / (time.perf_counter() - start)
+    assert bank.verify(full=True)[0]
+    bank.close()
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--accounts', type=int, default=100000)
+    parser.add_argument('--ops', type=int, default=2000)
+    parser.add_argument('--rewrite-ops', type=int, default=20, help="operations timed for the plain CSV rewrite")
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{'backend':<16} {'open':>10} {'lookup':>10} {'deposit':>10} {'transfer':>10} {'threads':>14}")
+    for name, filename, options in BACKENDS:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            ops = args.rewrite_ops if name == 'csv rewrite' else args.ops
+            results = run(os.path.join(tmp_dir, filename), args.accounts, ops, args.threads, options)
+        print(f"{name:<16} {results['open_ms']:>7.1f} ms {results['lookup_us']:>7.1f} us "
+              f"{results['deposit_us']:>7.1f} us {results['transfer_us']:>7.1f} us "
+              f"{results['threaded_per_s']:>8,.0f} ops/s")
@@ -1,7 +1,72 @@
+import threading
+from contextlib import contextmanager
 from pydantic import BaseModel, Field
 from decimal import Decimal
-from typing import Tuple
-from utils import convert_decimal
+from typing import Iterator, List, Optional, Sequence, Tuple
+from stats import instrument
+from utils import MAX_SCALED, convert_decimal, from_scaled
+
+# Accounts are locked through a fixed table of lock stripes rather than one lock per object, so
+# locking costs no memory per account and works for any Account, including columnar views.
+LOCK_STRIPES = 1024
+_locks = [threading.RLock() for _ in range(LOCK_STRIPES)]
+
+# Message of the valid payments of a transfer_many call that failed on another payment
+NOT_TRANSFERRED = "Not transferred, another payment failed."
+
+# Balance changes made by Account methods without a bank to record them, which no bank's running
+# totals have seen. Banks compare it with the count they saw last and rebuild their totals if it moved.
+_unrecorded = 0
+_unrecorded_lock = threading.Lock()
+
+
+def unrecorded_changes() -> int:
+    """Returns the number of balance changes made by Account methods without a bank recording them."""
+    return _unrecorded
+
+
+def _mark_unrecorded(recorder) -> None:
+    """Counts a balance change, unless the recorder is a bank that keeps its totals up to date."""
+    global _unrecorded
+    if not getattr(recorder, 'keeps_totals', False):
+        with _unrecorded_lock:
+            _unrecorded += 1
+
+
+def account_lock(account_id: int) -> threading.RLock:
+    """Returns the lock guarding the balance of an account.
+
+    Args:
+        account_id (int): The ID of the account.
+
+    Returns:
+        threading.RLock: The lock stripe the account maps to.
+    """
+    return _locks[hash(account_id) % LOCK_STRIPES]
+
+
+@contextmanager
+def locked(*account_ids: int) -> Iterator[None]:
+    """Holds the locks of several accounts at once.
+
+    Locks are always taken in ascending stripe order, so two threads locking overlapping sets of
+    accounts (e.g. transfers A->B and B->A) can never deadlock.
+
+    Args:
+        *account_ids (int): The IDs of the accounts to lock. With no IDs, every stripe is locked,
+            which blocks all balance changes.
+    """
+    if account_ids:
+        stripes = sorted({hash(account_id) % LOCK_STRIPES for account_id in account_ids})
+    else:
+        stripes = range(LOCK_STRIPES)
+    for stripe in stripes:
+        _locks[stripe].acquire()
+    try:
+        yield
+    finally:
+        for stripe in reversed(stripes):
+            _locks[stripe].release()
 
 
 class Account(BaseModel):
@@ -18,11 +83,57 @@ class Account(BaseModel):
     name: str
     balance: Decimal = Field(ge=0) # Use Decimal for arithmetic to avoid rounding errors, should be >= 0
 
-    def deposit(self, amount: str) -> Tuple[bool, str]:
+    @classmethod
+    def from_trusted(cls, id: int, name: str, balance: Decimal) -> 'Account':
+        """Builds an account without any validation.
+
+        Only for data this system wrote itself, e.g. a checksummed snapshot. It sets the same
+        instance state as Account.model_construct, without its per-call overhead.
+
+        Args:
+            id (int): Unique identifier for the account.
+            name (str): Account holder's name.
+            balance (Decimal): Current balance.
+
+        Returns:
+            Account: The new account.
+        """
+        account = cls.__new__(cls)
+        object.__setattr__(account, '__dict__', {'id': id, 'name': name, 'balance': balance})
+        object.__setattr__(account, '__pydantic_fields_set__', {'id', 'name', 'balance'})
+        object.__setattr__(account, '__pydantic_extra__', None)
+        object.__setattr__(account, '__pydantic_private__', None)
+        return account
+
+    def _balance_scale(self) -> Optional[int]:
+        """Returns the decimal places the account's store can hold, or None if there is no limit."""
+        return None
+
+    def _check_scale(self, amount: Decimal, *others: 'Account') -> Optional[str]:
+        """Returns an error message if amount has more decimal places than this account's store,
+        or the stores of others, can hold, else None."""
+        for account in (self,) + others:
+            scale = account._balance_scale()
+            if scale is not None and amount.as_tuple().exponent < -scale:
+                return f"Amount cannot have more than {scale} decimal places!"
+        return None
+
+    def _check_range(self, balance: Decimal) -> Optional[str]:
+        """Returns an error message if this account's store cannot hold balance, e.g. a scaled
+        balance beyond the 64 bits of a columnar store, else None."""
+        scale = self._balance_scale()
+        if scale is not None and balance.scaleb(scale) > MAX_SCALED:
+            return f"Balance cannot exceed {from_scaled(MAX_SCALED, scale)}!"
+        return None
+
+    def deposit(self, amount: str, recorder: Optional['Ledger'] = None) -> Tuple[bool, str]:
         """Deposits a specified amount into the account.
 
         Args:
             amount (str): The amount to deposit as a string representation of a number.
+            recorder (Optional[Ledger], optional): Records the deposit: a Ledger, or the
+                BankingSystem, which updates its totals and ledger. Without the bank, banks
+                rebuild their running totals on next use. Defaults to None.
 
         Returns:
             Tuple[bool, str]: A tuple containing a boolean indicating success flag and a message
@@ -40,16 +151,30 @@ class Account(BaseModel):
         # Handle negative amount
         if amount <= 0:
             return False, "Deposit amount must be positive!"
+        message = self._check_scale(amount)
+        if message:
+            return False, message
         
-        self.balance += amount
+        with account_lock(self.id):
+            message = self._check_range(self.balance + amount)
+            if message:
+                return False, message
+            self.balance += amount
+            balance = self.balance
+            if recorder is not None:
+                recorder.record('deposit', self.id, amount, balance)
+            _mark_unrecorded(recorder)
 
-        return True, f"Deposited {amount} to account {self.id}. New balance: {self.balance}."
+        return True, f"Deposited {amount} to account {self.id}. New balance: {balance}."
     
-    def withdraw(self, amount: str) -> Tuple[bool, str]:
+    def withdraw(self, amount: str, recorder: Optional['Ledger'] = None) -> Tuple[bool, str]:
         """Withdraws a specified amount from the account.
 
         Args:
             amount (str): The amount to withdraw as a string representation of a number.
+            recorder (Optional[Ledger], optional): Records the withdrawal: a Ledger, or the
+                BankingSystem, which updates its totals and ledger. Without the bank, banks
+                rebuild their running totals on next use. Defaults to None.
 
         Returns:
             Tuple[bool, str]: A tuple containing a boolean indicating success flag and a message
@@ -67,18 +192,27 @@ class Account(BaseModel):
         # Handle negative amount
         if amount <= 0:
             return False, "Withdrawal amount must be positive!"
+        message = self._check_scale(amount)
+        if message:
+            return False, message
         
-        # Handle insufficient balance
-        if amount > self.balance:
-            return False, "Insufficient balance!"
-        
-        self.balance -= amount
+        with account_lock(self.id):
+            # Handle insufficient balance
+            if amount > self.balance:
+                return False, "Insufficient balance!"
+            
+            self.balance -= amount
+            balance = self.balance
+            if recorder is not None:
+                recorder.record('withdraw', self.id, amount, balance)
+            _mark_unrecorded(recorder)
 
-        return True, f"Withdrew {amount} from account {self.id}. New balance: {self.balance}"
+        return True, f"Withdrew {amount} from account {self.id}. New balance: {balance}"
     
     def transfer(self, amount: str, recipient_id: int, bank: 'BankingSystem') -> Tuple[bool, str]:
         """Transfers a specified amount to a recipient account. 
         Non-existent recipient account is handled in main.py.
+        The transfer is recorded by the bank, which updates its totals and ledger.
 
         Args:
             amount (str): The amount to transfer as a string representation of a number.
@@ -102,14 +236,109 @@ class Account(BaseModel):
         if amount <= 0:
             return False, "Transfer amount must be positive!"
         
-        # Handle insufficient balance
-        if amount > self.balance:
-            return False, "Insufficient balance!"
-        
         recipient = bank.get_account(recipient_id)
-        
-        self.balance -= amount
-        recipient.balance += amount
+        message = self._check_scale(amount, recipient)
+        if message:
+            return False, message
+
+        # Lock both accounts so concurrent transfers can neither overdraw nor lose money
+        with locked(self.id, recipient_id):
+            # Handle insufficient balance
+            if amount > self.balance:
+                return False, "Insufficient balance!"
+            message = recipient._check_range(recipient.balance + amount)
+            if message:
+                return False, message
+            
+            self.balance -= amount
+            recipient.balance += amount
+            balance = self.balance
+            record = getattr(bank, 'record', None)
+            if record is not None:
+                record('transfer_out', self.id, amount, balance, recipient_id)
+                record('transfer_in', recipient_id, amount, recipient.balance, self.id)
+            _mark_unrecorded(bank)
+
+        return True, f"Transferred {amount} to account {recipient_id}. New balance: {balance}"
+
+    def transfer_many(self, payments: Sequence[Tuple[int, str]], bank: 'BankingSystem') -> Tuple[bool, List[str]]:
+        """Transfers amounts to many recipients at once, all or nothing, e.g. for a payroll run.
+
+        Every amount and recipient is checked in one pass before any balance changes. If all are
+        valid and the balance covers their total, the account is debited once for the total and
+        every recipient is credited, while the account and all recipients are locked. Each
+        payment is recorded by the bank as its own transfer, so the ledger shows one entry per
+        recipient. A recipient may appear more than once.
+
+        Args:
+            payments (Sequence[Tuple[int, str]]): (recipient_id, amount) pairs, with amounts as
+                strings like in transfer().
+            bank (BankingSystem): The banking system managing accounts.
+
+        Returns:
+            Tuple[bool, List[str]]: Whether every payment was made, and one message per payment.
+                If any payment is invalid or the balance does not cover the total, no money
+                moves and every other payment's message says so.
+        """
+        amounts = []
+        recipients = {}
+        messages = []
+        failed = False
+        for recipient_id, amount in payments:
+            message = None
+            try:
+                amount = convert_decimal(amount)
+            except (ValueError, TypeError) as err:
+                message = str(err)
+            else:
+                if amount <= 0:
+                    message = "Transfer amount must be positive!"
+                elif recipient_id == self.id:
+                    message = "Cannot transfer to the same account!"
+                elif recipient_id not in recipients:
+                    recipient = bank.get_account(recipient_id)
+                    if recipient is None:
+                        message = f"Recipient with ID {recipient_id} does not exist."
+                    else:
+                        recipients[recipient_id] = recipient
+                if message is None:
+                    message = self._check_scale(amount, recipients[recipient_id])
+            amounts.append(amount)
+            messages.append(message)
+            failed = failed or message is not None
+        if failed:
+            return False, [message or NOT_TRANSFERRED for message in messages]
+
+        total = sum(amounts, Decimal(0))
+        with locked(self.id, *recipients):
+            # Handle insufficient balance
+            if total > self.balance:
+                return False, [f"Insufficient balance for the total of {total}!"] * len(messages)
+            received = {recipient_id: recipient.balance for recipient_id, recipient in recipients.items()}
+            for (recipient_id, _), amount in zip(payments, amounts):
+                received[recipient_id] += amount
+            messages = [recipients[recipient_id]._check_range(received[recipient_id]) for recipient_id, _ in payments]
+            if any(messages):
+                return False, [message or NOT_TRANSFERRED for message in messages]
+
+            balance = self.balance
+            self.balance = balance - total
+            record = getattr(bank, 'record', None)
+            for (recipient_id, _), amount in zip(payments, amounts):
+                recipient = recipients[recipient_id]
+                recipient.balance += amount
+                # Record each payment with the balance it left, as separate transfers would
+                balance -= amount
+                if record is not None:
+                    record('transfer_out', self.id, amount, balance, recipient_id)
+                    record('transfer_in', recipient_id, amount, recipient.balance, self.id)
+            _mark_unrecorded(bank)
+
+        return True, [f"Transferred {amount} to account {recipient_id}." for (recipient_id, _), amount in zip(payments, amounts)]
 
-        return True, f"Transferred {amount} to account {recipient_id}. New balance: {self.balance}"
 
+# Timed in the stats of the bank passed to them, see BankingSystem.stats
+instrument(Account, 'deposit', 1, 'recorder')
+instrument(Account, 'withdraw', 1, 'recorder')
+instrument(Account, 'transfer', 2, 'bank')
+instrument(Account, 'transfer_many', 1, 'bank')
@@ -0,0 +1,268 @@
+import argparse
+import decimal
+import os
+import time
+from bisect import bisect
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal, ROUND_HALF_EVEN
+from itertools import islice
+from typing import Callable, Iterator, List, NamedTuple, Optional, Tuple
+from account import locked
+from banking_system import BankingSystem
+
+ROUNDINGS = frozenset((
+    decimal.ROUND_UP, decimal.ROUND_DOWN, decimal.ROUND_CEILING, decimal.ROUND_FLOOR, decimal.ROUND_HALF_UP,
+    decimal.ROUND_HALF_DOWN, decimal.ROUND_HALF_EVEN, decimal.ROUND_05UP,
+))
+# Products of a balance and a rate are exact in this context, so interest is rounded only once
+_EXACT = decimal.Context(prec=100)
+
+# (account_id, balance it was computed from, interest, fee)
+Charge = Tuple[int, Decimal, Decimal, Decimal]
+
+
+class Schedule(NamedTuple):
+    """An interest and fee schedule, applied to every account once per period.
+
+    Interest is the balance times the rate of the highest tier it reaches, or `rate` below every
+    tier, rounded once to `scale` decimal places with `rounding`. The fee is charged after the
+    interest is added, unless that balance reaches fee_waived_from, and never takes more than
+    the account holds.
+
+    Attributes:
+        rate (Decimal): Interest per period as a fraction of the balance, e.g. 0.001 for 0.1%.
+        fee (Decimal): Flat fee per account and period.
+        fee_waived_from (Optional[Decimal]): Balance from which no fee is charged, or None to
+            charge every account.
+        tiers (Tuple[Tuple[Decimal, Decimal], ...]): (minimum balance, rate) pairs in ascending
+            order of minimum balance, overriding `rate` from that balance on.
+        scale (int): Decimal places of the interest, e.g. 2 for cents.
+        rounding (str): A decimal rounding mode. Defaults to decimal.ROUND_HALF_EVEN, banker's rounding.
+    """
+    rate: Decimal = Decimal(0)
+    fee: Decimal = Decimal(0)
+    fee_waived_from: Optional[Decimal] = None
+    tiers: Tuple[Tuple[Decimal, Decimal], ...] = ()
+    scale: int = 2
+    rounding: str = ROUND_HALF_EVEN
+
+
+def check_schedule(schedule: Schedule) -> None:
+    """Checks that a schedule can be applied.
+
+    Raises:
+        ValueError: If a rate or the fee is negative or not finite, the tiers are out of order,
+            the fee has more than `scale` decimal places or the rounding mode is unknown.
+    """
+    rates = [schedule.rate] + [rate for _, rate in schedule.tiers]
+    if any(not rate.is_finite() or rate < 0 for rate in rates):
+        raise ValueError("Interest rates must be non-negative numbers!")
+    if not schedule.fee.is_finite() or schedule.fee < 0:
+        raise ValueError("The fee must be a non-negative number!")
+    if schedule.scale < 0:
+        raise ValueError("The scale cannot be negative!")
+    if schedule.fee.as_tuple().exponent < -schedule.scale:
+        raise ValueError(f"The fee cannot have more than {schedule.scale} decimal places!")
+    thresholds = [threshold for threshold, _ in schedule.tiers]
+    if thresholds != sorted(thresholds):
+        raise ValueError("Tiers must be in ascending order of minimum balance!")
+    if schedule.rounding not in ROUNDINGS:
+        raise ValueError(f"Unknown rounding mode {schedule.rounding!r}!")
+
+
+def _charges(schedule: Schedule, rows: List[Tuple[int, Decimal]]) -> List[Charge]:
+    """Computes the interest and fee of every account of a chunk, possibly in a worker process.
+
+    Returns:
+        List[Charge]: The accounts whose balance changes, with the balance the charges were
+            computed from.
+    """
+    quantum = Decimal(1).scaleb(-schedule.scale)
+    rounding = schedule.rounding
+    multiply = _EXACT.multiply
+    rate, fee, waived_from = schedule.rate, schedule.fee, schedule.fee_waived_from
+    thresholds = [threshold for threshold, _ in schedule.tiers]
+    rates = [rate] + [tier_rate for _, tier_rate in schedule.tiers]
+    zero = Decimal(0)
+    charges = []
+    for account_id, balance in rows:
+        interest = multiply(balance, rates[bisect(thresholds, balance)]).quantize(quantum, rounding=rounding)
+        accrued = balance + interest
+        charged = zero if waived_from is not None and accrued >= waived_from else min(fee, accrued)
+        if interest or charged:
+            charges.append((account_id, balance, interest, charged))
+    return charges
+
+
+def _chunks(bank: BankingSystem, chunk_size: int) -> Iterator[List[Tuple[int, Decimal]]]:
+    """Streams the (id, balance) pairs of every account in chunks."""
+    accounts = bank.accounts
+    if hasattr(accounts, 'rows'):
+        rows = ((account_id, balance) for account_id, _, balance in accounts.rows())
+    else:
+        rows = ((account.id, account.balance) for account in list(accounts.values()))
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def accrue(bank: BankingSystem, schedule: Schedule, workers: Optional[int] = 0, chunk_size: int = 10000,
+           progress: Optional[Callable[[int, float], None]] = None) -> dict:
+    """Applies an interest and fee schedule to every account, and saves the bank once.
+
+    Accounts are read in chunks. The charges of a chunk are computed in this process or by a
+    pool of worker processes, then applied while balance changes are blocked, so deposits
+    and transfers only wait for one chunk at a time. A balance that changed since its chunk was
+    read is charged on its current value. Each account gets an 'interest' and a 'fee' record,
+    which update the totals, open snapshots and the ledger. All changes are written by a single
+    save_state at the end. Accounts opened while the job runs may be left out.
+
+    Args:
+        bank (BankingSystem): The bank to apply the schedule to.
+        schedule (Schedule): The interest and fee schedule.
+        workers (Optional[int], optional): Worker processes computing the charges, 0 to compute
+            them in this process. None means one per CPU, or none on a single CPU. Defaults to 0.
+        chunk_size (int, optional): Accounts per chunk. Defaults to 10000.
+        progress (Optional[Callable[[int, float], None]], optional): Called after every chunk with
+            the accounts processed so far and the elapsed seconds. Defaults to None.
+
+    Returns:
+        dict: 'accounts' processed, 'changed' accounts, total 'interest' and 'fees' (Decimal),
+            'capped' fees that took a whole balance, 'recomputed' accounts that changed while
+            their chunk was in flight, 'seconds' and 'accounts_per_min'.
+
+    Raises:
+        ValueError: If the schedule is invalid, or has more decimal places than a columnar or
+            binary store keeps.
+    """
+    check_schedule(schedule)
+    if (bank.columnar or bank.binary) and schedule.scale > bank.scale:
+        raise ValueError(f"The store keeps {bank.scale} decimal places, the schedule needs {schedule.scale}!")
+    start = time.perf_counter()
+    accounts = bank.accounts
+    record_many = bank.record_many
+    # Columnar and binary stores change balances in place without creating account views
+    swap_balances = getattr(accounts, 'swap_balances', None)
+    report = {'accounts': 0, 'changed': 0, 'interest': Decimal(0), 'fees': Decimal(0), 'capped': 0, 'recomputed': 0}
+
+    def apply(size: int, charges: List[Charge]) -> None:
+        entries = []
+        recomputed = 0
+        with locked():
+            if swap_balances is not None:
+                stale = swap_balances((account_id, balance, balance + interest - fee)
+                                      for account_id, balance, interest, fee in charges)
+                if stale:
+                    # Charged again on the current balance, which cannot change while locked
+                    recomputed = len(stale)
+                    stale_ids = {account_id for account_id, _ in stale}
+                    recharges = _charges(schedule, stale)
+                    swap_balances((account_id, balance, balance + interest - fee)
+                                  for account_id, balance, interest, fee in recharges)
+                    charges = [charge for charge in charges if charge[0] not in stale_ids] + recharges
+            else:
+                applied = []
+                for charge in charges:
+                    account = accounts.get(charge[0])
+                    if account is None:
+                        continue
+                    if account.balance != charge[1]:
+                        recomputed += 1
+                        recharge = _charges(schedule, [(charge[0], account.balance)])
+                        if not recharge:
+                            continue
+                        charge = recharge[0]
+                    account_id, balance, interest, fee = charge
+                    account.balance = balance + interest - fee
+                    applied.append(charge)
+                charges = applied
+            for account_id, balance, interest, fee in charges:
+                accrued = balance + interest
+                if interest:
+                    entries.append(('interest', account_id, interest, accrued, None))
+                if fee:
+                    entries.append(('fee', account_id, fee, accrued - fee, None))
+            record_many(entries)
+        report['accounts'] += size
+        report['changed'] += len(charges)
+        report['interest'] += sum((interest for _, _, interest, _ in charges), Decimal(0))
+        report['fees'] += sum((fee for _, _, _, fee in charges), Decimal(0))
+        report['capped'] += sum(1 for _, balance, interest, fee in charges if fee and fee == balance + interest)
+        report['recomputed'] += recomputed
+        if progress is not None:
+            progress(report['accounts'], time.perf_counter() - start)
+
+    chunks = _chunks(bank, chunk_size)
+    if workers is None:
+        # Shipping chunks to a single worker only adds pickling to the same amount of work
+        workers = os.cpu_count() or 1
+        workers = workers if workers > 1 else 0
+    if workers:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Bounded, so the chunks read ahead of the one being applied stay few and fresh
+            in_flight = deque()
+            for chunk in chunks:
+                in_flight.append((len(chunk), pool.submit(_charges, schedule, chunk)))
+                if len(in_flight) >= 2 * workers:
+                    size, future = in_flight.popleft()
+                    apply(size, future.result())
+            while in_flight:
+                size, future = in_flight.popleft()
+                apply(size, future.result())
+    else:
+        for chunk in chunks:
+            apply(len(chunk), _charges(schedule, chunk))
+
+    if report['changed']:
+        # Ledger entries first, so the saved balances never lack the entries that led to them
+        if bank.ledger is not None:
+            bank.ledger.flush()
+        bank.save_state()
+
+    elapsed = time.perf_counter() - start
+    report['seconds'] = elapsed
+    report['accounts_per_min'] = report['accounts'] / elapsed * 60 if elapsed else 0.0
+    return report
+
+
+def _decimal(text: str) -> Decimal:
+    """Parses a command line number."""
+    try:
+        return Decimal(text)
+    except decimal.InvalidOperation:
+        raise argparse.ArgumentTypeError(f"invalid number {text!r}") from None
+
+
+def _tier(text: str) -> Tuple[Decimal, Decimal]:
+    """Parses a 'minimum_balance:rate' tier."""
+    threshold, _, rate = text.partition(':')
+    return _decimal(threshold), _decimal(rate)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply interest and fees to every account.")
+    parser.add_argument('--csv-path', default='data/accounts.csv', help="the bank to apply them to")
+    parser.add_argument('--rate', type=_decimal, default=Decimal(0), help="interest per period, e.g. 0.001 for 0.1%%")
+    parser.add_argument('--tier', type=_tier, action='append', default=[], metavar='MIN_BALANCE:RATE',
+                        help="rate from a minimum balance on, repeatable in ascending order")
+    parser.add_argument('--fee', type=_decimal, default=Decimal(0), help="flat fee per account")
+    parser.add_argument('--fee-waived-from', type=_decimal, help="balance from which no fee is charged")
+    parser.add_argument('--scale', type=int, default=2, help="decimal places of the interest")
+    parser.add_argument('--rounding', default=ROUND_HALF_EVEN, choices=sorted(ROUNDINGS))
+    parser.add_argument('--workers', type=int, default=0, help="processes computing the charges (default: none)")
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--journal', action='store_true')
+    parser.add_argument('--columnar', action='store_true')
+    args = parser.parse_args()
+    bank = BankingSystem(csv_path=args.csv_path, journal=args.journal, columnar=args.columnar)
+    schedule = Schedule(args.rate, args.fee, args.fee_waived_from, tuple(args.tier), args.scale, args.rounding)
+    report = accrue(
+        bank, schedule, args.workers, args.chunk_size,
+        progress=lambda done, seconds: print(f"{done:,} accounts, {done / seconds:,.0f} accounts/s", flush=True)
+    )
+    bank.close()
+    print(f"Paid {report['interest']} interest and charged {report['fees']} in fees to {report['changed']:,} of "
+          f"{report['accounts']:,} accounts in {report['seconds']:.2f} s ({report['accounts_per_min']:,.0f} accounts/min).")
@@ -1,28 +1,264 @@
 import csv
+import gc
+import io
+import json
+import os
+import threading
+import time
+import zlib
+from contextlib import nullcontext
 from decimal import Decimal
-from typing import Dict, Tuple, Optional
-from account import Account
-from utils import convert_decimal
+from typing import Dict, Iterable, List, Sequence, Set, Tuple, Optional
+from account import Account, locked, unrecorded_changes
+from columnar_store import ColumnarAccounts
+from binary_snapshot import BinaryAccounts, write_binary
+from journal import Journal
+from lazy_store import LazyAccounts
+from ledger import CREDITS, Ledger
+from totals import Totals
+from name_index import NameIndex
+from snapshot import Snapshot
+from sqlite_store import SQLiteStorage
+from storage import Storage
+from persistence import CommitScheduler, sync_directory, sync_file
+from stats import Stats
+from utils import MAX_SCALED, convert_decimal, from_scaled
+
+# Operations of apply_batch, with their number of fields
+BATCH_OPS = {'deposit': 3, 'withdraw': 3, 'transfer': 4}
+
+
+class _ChecksumWriter:
+    """Wraps a text file and keeps a running CRC-32 of the UTF-8 text written through it."""
+    def __init__(self, f):
+        self.f = f
+        self.checksum = 0
+
+    def write(self, data: str) -> int:
+        self.checksum = zlib.crc32(data.encode('utf-8'), self.checksum)
+        return self.f.write(data)
+
+
+def parse_initial_balance(initial_balance: str, scale: Optional[int] = None, max_precision: Optional[int] = None,
+                          max_scale: Optional[int] = None) -> Tuple[Optional[Decimal], str]:
+    """Validates an initial balance.
+
+    Args:
+        initial_balance (str): The initial balance as a string representation of a number.
+        scale (Optional[int], optional): Decimal places kept by the account store, or None if it
+            keeps any number. Defaults to None.
+        max_precision (Optional[int], optional): Passed on to convert_decimal. Defaults to None.
+        max_scale (Optional[int], optional): Passed on to convert_decimal. Defaults to None.
+
+    Returns:
+        Tuple[Optional[Decimal], str]: The parsed balance (or None if invalid) and an error
+            message, empty if the balance is valid.
+    """
+    try:
+        initial_balance = convert_decimal(initial_balance, max_precision, max_scale)
+    except (ValueError, TypeError) as err:
+        return None, str(err)
+    
+    # Handle negative initial_balance
+    if initial_balance < 0:
+        return None, "Initial balance cannot be negative!"
+    # The columnar store and binary snapshots keep a fixed number of decimal places in 64 bits
+    if scale is not None and initial_balance.as_tuple().exponent < -scale:
+        return None, f"Initial balance cannot have more than {scale} decimal places!"
+    if scale is not None and initial_balance.scaleb(scale) > MAX_SCALED:
+        return None, f"Initial balance cannot exceed {from_scaled(MAX_SCALED, scale)}!"
+    return initial_balance, ""
+
 
 class BankingSystem:
     """Manages bank accounts, storing them in a dictionary and persisting to a CSV file.
 
     Attributes:
         csv_path (str): Path to the CSV file for storing account data.
-        accounts (Dict[int, Account]): Dictionary mapping account IDs to Account objects.
+        journal (Optional[Journal]): Write-ahead journal replayed on top of the CSV snapshot,
+            or None if every commit rewrites the CSV file.
+        compact_threshold (int): Number of journal records after which the journal is folded
+            back into a fresh CSV snapshot.
+        accounts (Dict[int, Account]): Dictionary mapping account IDs to Account objects. With
+            columnar=True this is a ColumnarAccounts store handing out AccountView objects, and
+            for a '.bin' csv_path a memory-mapped BinaryAccounts snapshot.
+        next_id (int): ID high-water mark, the ID handed to the next created account. Persisted
+            to '<csv_path>.meta' by save_state.
+        trusted (bool): If True, load_state skips per-row validation for snapshots whose checksum
+            matches the one recorded by save_state.
+        fsync (bool): If True, snapshots and journal records are forced to disk before a commit
+            counts as persisted.
+        scheduler (CommitScheduler): Decides when commits are persisted, see the durability argument.
+        incremental (bool): If True, commits without a journal write the accounts changed since
+            the last snapshot to '<csv_path>.delta' instead of rewriting the CSV file.
+        dirty_ratio (float): Share of dirty accounts above which an incremental commit rewrites
+            the whole CSV file instead.
+        ledger (Optional[Ledger]): Ledger of every deposit, withdrawal and transfer, or None if
+            no history is kept.
+        load_drift (Optional[str]): How the last loaded snapshot differs from the totals saved
+            with it, or None if they match. Not checked for a lazy store.
+        lazy (bool): If True, accounts are parsed from the CSV file on first access.
+        storage (Optional[Storage]): Backend keeping the accounts in place of the CSV file, or
+            None. A csv_path ending in '.db' or '.sqlite' selects an SQLiteStorage.
+        metrics (Stats): Counts and latencies of account operations and persistence calls, see
+            stats(). Set `metrics.enabled` to switch recording on or off at runtime.
     """
-    def __init__(self, csv_path: str = 'data/accounts.csv'):
+    # Account methods given the bank leave its running totals up to date, see totals
+    keeps_totals = True
+
+    def __init__(self, csv_path: str = 'data/accounts.csv', journal: bool = False, compact_threshold: int = 10000,
+                 columnar: bool = False, scale: int = 2, trusted: bool = False, durability: str = 'always',
+                 group_size: int = 100, group_interval_ms: float = 50.0, fsync: bool = False,
+                 incremental: bool = False, dirty_ratio: float = 0.1, ledger: bool = False,
+                 stats: bool = False, stats_path: Optional[str] = None, stats_interval: float = 60.0,
+                 lazy: bool = False, storage: Optional[Storage] = None):
         """Initializes a BankingSystem instance, loading accounts from a CSV file.
         Args:
-            csv_path (str, optional): Path to the CSV file. Defaults to 'data/accounts.csv'.
+            csv_path (str, optional): Path to the CSV file. Defaults to 'data/accounts.csv'. A path
+                ending in '.bin' selects the binary snapshot format instead.
+            journal (bool, optional): If True, commits append to '<csv_path>.journal' instead of
+                rewriting the CSV file. Defaults to False.
+            compact_threshold (int, optional): Journal size that triggers compaction. Defaults to 10000.
+            columnar (bool, optional): If True, accounts are kept in a compact ColumnarAccounts
+                store instead of a dictionary. Defaults to False.
+            scale (int, optional): Decimal places kept for balances by the columnar store and new
+                binary snapshots. An existing binary snapshot sets it from its header. Defaults to 2.
+            trusted (bool, optional): If True, snapshots written by save_state are loaded without
+                per-row validation. Only use it for files this system wrote. Defaults to False.
+            durability (str, optional): When commits are persisted: 'always' before commit returns,
+                'group' by a background writer once group_size commits are pending or
+                group_interval_ms has passed, or 'manual' only on flush(). Defaults to 'always'.
+            group_size (int, optional): Pending commits that trigger a group commit. Defaults to 100.
+            group_interval_ms (float, optional): Longest delay of a group commit. Defaults to 50.0.
+            fsync (bool, optional): If True, fsync snapshots and journal appends. Defaults to False.
+            incremental (bool, optional): If True, commits without a journal only write the
+                accounts changed since the last snapshot, to '<csv_path>.delta'. Binary snapshots
+                are always updated in place. Defaults to False.
+            dirty_ratio (float, optional): Share of dirty accounts that makes an incremental
+                commit rewrite the whole CSV file. Defaults to 0.1.
+            ledger (bool, optional): If True, balance changes are recorded in '<csv_path>.ledger'.
+                Defaults to False.
+            stats (bool, optional): If True, operations are timed from the start, including
+                load_state. Defaults to False.
+            stats_path (Optional[str], optional): If set, a snapshot of stats() is written to this
+                JSON file every stats_interval seconds and on close(). Defaults to None.
+            stats_interval (float, optional): Seconds between stats dumps. Defaults to 60.0.
+            lazy (bool, optional): If True, the CSV file is not parsed on load; an offset index
+                next to it, '<csv_path>.idx', lets each account be parsed on first access instead.
+                Combine with incremental=True or journal=True, since rewriting the whole CSV file
+                loads every account. Defaults to False.
+            storage (Optional[Storage], optional): Backend keeping the accounts instead of the
+                CSV file, e.g. SQLiteStorage('data/accounts.db', cache=False). Every commit is
+                handed to its persist(). Defaults to None, or an SQLiteStorage for a csv_path
+                ending in '.db' or '.sqlite'.
+
+        Raises:
+            ValueError: If lazy is combined with a columnar or binary store, or a storage backend
+                with a journal, incremental saves, lazy loading or another store.
         """
+        if lazy and (columnar or str(csv_path).endswith('.bin')):
+            raise ValueError("Lazy loading only works with a CSV file and a dictionary store!")
+        if storage is None and str(csv_path).endswith(('.db', '.sqlite')):
+            storage = SQLiteStorage(csv_path, fsync=fsync)
+        if storage is not None and (journal or incremental or lazy or columnar or str(csv_path).endswith('.bin')):
+            raise ValueError("A storage backend replaces the CSV file, its journal, delta and other stores!")
+        self.storage = storage
         self.csv_path = csv_path
-        self.accounts: Dict[int, Account] = self.load_state()
+        self.binary = str(csv_path).endswith('.bin')
+        self.columnar = columnar
+        self.scale = scale
+        self.trusted = trusted
+        self.lazy = lazy
+        self.fsync = fsync
+        self.journal = Journal(f"{csv_path}.journal", fsync=fsync) if journal else None
+        self.ledger = Ledger(f"{csv_path}.ledger", fsync=fsync) if ledger else None
+        self.compact_threshold = compact_threshold
+        self.incremental = incremental
+        self.dirty_ratio = dirty_ratio
+        # IDs of accounts changed since the last full snapshot, and the CRC-32 of that snapshot
+        self._dirty: Set[int] = set()
+        self._base_checksum: Optional[int] = None
+        # Metadata saved with the CSV file a lazy store was opened from
+        self._lazy_meta: dict = {}
+        self._id_lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._index_lock = threading.Lock()
+        self._totals_lock = threading.Lock()
+        # unrecorded_changes() when the totals were built
+        self._totals_seen = 0
+        # Open snapshots, replaced rather than changed so writers can iterate without a lock
+        self._snapshots: Tuple[Snapshot, ...] = ()
+        self._snapshots_lock = threading.Lock()
+        self.load_drift: Optional[str] = None
+        self.metrics = Stats(stats)
+        start = time.perf_counter_ns() if self.metrics.enabled else 0
+        self.accounts = self.load_state()
+        if start:
+            self.metrics.observe('load_state', time.perf_counter_ns() - start)
+        # Never hand out an ID below the persisted high-water mark
+        self.next_id = max(self.next_id, self._load_meta().get('next_id', 1))
+        self.scheduler = CommitScheduler(self._persist, durability, group_size, group_interval_ms)
+        if stats_path is not None:
+            self.metrics.start_dump(stats_path, stats_interval)
+
+    @property
+    def accounts(self) -> Dict[int, Account]:
+        return self._accounts
+
+    @accounts.setter
+    def accounts(self, accounts: Dict[int, Account]) -> None:
+        # Replacing the whole dictionary re-seeds the ID high-water mark from its keys. Stores
+        # sorted by ID know their highest ID without a scan.
+        self._accounts = accounts
+        # The name index and totals are rebuilt from the new accounts when next used
+        self._name_index = None
+        self._totals = None
+        last_id = getattr(accounts, 'last_id', None)
+        self.next_id = (last_id() if last_id is not None else max(accounts, default=0)) + 1
+
+    def _load_meta(self) -> dict:
+        """Reads the metadata saved next to the CSV file, or an empty dict if there is none."""
+        try:
+            with open(f"{self.csv_path}.meta", 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_meta(self, checksum: Optional[int], totals: Optional[Totals] = None) -> None:
+        """Writes the metadata next to the CSV file.
+
+        Args:
+            checksum (Optional[int]): CRC-32 of the CSV snapshot that was just written, or None
+                for a binary snapshot.
+            totals (Optional[Totals], optional): Aggregates of the snapshot, checked on load.
+                Defaults to None.
+        """
+        tmp_path = f"{self.csv_path}.meta.tmp"
+        meta = {'next_id': self.next_id, 'checksum': checksum}
+        if totals is not None:
+            meta['totals'] = totals.as_dict()
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+            if self.fsync:
+                sync_file(f)
+        os.replace(tmp_path, f"{self.csv_path}.meta")
+        if self.fsync:
+            sync_directory(self.csv_path)
 
     def load_state(self) -> Dict[int, Account]:
         """Loads account data from the CSV file into a dictionary and returns it.
 
-        If the CSV file does not exist, creates an empty file with headers.
+        If the CSV file does not exist, creates an empty file with headers. In journaled mode,
+        records in the journal are replayed on top of the CSV snapshot. In trusted mode, a
+        snapshot whose checksum matches '<csv_path>.meta' is loaded without validating each row;
+        any other file falls back to the validating path. The garbage collector is paused while
+        loading, since none of the new objects can form reference cycles. A binary snapshot is
+        memory-mapped rather than parsed. Records of '<csv_path>.delta' written by incremental
+        commits are applied on top of the CSV snapshot they were written against. The aggregates
+        of a CSV snapshot are recomputed and compared with those saved by save_state, and any
+        difference is kept in load_drift. In lazy mode the CSV snapshot is only indexed, see
+        LazyAccounts, and its totals are not checked. With a storage backend, its account store
+        is opened instead.
 
         Returns:
             Dict[int, Account]: Dictionary of account IDs to Account objects.
@@ -30,50 +266,356 @@ class BankingSystem:
         Raises:
             FileNotFoundError: If the CSV file cannot be found, FileNotFoundError is raised and create it.
         """
-        accounts = {}
+        if self.storage is not None:
+            self.load_drift = None
+            return self.storage.open()
+        if self.binary:
+            if not os.path.exists(self.csv_path):
+                write_binary(self.csv_path, [], self.scale, self.fsync)
+            accounts = BinaryAccounts(self.csv_path)
+            # An existing file keeps the scale in its header, whatever scale was passed in
+            self.scale = accounts.scale
+            if self.journal is not None:
+                self.journal.replay(accounts)
+            return accounts
+        self._dirty = set()
+        self._base_checksum = None
+        if self.lazy:
+            if not os.path.exists(self.csv_path):
+                with open(self.csv_path, 'w', newline='', encoding='utf-8') as f:
+                    csv.writer(f).writerow(['id', 'name', 'balance'])
+            accounts = LazyAccounts(self.csv_path)
+            self._lazy_meta = self._load_meta()
+            self.load_drift = None
+            self._apply_delta(accounts)
+            if self.journal is not None:
+                self.journal.replay(accounts)
+            return accounts
+        accounts = ColumnarAccounts(self.scale) if self.columnar else {}
+        gc_enabled = gc.isenabled()
+        gc.disable()
         try:
-            # read accounts if the csv file exists
-            with open(self.csv_path, 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    account_id = int(row['id'])
-                    accounts.update({
-                        account_id:
-                        Account(
+            if not (self.trusted and self._load_trusted(accounts)):
+                # read accounts if the csv file exists
+                with open(self.csv_path, 'r', encoding='utf-8') as f:
+                    reader = csv.DictReader(f)
+                    for row in reader:
+                        account_id = int(row['id'])
+                        accounts[account_id] = Account(
                             id = account_id, 
                             name = row['name'], 
                             balance = Decimal(row['balance'])
                         )
-                    })
         except FileNotFoundError:
             # create the csv file if not exists
-            with open(self.csv_path, 'w', newline='') as f:
+            with open(self.csv_path, 'w', newline='', encoding='utf-8') as f:
                 writer = csv.DictWriter(f, fieldnames=['id','name','balance'])
                 writer.writeheader()
+        finally:
+            if gc_enabled:
+                gc.enable()
+        saved_totals = self._load_meta().get('totals')
+        self.load_drift = None
+        if saved_totals is not None:
+            loaded = Totals.build(account.balance for account in accounts.values())
+            drift = Totals.from_dict(saved_totals).diff(loaded)
+            if drift is not None:
+                self.load_drift = f"Snapshot totals drifted since the last save: {drift}."
+        self._apply_delta(accounts)
+        if self.journal is not None:
+            self.journal.replay(accounts)
         return accounts
+
+    def _apply_delta(self, accounts: Dict[int, Account]) -> None:
+        """Applies the records of '<csv_path>.delta' on top of the loaded CSV snapshot.
+
+        The delta starts with a ('delta', checksum) row naming the CRC-32 of the snapshot it was
+        written against. A delta left behind by a crash after a newer snapshot was written does
+        not match, and is ignored. The applied accounts stay dirty, so the next delta keeps them.
+
+        Args:
+            accounts (Dict[int, Account]): Accounts loaded from the CSV snapshot. Updated in place.
+        """
+        try:
+            with open(f"{self.csv_path}.delta", 'r', newline='', encoding='utf-8') as f:
+                rows = list(csv.reader(f))
+        except FileNotFoundError:
+            return
+        if not rows or rows[0][0] != 'delta' or int(rows[0][1]) != self._snapshot_checksum():
+            return
+        for account_id, name, balance in rows[1:]:
+            account_id = int(account_id)
+            accounts[account_id] = Account(id=account_id, name=name, balance=Decimal(balance))
+            self._dirty.add(account_id)
+
+    def _snapshot_checksum(self) -> int:
+        """Returns the CRC-32 of the CSV snapshot on disk, reading it only once per snapshot."""
+        if self._base_checksum is None:
+            with open(self.csv_path, 'rb') as f:
+                self._base_checksum = zlib.crc32(f.read())
+        return self._base_checksum
+
+    def _load_trusted(self, accounts: Dict[int, Account]) -> bool:
+        """Loads a snapshot written by save_state without per-row validation.
+
+        The whole file is checked once against the checksum in '<csv_path>.meta', after which rows
+        are built with Account.from_trusted.
+
+        Args:
+            accounts (Dict[int, Account]): Dictionary to load the accounts into.
+
+        Returns:
+            bool: True if the snapshot was loaded, False if it has no matching checksum.
+
+        Raises:
+            FileNotFoundError: If the CSV file does not exist.
+        """
+        with open(self.csv_path, 'rb') as f:
+            data = f.read()
+        checksum = self._load_meta().get('checksum')
+        if checksum is None or zlib.crc32(data) != checksum:
+            return False
+        self._base_checksum = checksum
+        reader = csv.reader(io.StringIO(data.decode('utf-8'), newline=''))
+        if next(reader, None) != ['id', 'name', 'balance']:
+            return False
+        construct = Account.from_trusted
+        for account_id, name, balance in reader:
+            account_id = int(account_id)
+            accounts[account_id] = construct(id=account_id, name=name, balance=Decimal(balance))
+        return True
     
     def save_state(self) -> None:
         """Saves the current accounts to the CSV file.
 
-        Overwrites the existing file with current account data.
+        Overwrites the existing file with current account data, and records the ID high-water
+        mark and the CRC-32 of the snapshot in '<csv_path>.meta'. The snapshot is written to a
+        temporary file and renamed over the old one, so a crash never leaves a partial snapshot
+        behind; with fsync=True it is also on disk before the rename. In journaled mode the journal is rotated when the snapshot is taken and the
+        rotated records are discarded once the new snapshot, which contains them, is in place.
+        Safe to call while other threads change balances: the accounts are read through a
+        Snapshot, so balance changes are only blocked while it is taken. A lazy store copies the
+        rows it never loaded from its CSV file, see LazyAccounts.write_snapshot, and derives the
+        saved totals from those of that file. With a storage backend,
+        this writes every change not persisted yet through Storage.save instead.
+
+        """
+        start = time.perf_counter_ns() if self.metrics.enabled else 0
+        if self.storage is not None:
+            self.storage.save()
+            if start:
+                self.metrics.observe('save_state', time.perf_counter_ns() - start)
+            return
+        with self._save_lock:
+            # Rows a lazy store never loaded are copied from its CSV file rather than parsed
+            copyable = isinstance(self.accounts, LazyAccounts) and self.accounts.can_copy()
+            # Take a consistent cut of all accounts. Balance changes are blocked only while the
+            # snapshot is taken, not while it is read, and no transfer can be half-applied in it.
+            journal_lock = self.journal.lock if self.journal is not None else nullcontext()
+            with journal_lock, locked():
+                snapshot = None
+                cut = None
+                if self.binary:
+                    # Balances are already in the mapped file, only added accounts need a rewrite
+                    self.accounts.rewrite(self.fsync)
+                elif copyable:
+                    cut = self.accounts.cut()
+                else:
+                    snapshot = self._open_snapshot()
+                # Records appended from here on are newer than the snapshot and go to a fresh journal
+                if self.journal is not None:
+                    self.journal.rotate()
+                # Accounts changed from here on are newer than the snapshot
+                self._dirty = set()
+            rows = None
+            if snapshot is not None:
+                with snapshot:
+                    rows = list(snapshot.rows())
+            checksum = None
+            totals = None
+            if rows is not None or cut is not None:
+                tmp_path = f"{self.csv_path}.tmp"
+                if cut is not None:
+                    with open(tmp_path, 'wb') as f:
+                        checksum, source_checksum, original = self.accounts.write_snapshot(f, *cut)
+                        if self.fsync:
+                            sync_file(f)
+                    totals = self._copied_totals(source_checksum, original, cut[0])
+                else:
+                    totals = Totals.build(row[2] for row in rows)
+                    with open(tmp_path,'w', newline='', encoding='utf-8') as f:
+                        checksum_writer = _ChecksumWriter(f)
+                        writer = csv.writer(checksum_writer)
+                        writer.writerow(['id','name','balance'])
+                        writer.writerows(rows)
+                        if self.fsync:
+                            sync_file(f)
+                    checksum = checksum_writer.checksum
+                os.replace(tmp_path, self.csv_path)
+                # The new snapshot includes every delta record
+                self._base_checksum = checksum
+                if os.path.exists(f"{self.csv_path}.delta"):
+                    os.remove(f"{self.csv_path}.delta")
+            self._save_meta(checksum, totals)
+            if self.journal is not None:
+                self.journal.discard_rotated()
+        if start:
+            written = os.path.getsize(self.csv_path) if rows is not None or cut is not None else 0
+            self.metrics.observe('save_state', time.perf_counter_ns() - start, written)
+
+    def _copied_totals(self, source_checksum: int, original: Dict[int, Decimal],
+                       rows: Dict[int, Tuple[int, str, Decimal]]) -> Optional[Totals]:
+        """Derives the totals of a snapshot written by LazyAccounts.write_snapshot from those saved
+        with the CSV file it was copied from.
+
+        Returns:
+            Optional[Totals]: The totals, or None if that file has no saved totals or its checksum
+                no longer matches them.
+        """
+        meta = self._lazy_meta
+        if meta.get('checksum') != source_checksum or 'totals' not in meta:
+            return None
+        totals = Totals.from_dict(meta['totals'])
+        total, count, zero = totals.total, totals.count, totals.zero
+        for balance in original.values():
+            total -= balance
+            count -= 1
+            zero -= not balance
+        for _, _, balance in rows.values():
+            total += balance
+            count += 1
+            zero += not balance
+        return Totals(total, count, zero)
+
+    def save_changes(self) -> None:
+        """Saves only the accounts changed since the last full snapshot.
+
+        Their current records are written to '<csv_path>.delta', replacing the previous delta, so
+        the cost grows with the number of changed accounts rather than with all accounts. Once
+        more than dirty_ratio of the accounts are dirty, the whole CSV file is rewritten instead
+        and the delta starts over.
+        """
+        if len(self._dirty) > self.dirty_ratio * len(self.accounts):
+            self.save_state()
+            return
+        start = time.perf_counter_ns() if self.metrics.enabled else 0
+        with self._save_lock:
+            dirty = sorted(self._dirty.copy())
+            base_checksum = self._snapshot_checksum()
+            # Lock only the dirty accounts, so the copy is still a consistent cut of them
+            with locked(*dirty):
+                rows = [(account.id, account.name, account.balance) for account in map(self.accounts.get, dirty)]
+            tmp_path = f"{self.csv_path}.delta.tmp"
+            with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(['delta', base_checksum])
+                writer.writerows(rows)
+                if self.fsync:
+                    sync_file(f)
+            os.replace(tmp_path, f"{self.csv_path}.delta")
+            if self.fsync:
+                sync_directory(self.csv_path)
+        if start:
+            self.metrics.observe('save_changes', time.perf_counter_ns() - start, os.path.getsize(f"{self.csv_path}.delta"))
+
+    def commit(self, *accounts: Account) -> None:
+        """Persists the changes made to the given accounts, according to the durability policy.
 
+        With the default 'always' policy the changes are persisted before commit returns. The
+        'group' and 'manual' policies only schedule them, see flush().
+
+        Args:
+            *accounts (Account): The accounts that were created or modified.
+        """
+        self.scheduler.submit(accounts)
+
+    def flush(self) -> None:
+        """Persists every commit still held by the 'group' or 'manual' durability policy."""
+        self.scheduler.flush()
+
+    def close(self) -> None:
+        """Flushes pending commits, stops the background writer of the 'group' policy and the stats
+        dump, and closes the ledger, a lazily loaded CSV file and the storage backend."""
+        self.scheduler.close()
+        if self.ledger is not None:
+            self.ledger.close()
+        if self.lazy:
+            self.accounts.close()
+        if self.storage is not None:
+            self.storage.close()
+        self.metrics.stop_dump()
+
+    def _persist(self, accounts: Iterable[Account]) -> None:
+        """Writes the changes made to the given accounts.
+
+        Without a journal this rewrites the whole CSV file, or in incremental mode saves the
+        changed accounts with save_changes. With a journal it appends one record
+        per account, and compacts the journal into a fresh snapshot once it grows past
+        compact_threshold records. Balance changes in a binary snapshot are already written in
+        place, so they are only flushed; new accounts still rewrite the file. A storage backend
+        writes the accounts through Storage.persist. Ledger entries are written first, so a
+        persisted balance never lacks the entries that led to it.
+
+        Args:
+            accounts (Iterable[Account]): The accounts that were created or modified.
+        """
+        metrics = self.metrics
+        start = time.perf_counter_ns() if metrics.enabled else 0
+        if self.ledger is not None:
+            self.ledger.flush()
+            if start:
+                metrics.observe('ledger_flush', time.perf_counter_ns() - start)
+        if self.storage is not None:
+            self.storage.persist(accounts)
+        elif self.binary and not self.accounts.pending:
+            self.accounts.flush()
+        elif self.journal is None:
+            if self.incremental and not self.binary:
+                self._dirty.update(account.id for account in accounts)
+                self.save_changes()
+            else:
+                self.save_state()
+        else:
+            if start:
+                append_start = time.perf_counter_ns()
+                size = os.path.getsize(self.journal.path) if os.path.exists(self.journal.path) else 0
+            self.journal.append(accounts)
+            if start:
+                metrics.observe('journal_append', time.perf_counter_ns() - append_start,
+                                os.path.getsize(self.journal.path) - size)
+            if self.journal.entries >= self.compact_threshold:
+                self.save_state()
+        if start:
+            metrics.observe('persist', time.perf_counter_ns() - start)
+
+    def reserve_ids(self, count: int) -> int:
+        """Reserves a contiguous range of account IDs.
+
+        Safe to call from several threads at once; every caller gets a disjoint range.
+
+        Args:
+            count (int): Number of IDs to reserve.
+
+        Returns:
+            int: The first reserved ID. The range is [first, first + count).
         """
-        with open(self.csv_path,'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=['id','name','balance'])
-            writer.writeheader()
-            for account in self.accounts.values():
-                writer.writerow({
-                    'id': account.id,
-                    'name': account.name,
-                    'balance': account.balance
-                })
+        with self._id_lock:
+            first_id = self.next_id
+            self.next_id += count
+        return first_id
 
-    def create_account(self, name: str, initial_balance: str) -> Tuple[Optional[Account],str]:
+    def _parse_initial_balance(self, initial_balance: str) -> Tuple[Optional[Decimal], str]:
+        """Validates an initial balance, see parse_initial_balance."""
+        return parse_initial_balance(initial_balance, self.scale if self.columnar or self.binary else None)
+
+    def create_account(self, name: str, initial_balance: str, account_id: Optional[int] = None) -> Tuple[Optional[Account],str]:
         """Creates a new account with the given name and initial balance.
 
         Args:
             name (str): The account holder's name.
             initial_balance (str): The initial balance as a string representation of a number.
+            account_id (Optional[int], optional): ID allocated by the caller, e.g. the router of a
+                ShardedBank. Defaults to None, which hands out the next free ID.
 
         Returns:
             Tuple[Optional[Account], str]: A tuple containing the created Account object (or None if
@@ -83,16 +625,17 @@ class BankingSystem:
             ValueError: If initial_balance is not a valid decimal number.
             TypeError: If initial_balance cannot be converted to a decimal.
         """
-        try:
-            initial_balance = convert_decimal(initial_balance)
-        except (ValueError, TypeError) as err:
-            return None, str(err)
-        
-        # Handle negative initial_balance
-        if initial_balance < 0:
-            return None, "Initial balance cannot be negative!"
+        initial_balance, message = self._parse_initial_balance(initial_balance)
+        if initial_balance is None:
+            return None, message
         
-        account_id = max([acc for acc in self.accounts], default=0) + 1 # increment acc id
+        if account_id is None:
+            account_id = self.reserve_ids(1) # increment acc id
+        else:
+            if account_id in self.accounts:
+                return None, f"Account {account_id} already exists."
+            with self._id_lock:
+                self.next_id = max(self.next_id, account_id + 1)
         account = Account(
                 id = account_id,
                 name = name,
@@ -102,8 +645,41 @@ class BankingSystem:
         self.accounts.update({
             account_id : account
         })
-        self.save_state()
+        self._opened([account])
+        self.commit(account)
+        # Hand out the stored account, which is a view rather than `account` for a columnar store
+        account = self.accounts[account_id]
         return account, f"Account created for {account.name} with ID {account.id} and initial balance {initial_balance}."
+
+    def create_accounts(self, rows: Iterable[Tuple[str, str]]) -> List[Tuple[Optional[Account], str]]:
+        """Creates many accounts at once, with a single commit.
+
+        Valid rows get consecutive IDs from one reserved range, in input order.
+
+        Args:
+            rows (Iterable[Tuple[str, str]]): (name, initial_balance) pairs.
+
+        Returns:
+            List[Tuple[Optional[Account], str]]: One (account, message) pair per row, as returned
+                by create_account.
+        """
+        parsed = [(name, *self._parse_initial_balance(initial_balance)) for name, initial_balance in rows]
+        account_id = self.reserve_ids(sum(1 for _, balance, _ in parsed if balance is not None))
+        results = []
+        created = []
+        for name, initial_balance, message in parsed:
+            if initial_balance is None:
+                results.append((None, message))
+                continue
+            self.accounts[account_id] = Account(id=account_id, name=name, balance=initial_balance)
+            account = self.accounts[account_id]
+            created.append(account)
+            results.append((account, f"Account created for {account.name} with ID {account.id} and initial balance {initial_balance}."))
+            account_id += 1
+        if created:
+            self._opened(created)
+            self.commit(*created)
+        return results
     
     def get_account(self, account_id: int) -> Optional[Account]:
         """Retrieves an account by its ID.
@@ -116,4 +692,285 @@ class BankingSystem:
         """
         account = self.accounts.get(account_id, None)
         return account
-    
+
+    def _opened(self, accounts: Iterable[Account]) -> None:
+        """Adds newly created accounts to the name index and the totals, if they have been built,
+        and leaves them out of open snapshots."""
+        accounts = list(accounts)
+        for snapshot in self._snapshots:
+            for account in accounts:
+                snapshot._exclude(account.id)
+        with self._index_lock:
+            if self._name_index is not None:
+                for account in accounts:
+                    self._name_index.add(account.id, account.name)
+        with self._totals_lock:
+            if self._totals is not None:
+                for account in accounts:
+                    self._totals.opened(account.balance)
+
+    def record(self, kind: str, account_id: int, amount: Decimal, balance: Decimal,
+               counterparty: Optional[int] = None) -> None:
+        """Records a balance change made by an Account method, with the arguments of Ledger.record.
+
+        Updates the totals, keeps the previous balance for open snapshots and appends to the
+        ledger, if the bank keeps one. Pass the bank to Account.deposit and Account.withdraw for
+        this, e.g. `account.deposit("50", bank)`.
+        """
+        snapshots = self._snapshots
+        if snapshots:
+            previous = balance - amount if kind in CREDITS else balance + amount
+            for snapshot in snapshots:
+                snapshot._keep(account_id, previous)
+        totals = self._totals
+        if totals is not None:
+            totals.record(kind, account_id, amount, balance, counterparty)
+        if self.ledger is not None:
+            self.ledger.record(kind, account_id, amount, balance, counterparty)
+
+    def record_many(self, entries: Sequence[Tuple[str, int, Decimal, Decimal, Optional[int]]]) -> None:
+        """Records many balance changes, like record() for each entry, with one update of the totals.
+
+        Args:
+            entries (Sequence[Tuple[str, int, Decimal, Decimal, Optional[int]]]): The arguments of
+                record() for each change, in the order the changes were made.
+        """
+        snapshots = self._snapshots
+        if snapshots:
+            for kind, account_id, amount, balance, _ in entries:
+                previous = balance - amount if kind in CREDITS else balance + amount
+                for snapshot in snapshots:
+                    snapshot._keep(account_id, previous)
+        totals = self._totals
+        if totals is not None:
+            totals.record_many(entries)
+        if self.ledger is not None:
+            for entry in entries:
+                self.ledger.record(*entry)
+
+    def snapshot(self) -> Snapshot:
+        """Takes a point-in-time view of all balances, for reports that run while balances change.
+
+        Balance changes are blocked only while the snapshot is registered, which takes a lock
+        per lock stripe rather than a copy per account. Close it when done, e.g.
+        `with bank.snapshot() as snapshot: report(snapshot.rows())`.
+
+        Returns:
+            Snapshot: The open snapshot.
+        """
+        with locked():
+            return self._open_snapshot()
+
+    def _open_snapshot(self) -> Snapshot:
+        """Registers a new snapshot. Callers hold every account lock, so no change is in flight."""
+        snapshot = Snapshot(self.accounts, self._close_snapshot)
+        with self._snapshots_lock:
+            self._snapshots = self._snapshots + (snapshot,)
+        return snapshot
+
+    def _close_snapshot(self, snapshot: Snapshot) -> None:
+        """Unregisters a closed snapshot."""
+        with self._snapshots_lock:
+            self._snapshots = tuple(open_snapshot for open_snapshot in self._snapshots if open_snapshot is not snapshot)
+
+    def _balances(self) -> Iterable[Decimal]:
+        """Iterates over every balance, read straight from the store without creating account views."""
+        accounts = self.accounts
+        if hasattr(accounts, 'rows'):
+            return (balance for _, _, balance in accounts.rows())
+        return (account.balance for account in list(accounts.values()))
+
+    @property
+    def totals(self) -> Totals:
+        """Running aggregates of all accounts: total balance, account count and zero balances.
+
+        Computed from all accounts on first use, with balance changes blocked meanwhile, and kept
+        up to date afterwards by record() and account creation, so polling them is O(1). Only
+        changes recorded by the bank keep them up to date: pass the bank to Account.deposit and
+        Account.withdraw. Once an Account method changed a balance without a bank, the totals
+        are computed again on next use. Balances assigned directly are not tracked at all.
+        """
+        totals = self._totals
+        if totals is None or self._totals_seen != unrecorded_changes():
+            with self._totals_lock:
+                totals = self._totals
+                if totals is None or self._totals_seen != unrecorded_changes():
+                    with locked():
+                        # Counted under the account locks, so no change slips in between
+                        self._totals_seen = unrecorded_changes()
+                        totals = self._totals = Totals.build(self._balances())
+        return totals
+
+    def verify(self, full: bool = False) -> Tuple[bool, str]:
+        """Checks the running totals for drift.
+
+        The default check is O(1): the totals must be internally consistent and count every
+        account, and the last loaded snapshot must have matched the totals saved with it.
+        With full=True, the totals are also compared with a recompute over every account.
+
+        Args:
+            full (bool, optional): Also recompute the totals from all accounts. Defaults to False.
+
+        Returns:
+            Tuple[bool, str]: Whether no drift was found, and a message describing it.
+        """
+        totals = self.totals
+        problems = []
+        if self.load_drift is not None:
+            problems.append(self.load_drift)
+        if totals.count != len(self.accounts):
+            problems.append(f"Account count drifted: tracked {totals.count}, stored {len(self.accounts)}.")
+        if totals.total < 0 or not 0 <= totals.zero <= totals.count:
+            problems.append(f"Totals are inconsistent: {totals.as_dict()}.")
+        if full:
+            with locked():
+                drift = totals.diff(Totals.build(self._balances()))
+            if drift is not None:
+                problems.append(f"Totals drifted from the accounts: {drift}.")
+        if problems:
+            return False, " ".join(problems)
+        return True, f"Totals are consistent: {totals.count} accounts holding {totals.total}, {totals.zero} of them empty."
+
+    def stats(self, reset: bool = False) -> Dict[str, dict]:
+        """Returns the counts and latencies recorded while `metrics.enabled` was set.
+
+        Recorded operations are 'load_state', 'save_state' and 'save_changes' (with the bytes
+        they wrote), 'persist' for every persisted commit, split further into 'journal_append'
+        (with bytes) and 'ledger_flush', and the Account methods 'deposit', 'withdraw' and
+        'transfer' when the bank is passed to them.
+
+        Args:
+            reset (bool, optional): Start over after reading them. Defaults to False.
+
+        Returns:
+            Dict[str, dict]: Per operation, see Stats.snapshot.
+        """
+        return self.metrics.snapshot(reset)
+
+    def find_by_name(self, name: str, prefix: bool = False, limit: Optional[int] = None) -> List[int]:
+        """Finds accounts by holder name, ignoring case.
+
+        The name index is built from all accounts on the first lookup, so loading does not pay
+        for it unless names are searched, and is kept up to date by create_account afterwards.
+
+        Args:
+            name (str): The name to look for, or the start of it if prefix is True.
+            prefix (bool, optional): If True, match every name starting with `name`. Defaults to False.
+            limit (Optional[int], optional): Stop after this many IDs of a prefix lookup. Defaults to None.
+
+        Returns:
+            List[int]: IDs of the matching accounts. Exact matches are in ID order; prefix
+                matches are grouped by name in alphabetical order.
+        """
+        index = self._name_index
+        if index is None:
+            with self._index_lock:
+                index = self._name_index
+                if index is None:
+                    accounts = self.accounts
+                    if hasattr(accounts, 'rows'):
+                        # Read names straight from the store, without creating account views
+                        rows = ((account_id, account_name) for account_id, account_name, _ in accounts.rows())
+                    else:
+                        rows = ((account.id, account.name) for account in list(accounts.values()))
+                    index = self._name_index = NameIndex.build(rows)
+        return index.prefix(name, limit) if prefix else index.exact(name)
+
+    def transfer_many(self, sender_id: int, payments: Sequence[Tuple[int, str]]) -> Tuple[bool, List[str]]:
+        """Pays many recipients from one account with Account.transfer_many, and commits once.
+
+        Args:
+            sender_id (int): The account paying.
+            payments (Sequence[Tuple[int, str]]): (recipient_id, amount) pairs.
+
+        Returns:
+            Tuple[bool, List[str]]: Whether every payment was made, and one message per payment.
+                Nothing is transferred unless every payment can be.
+        """
+        sender = self.get_account(sender_id)
+        if sender is None:
+            return False, [f"Account {sender_id} does not exist."] * len(payments)
+        success, messages = sender.transfer_many(payments, self)
+        if success:
+            recipients = {recipient_id: self.accounts[recipient_id] for recipient_id, _ in payments}
+            self.commit(sender, *recipients.values())
+        return success, messages
+
+    def apply_batch(self, ops: Sequence[Sequence], atomic: bool = False) -> List[Optional[str]]:
+        """Applies a batch of operations in order and commits once at the end.
+
+        Each operation is a tuple of ('deposit', account_id, amount), ('withdraw', account_id, amount)
+        or ('transfer', account_id, amount, recipient_id), with amounts given as strings like
+        in the Account methods.
+
+        Args:
+            ops (Sequence[Sequence]): The operations to apply.
+            atomic (bool, optional): If True, the first failing operation rolls back every balance
+                change made by the batch and nothing is persisted. The accounts of the batch are
+                locked until it commits or rolls back. Defaults to False.
+
+        Returns:
+            List[Optional[str]]: One entry per operation: None if it succeeded, else an error
+                message. If an atomic batch is rolled back, every entry is an error message, and
+                the ledger gets a 'rollback' entry for every restored balance.
+        """
+        if atomic:
+            # Hold every account of the batch until it commits or rolls back, so restoring the
+            # balances from before the batch cannot undo changes made by other threads meanwhile
+            ids = [op[i] for op in ops for i in (1, 3) if len(op) > i and isinstance(op[i], int)]
+            with locked(*ids) if ids else nullcontext():
+                return self._apply_batch(ops, atomic)
+        return self._apply_batch(ops, atomic)
+
+    def _apply_batch(self, ops: Sequence[Sequence], atomic: bool) -> List[Optional[str]]:
+        """Applies a batch for apply_batch, which holds the locks of an atomic one."""
+        results: List[Optional[str]] = []
+        touched: Dict[int, Account] = {}
+        original_balances: Dict[int, Decimal] = {}
+        for op in ops:
+            kind = op[0] if len(op) else None
+            account = recipient = None
+            if kind not in BATCH_OPS:
+                error = f"Unknown operation '{kind}'!"
+            elif len(op) != BATCH_OPS[kind]:
+                error = f"Malformed '{kind}' operation, expected {BATCH_OPS[kind]} fields!"
+            else:
+                account_id, amount = op[1], op[2]
+                account = self.accounts.get(account_id)
+                if account is None:
+                    error = f"Account {account_id} does not exist."
+                elif kind == 'transfer' and op[3] == account_id:
+                    error = "Cannot transfer to the same account!"
+                elif kind == 'transfer' and self.accounts.get(op[3]) is None:
+                    error = f"Recipient with ID {op[3]} does not exist."
+                else:
+                    if kind == 'transfer':
+                        recipient = self.accounts[op[3]]
+                    if atomic:
+                        # Remember balances before the batch first touches an account
+                        original_balances.setdefault(account.id, account.balance)
+                        if recipient is not None:
+                            original_balances.setdefault(recipient.id, recipient.balance)
+                    if kind == 'deposit':
+                        success, message = account.deposit(amount, self)
+                    elif kind == 'withdraw':
+                        success, message = account.withdraw(amount, self)
+                    else:
+                        success, message = account.transfer(amount, recipient.id, self)
+                    error = None if success else message
+            if error is None:
+                touched[account.id] = account
+                if recipient is not None:
+                    touched[recipient.id] = recipient
+            elif atomic:
+                for rollback_id, balance in original_balances.items():
+                    rollback = self.accounts[rollback_id]
+                    change = balance - rollback.balance
+                    rollback.balance = balance
+                    if change:
+                        self.record('rollback', rollback_id, change, balance)
+                return [error if i == len(results) else "Batch rolled back!" for i in range(len(ops))]
+            results.append(error)
+        if touched:
+            self.commit(*touched.values())
+        return results
@@ -0,0 +1,373 @@
+import argparse
+import csv
+import mmap
+import os
+import struct
+import sys
+import threading
+import weakref
+from array import array
+from collections.abc import MutableMapping
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, List, Tuple
+from account import Account
+from columnar_store import AccountView, _update_views
+from persistence import sync_directory, sync_file
+from utils import to_scaled, from_scaled
+
+# File layout, all little-endian:
+#   header:  magic (8 bytes), version (u32), scale (u32), record count (u64)
+#   records: one per account, sorted by ID: id (i64), scaled balance (i64),
+#            name offset (u32) and name length (u32) into the name heap
+#   heap:    UTF-8 names, back to back
+MAGIC = b'BANKSNAP'
+VERSION = 1
+HEADER = struct.Struct('<8sIIQ')
+RECORD = struct.Struct('<qqII')
+_ID = struct.Struct('<q')
+
+
+def write_binary(path: str, rows: Iterable[Tuple[int, str, Decimal]], scale: int = 2, fsync: bool = False) -> int:
+    """Writes accounts to a binary snapshot.
+
+    The file is written to a temporary path and renamed over `path`, so readers never see a
+    partial snapshot.
+
+    Args:
+        path (str): Path of the snapshot to write.
+        rows (Iterable[Tuple[int, str, Decimal]]): (id, name, balance) rows, in any order.
+        scale (int, optional): Decimal places kept for balances. Defaults to 2.
+        fsync (bool, optional): If True, force the snapshot to disk before and after the rename.
+            Defaults to False.
+
+    Returns:
+        int: Number of accounts written.
+
+    Raises:
+        ValueError: If a balance has more than `scale` decimal places.
+    """
+    records = bytearray()
+    heap = bytearray()
+    count = 0
+    for account_id, name, balance in sorted(rows, key=lambda row: row[0]):
+        encoded = name.encode('utf-8')
+        records += RECORD.pack(account_id, to_scaled(balance, scale), len(heap), len(encoded))
+        heap += encoded
+        count += 1
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, scale, count))
+        f.write(records)
+        f.write(heap)
+        if fsync:
+            sync_file(f)
+    os.replace(tmp_path, path)
+    if fsync:
+        sync_directory(path)
+    return count
+
+
+class BinaryAccounts(MutableMapping):
+    """A mapping of account IDs to accounts, served from a memory-mapped binary snapshot.
+
+    Opening the file only reads its header; get_account-style lookups binary-search the
+    fixed-width records in place, so startup does not parse the whole file. Lookups return
+    AccountView objects, and balance changes made through them are written straight into the
+    mapped record. Accounts added after opening are kept in memory as views until rewrite()
+    folds them into a new snapshot.
+
+    Attributes:
+        path (str): Path to the snapshot file.
+        scale (int): Decimal places kept for balances.
+    """
+    def __init__(self, path: str):
+        """Maps an existing snapshot.
+
+        Args:
+            path (str): Path to the snapshot file.
+
+        Raises:
+            ValueError: If the file is not a binary snapshot.
+        """
+        self.path = path
+        self._views = weakref.WeakValueDictionary()
+        self._added: Dict[int, Account] = {}
+        self._lock = threading.Lock()
+        self._map()
+
+    def _map(self) -> None:
+        """Maps the snapshot file and reads its header."""
+        with open(self.path, 'r+b') as f:
+            size = os.fstat(f.fileno()).st_size
+            self._mm = mmap.mmap(f.fileno(), 0) if size else None
+        if self._mm is None or size < HEADER.size:
+            raise ValueError(f"{self.path} is not a binary snapshot.")
+        magic, version, self.scale, self._count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path} is not a binary snapshot.")
+        self._heap = HEADER.size + self._count * RECORD.size
+
+    def _find(self, account_id) -> int:
+        """Returns the byte offset of an account's record, or -1 if it is not in the file."""
+        if not isinstance(account_id, int):
+            return -1
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            found_id = _ID.unpack_from(self._mm, HEADER.size + middle * RECORD.size)[0]
+            if found_id < account_id:
+                low = middle + 1
+            elif found_id > account_id:
+                high = middle
+            else:
+                return HEADER.size + middle * RECORD.size
+        return -1
+
+    def _read(self, offset: int) -> Tuple[int, str, Decimal]:
+        """Decodes the record at a byte offset."""
+        account_id, scaled, name_offset, name_length = RECORD.unpack_from(self._mm, offset)
+        start = self._heap + name_offset
+        name = self._mm[start:start + name_length].decode('utf-8')
+        return account_id, name, from_scaled(scaled, self.scale)
+
+    def _set_balance(self, account_id: int, balance: Decimal) -> None:
+        """Writes a balance into the mapped record, called by AccountView."""
+        scaled = to_scaled(balance, self.scale)
+        with self._lock:
+            # Added accounts live in their view until the next rewrite()
+            if account_id in self._added:
+                return
+            offset = self._find(account_id)
+            if offset >= 0:
+                struct.pack_into('<q', self._mm, offset + 8, scaled)
+
+    def swap_balances(self, changes: Iterable[Tuple[int, Decimal, Decimal]]) -> List[Tuple[int, Decimal]]:
+        """Sets the balances of many accounts, each only if it still holds an expected balance.
+
+        Like ColumnarAccounts.swap_balances: no views are created, and views that exist are
+        updated too. Callers hold the locks of the accounts.
+
+        Args:
+            changes (Iterable[Tuple[int, Decimal, Decimal]]): (account_id, expected balance, new
+                balance) triples.
+
+        Returns:
+            List[Tuple[int, Decimal]]: (account_id, current balance) of the stored accounts that
+                did not hold the expected balance, which are left unchanged.
+
+        Raises:
+            ValueError: If a balance has more than `scale` decimal places. Nothing is changed then.
+        """
+        scale = self.scale
+        changes = [(account_id, to_scaled(expected, scale), to_scaled(new, scale), new)
+                   for account_id, expected, new in changes]
+        stale = []
+        changed = []
+        with self._lock:
+            mm = self._mm
+            for account_id, expected, scaled, new in changes:
+                added = self._added.get(account_id)
+                if added is not None:
+                    if to_scaled(added.balance, scale) != expected:
+                        stale.append((account_id, added.balance))
+                    else:
+                        changed.append((account_id, new))
+                    continue
+                offset = self._find(account_id)
+                if offset < 0:
+                    continue
+                current = struct.unpack_from('<q', mm, offset + 8)[0]
+                if current != expected:
+                    stale.append((account_id, from_scaled(current, scale)))
+                    continue
+                struct.pack_into('<q', mm, offset + 8, scaled)
+                changed.append((account_id, new))
+        # Added accounts are views kept in _added, whose balance lives in the view
+        _update_views(self._added, changed)
+        _update_views(self._views, changed)
+        return stale
+
+    def __getitem__(self, account_id) -> Account:
+        if account_id in self._added:
+            return self._added[account_id]
+        view = self._views.get(account_id)
+        if view is not None:
+            return view
+        with self._lock:
+            view = self._views.get(account_id)
+            if view is not None:
+                return view
+            offset = self._find(account_id)
+            if offset < 0:
+                raise KeyError(account_id)
+            account_id, name, balance = self._read(offset)
+            view = AccountView.model_construct(id=account_id, name=name, balance=balance)
+            view._store = self
+            self._views[account_id] = view
+        return view
+
+    def __setitem__(self, account_id: int, account: Account) -> None:
+        if self._find(account_id) >= 0:
+            # Only the balance of a stored record can change in place
+            if account.name != self[account_id].name:
+                raise ValueError("Cannot rename an account stored in a binary snapshot!")
+            self[account_id].balance = account.balance
+        else:
+            to_scaled(account.balance, self.scale) # fail now rather than in rewrite()
+            view = AccountView.model_construct(id=account_id, name=account.name, balance=account.balance)
+            view._store = self
+            self._added[account_id] = view
+
+    def __delitem__(self, account_id: int) -> None:
+        if account_id in self._added:
+            del self._added[account_id]
+        elif self._find(account_id) >= 0:
+            raise ValueError("Cannot delete an account stored in a binary snapshot!")
+        else:
+            raise KeyError(account_id)
+
+    def __contains__(self, account_id) -> bool:
+        return account_id in self._added or self._find(account_id) >= 0
+
+    def __iter__(self) -> Iterator[int]:
+        for index in range(self._count):
+            yield _ID.unpack_from(self._mm, HEADER.size + index * RECORD.size)[0]
+        yield from list(self._added)
+
+    def __len__(self) -> int:
+        return self._count + len(self._added)
+
+    def last_id(self) -> int:
+        """Returns the highest account ID, or 0 if there are no accounts."""
+        last_id = _ID.unpack_from(self._mm, HEADER.size + (self._count - 1) * RECORD.size)[0] if self._count else 0
+        return max(last_id, max(self._added, default=0))
+
+    @property
+    def pending(self) -> int:
+        """Number of accounts added since the snapshot was written."""
+        return len(self._added)
+
+    def rows(self) -> Iterator[Tuple[int, str, Decimal]]:
+        """Iterates over (id, name, balance) rows without creating account views.
+
+        Returns:
+            Iterator[Tuple[int, str, Decimal]]: The rows of the file, in ID order, then added accounts.
+        """
+        for index in range(self._count):
+            yield self._read(HEADER.size + index * RECORD.size)
+        for account in list(self._added.values()):
+            yield account.id, account.name, account.balance
+
+    def columns(self) -> Tuple[array, array]:
+        """Copies the IDs and scaled balances of all accounts, without decoding records one by one.
+
+        Returns:
+            Tuple[array, array]: `array('q')` of the IDs and of the balances scaled by 10**scale,
+                in ID order for the file, then added accounts.
+        """
+        ids, balances = array('q'), array('q')
+        with self._lock:
+            # Every record is three 8-byte words: id, scaled balance, then name offset and length
+            words = memoryview(self._mm)[HEADER.size:self._heap].cast('q')
+            try:
+                ids.frombytes(words[0::3].tobytes())
+                balances.frombytes(words[1::3].tobytes())
+            finally:
+                words.release()
+            if sys.byteorder != 'little':
+                ids.byteswap()
+                balances.byteswap()
+            for account in list(self._added.values()):
+                ids.append(account.id)
+                balances.append(to_scaled(account.balance, self.scale))
+        return ids, balances
+
+    def flush(self) -> None:
+        """Flushes in-place balance changes to disk."""
+        self._mm.flush()
+
+    def rewrite(self, fsync: bool = False) -> None:
+        """Writes a new snapshot including added accounts, and maps it in place of the old one.
+
+        Views handed out earlier stay valid and keep writing to the new file. The new snapshot is
+        written beside the mapped one and only then renamed over it, so if writing fails the old
+        snapshot stays mapped and the added accounts stay pending.
+
+        Args:
+            fsync (bool, optional): If True, force the new snapshot to disk. Defaults to False.
+        """
+        with self._lock:
+            # Written beside the mapped file, so a failed write leaves the store as it was
+            new_path = f"{self.path}.new"
+            try:
+                write_binary(new_path, self.rows(), self.scale, fsync)
+            except BaseException:
+                if os.path.exists(new_path):
+                    os.remove(new_path)
+                raise
+            self._mm.close()
+            try:
+                os.replace(new_path, self.path)
+            finally:
+                # The new file if the replace succeeded, else the old one again
+                self._map()
+            if fsync:
+                sync_directory(self.path)
+            # Views of added accounts now write to their new records
+            self._views.update(self._added)
+            self._added.clear()
+
+    def close(self) -> None:
+        """Unmaps the snapshot file."""
+        self._mm.close()
+
+
+def csv_to_binary(csv_path: str, binary_path: str, scale: int = 2) -> int:
+    """Converts a CSV snapshot to a binary snapshot.
+
+    Args:
+        csv_path (str): The CSV file to read, with 'id', 'name' and 'balance' columns.
+        binary_path (str): The binary snapshot to write.
+        scale (int, optional): Decimal places kept for balances. Defaults to 2.
+
+    Returns:
+        int: Number of accounts converted.
+    """
+    with open(csv_path, 'r', newline='', encoding='utf-8') as f:
+        rows = ((int(row['id']), row['name'], Decimal(row['balance'])) for row in csv.DictReader(f))
+        return write_binary(binary_path, rows, scale)
+
+
+def binary_to_csv(binary_path: str, csv_path: str) -> int:
+    """Converts a binary snapshot to a CSV snapshot.
+
+    Args:
+        binary_path (str): The binary snapshot to read.
+        csv_path (str): The CSV file to write.
+
+    Returns:
+        int: Number of accounts converted.
+    """
+    accounts = BinaryAccounts(binary_path)
+    try:
+        with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['id', 'name', 'balance'])
+            writer.writerows(accounts.rows())
+        return len(accounts)
+    finally:
+        accounts.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert account snapshots between CSV and binary formats.")
+    parser.add_argument('direction', choices=['to-binary', 'to-csv'])
+    parser.add_argument('source')
+    parser.add_argument('destination')
+    parser.add_argument('--scale', type=int, default=2, help="decimal places kept by a binary snapshot")
+    args = parser.parse_args()
+    if args.direction == 'to-binary':
+        count = csv_to_binary(args.source, args.destination, args.scale)
+    else:
+        count = binary_to_csv(args.source, args.destination)
+    print(f"Converted {count} accounts from {args.source} to {args.destination}.")
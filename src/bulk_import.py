@@ -0,0 +1,174 @@
+import argparse
+import csv
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+from typing import Callable, Iterator, List, Optional, Tuple
+import utils
+from account import Account
+from banking_system import BankingSystem, parse_initial_balance
+
+# A chunk of input rows: (line number of its first row, [(name, balance), ...])
+Chunk = Tuple[int, List[Tuple[str, str]]]
+
+
+def _read_chunks(path: str, chunk_size: int, rejects: List[Tuple[int, str, str, str]]) -> Iterator[Chunk]:
+    """Streams the rows of an import file in chunks.
+
+    The file needs a header with 'name' and 'balance' columns; other columns, such as the IDs of
+    an export, are ignored. Rows without those columns are added to rejects right away.
+    """
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        if 'name' not in header or 'balance' not in header:
+            raise ValueError(f"{path} needs 'name' and 'balance' columns.")
+        name_column, balance_column = header.index('name'), header.index('balance')
+        width = max(name_column, balance_column) + 1
+        chunk: List[Tuple[str, str]] = []
+        first_line = 2
+        for line, row in enumerate(reader, start=2):
+            if len(row) < width:
+                # Flush first, so chunks stay runs of consecutive lines
+                if chunk:
+                    yield first_line, chunk
+                    chunk = []
+                rejects.append((line, ','.join(row), '', f"Expected at least {width} columns!"))
+                first_line = line + 1
+                continue
+            chunk.append((row[name_column], row[balance_column]))
+            if len(chunk) >= chunk_size:
+                yield first_line, chunk
+                chunk = []
+                first_line = line + 1
+        if chunk:
+            yield first_line, chunk
+
+
+def _validate_chunk(chunk: Chunk, scale: Optional[int], max_precision: int, max_scale: int
+                    ) -> Tuple[List[Tuple[str, Decimal]], List[Tuple[int, str, str, str]]]:
+    """Validates one chunk, in a worker process. Limits are passed in, since set_limits only
+    changes the importing process."""
+    first_line, rows = chunk
+    accepted = []
+    rejected = []
+    for line, (name, balance) in enumerate(rows, start=first_line):
+        value, message = parse_initial_balance(balance, scale, max_precision, max_scale)
+        if value is None:
+            rejected.append((line, name, balance, message))
+        else:
+            accepted.append((name, value))
+    return accepted, rejected
+
+
+def import_csv(bank: BankingSystem, path: str, workers: Optional[int] = None, chunk_size: int = 10000,
+               rejects_path: Optional[str] = None, progress: Optional[Callable[[int, float], None]] = None) -> dict:
+    """Imports accounts from a CSV file with 'name' and 'balance' columns.
+
+    The file is streamed in chunks, which are validated by a pool of worker processes, with
+    a bounded number of chunks in flight. Accepted rows get consecutive IDs from a single
+    reserved block, in file order, and the bank is saved once at the end.
+
+    Args:
+        bank (BankingSystem): The bank to import into.
+        path (str): The file to import.
+        workers (Optional[int], optional): Worker processes validating chunks, 0 to validate in
+            this process. Defaults to None: one per CPU, or none on a single CPU.
+        chunk_size (int, optional): Rows per chunk. Defaults to 10000.
+        rejects_path (Optional[str], optional): Where rejected rows are written with their line
+            number and reason. Defaults to '<path>.rejects.csv'.
+        progress (Optional[Callable[[int, float], None]], optional): Called after every chunk with
+            the rows validated so far and the elapsed seconds. Defaults to None.
+
+    Returns:
+        dict: 'rows', 'imported', 'rejected', 'first_id' (None if nothing was imported),
+            'seconds' and 'rows_per_sec'.
+
+    Raises:
+        ValueError: If the file has no 'name' and 'balance' columns.
+    """
+    start = time.perf_counter()
+    scale = bank.scale if bank.columnar or bank.binary else None
+    limits = (scale, utils.MAX_PRECISION, utils.MAX_SCALE)
+    accepted: List[Tuple[str, Decimal]] = []
+    rejects: List[Tuple[int, str, str, str]] = []
+    validated = 0
+
+    def collect(result) -> None:
+        nonlocal validated
+        chunk_accepted, chunk_rejected = result
+        accepted.extend(chunk_accepted)
+        rejects.extend(chunk_rejected)
+        validated += len(chunk_accepted) + len(chunk_rejected)
+        if progress is not None:
+            progress(validated, time.perf_counter() - start)
+
+    chunks = _read_chunks(path, chunk_size, rejects)
+    if workers is None:
+        # Shipping chunks to a single worker only adds pickling to the same amount of work
+        workers = os.cpu_count() or 1
+        workers = workers if workers > 1 else 0
+    if workers:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Results are collected in submission order, so IDs follow the file order
+            in_flight = deque()
+            for chunk in chunks:
+                in_flight.append(pool.submit(_validate_chunk, chunk, *limits))
+                if len(in_flight) >= 2 * workers:
+                    collect(in_flight.popleft().result())
+            while in_flight:
+                collect(in_flight.popleft().result())
+    else:
+        for chunk in chunks:
+            collect(_validate_chunk(chunk, *limits))
+
+    first_id = bank.reserve_ids(len(accepted)) if accepted else None
+    if accepted:
+        # Rows are validated already, so accounts are built without validating them again
+        construct = Account.from_trusted
+        accounts = bank.accounts
+        created = []
+        for account_id, (name, balance) in enumerate(accepted, start=first_id):
+            account = construct(id=account_id, name=name, balance=balance)
+            accounts[account_id] = account
+            created.append(account)
+        bank._opened(created)
+        bank.save_state()
+
+    rejects.sort()
+    with open(rejects_path or f"{path}.rejects.csv", 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['line', 'name', 'balance', 'reason'])
+        writer.writerows(rejects)
+
+    elapsed = time.perf_counter() - start
+    rows = len(accepted) + len(rejects)
+    return {
+        'rows': rows,
+        'imported': len(accepted),
+        'rejected': len(rejects),
+        'first_id': first_id,
+        'seconds': elapsed,
+        'rows_per_sec': rows / elapsed if elapsed else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import accounts from a CSV file with 'name' and 'balance' columns.")
+    parser.add_argument('path')
+    parser.add_argument('--csv-path', default='data/accounts.csv', help="the bank to import into")
+    parser.add_argument('--workers', type=int, help="validation processes, 0 for none (default: one per CPU, none on a single CPU)")
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--rejects', help="file for rejected rows (default: <path>.rejects.csv)")
+    parser.add_argument('--journal', action='store_true')
+    parser.add_argument('--columnar', action='store_true')
+    args = parser.parse_args()
+    bank = BankingSystem(csv_path=args.csv_path, journal=args.journal, columnar=args.columnar)
+    report = import_csv(
+        bank, args.path, args.workers, args.chunk_size, args.rejects,
+        progress=lambda rows, seconds: print(f"{rows:,} rows validated, {rows / seconds:,.0f} rows/s", flush=True)
+    )
+    print(f"Imported {report['imported']:,} accounts and rejected {report['rejected']:,} rows "
+          f"in {report['seconds']:.2f} s ({report['rows_per_sec']:,.0f} rows/s).")
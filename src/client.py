@@ -0,0 +1,112 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import List
+
+
+class BankClient:
+    """A client session for BankServer's JSON-lines protocol."""
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+
+    @classmethod
+    async def connect(cls, host: str = '127.0.0.1', port: int = 8765) -> 'BankClient':
+        """Opens a new session.
+
+        Args:
+            host (str, optional): Server address. Defaults to '127.0.0.1'.
+            port (int, optional): Server port. Defaults to 8765.
+
+        Returns:
+            BankClient: The connected client.
+        """
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def request(self, op: str, **fields) -> dict:
+        """Sends one request and waits for its response.
+
+        Args:
+            op (str): The operation, e.g. 'deposit'.
+            **fields: The other request fields, e.g. amount='50'.
+
+        Returns:
+            dict: The decoded response.
+        """
+        self._writer.write(json.dumps({'op': op, **fields}).encode() + b'\n')
+        await self._writer.drain()
+        return json.loads(await self._reader.readline())
+
+    async def close(self) -> None:
+        """Closes the session."""
+        self._writer.close()
+        await self._writer.wait_closed()
+
+
+async def _run_session(host: str, port: int, ops: int, peers: List[int], latencies: List[float], seed: int) -> None:
+    """Runs one load-test session: create an account, login, then random operations."""
+    rng = random.Random(seed)
+    client = await BankClient.connect(host, port)
+    try:
+        created = await client.request('create', name=f"Load {seed}", balance="1000")
+        peers.append(created['id'])
+        await client.request('login', id=created['id'])
+        for _ in range(ops):
+            roll = rng.random()
+            if roll < 0.4:
+                request = {'op': 'deposit', 'amount': str(rng.randint(1, 100))}
+            elif roll < 0.7:
+                request = {'op': 'withdraw', 'amount': str(rng.randint(1, 100))}
+            elif roll < 0.9:
+                request = {'op': 'transfer', 'to': rng.choice(peers), 'amount': str(rng.randint(1, 100))}
+            else:
+                request = {'op': 'balance'}
+            start = time.perf_counter()
+            await client.request(**request)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        await client.close()
+
+
+async def run_load(host: str = '127.0.0.1', port: int = 8765, sessions: int = 50, ops: int = 200) -> dict:
+    """Runs concurrent sessions against a server and reports throughput and latency.
+
+    Args:
+        host (str, optional): Server address. Defaults to '127.0.0.1'.
+        port (int, optional): Server port. Defaults to 8765.
+        sessions (int, optional): Number of concurrent sessions. Defaults to 50.
+        ops (int, optional): Operations per session, after creating and logging in. Defaults to 200.
+
+    Returns:
+        dict: 'ops', 'seconds', 'ops_per_sec' and latency percentiles 'p50_ms', 'p99_ms', 'max_ms'.
+    """
+    latencies: List[float] = []
+    peers: List[int] = []
+    start = time.perf_counter()
+    await asyncio.gather(*(_run_session(host, port, ops, peers, latencies, seed) for seed in range(sessions)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    if not latencies:
+        return {'ops': 0, 'seconds': elapsed, 'ops_per_sec': 0.0, 'p50_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0}
+    return {
+        'ops': len(latencies),
+        'seconds': elapsed,
+        'ops_per_sec': len(latencies) / elapsed,
+        'p50_ms': latencies[len(latencies) // 2] * 1000,
+        'p99_ms': latencies[int(len(latencies) * 0.99)] * 1000,
+        'max_ms': latencies[-1] * 1000,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test a Simple Banking System server.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--sessions', type=int, default=50)
+    parser.add_argument('--ops', type=int, default=200, help="operations per session")
+    args = parser.parse_args()
+    report = asyncio.run(run_load(args.host, args.port, args.sessions, args.ops))
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,228 @@
+import sys
+import threading
+import weakref
+from array import array
+from bisect import bisect_left
+from collections.abc import MutableMapping
+from decimal import Decimal
+from typing import Iterable, Iterator, List, Mapping, Optional, Tuple
+from pydantic import PrivateAttr
+from account import Account
+from utils import to_scaled, from_scaled
+
+
+class AccountView(Account):
+    """An Account backed by a row of a ColumnarAccounts store or a BinaryAccounts file.
+
+    Balance changes made through the view, e.g. by Account.deposit, are written back to the
+    store. The view only exists while someone holds a reference to it. Setting a balance with
+    more decimal places than the store keeps, or beyond its 64-bit range, raises ValueError and
+    leaves the balance unchanged; Account methods reject such changes before making any.
+    """
+    _store: Optional[MutableMapping] = PrivateAttr(default=None)
+
+    def _balance_scale(self) -> Optional[int]:
+        return getattr(self._store, 'scale', None)
+
+    def __setattr__(self, name, value):
+        # Write back before updating the view, so an unrepresentable balance leaves both unchanged
+        if name == 'balance' and self._store is not None:
+            self._store._set_balance(self.id, value)
+        super().__setattr__(name, value)
+
+
+def _update_views(views: Mapping[int, AccountView], balances: Iterable[Tuple[int, Decimal]]) -> None:
+    """Sets the balance of the views that exist of accounts whose stored balance was just written."""
+    for account_id, balance in balances:
+        view = views.get(account_id)
+        if view is not None:
+            # The store already holds the balance, so skip the write-back of AccountView
+            super(AccountView, view).__setattr__('balance', balance)
+
+
+class ColumnarAccounts(MutableMapping):
+    """A compact, array-backed mapping of account IDs to accounts.
+
+    IDs and balances are kept in two parallel `array('q')` columns sorted by ID, and names in a
+    list of interned strings, so an account costs a few dozen bytes instead of a full Pydantic
+    object. Balances are stored as integers scaled by 10**scale, so only balances with at most
+    `scale` decimal places can be stored.
+
+    Lookups are binary searches over the ID column. Since account IDs are allocated in
+    increasing order, inserting a new account is an append. Changes to the columns are made under
+    a lock, so the store can be shared between threads.
+
+    Attributes:
+        scale (int): Number of decimal places kept for balances.
+    """
+    def __init__(self, scale: int = 2):
+        """Initializes an empty store.
+
+        Args:
+            scale (int, optional): Number of decimal places kept for balances. Defaults to 2.
+        """
+        self.scale = scale
+        self._ids = array('q')
+        self._balances = array('q')
+        self._names = []
+        self._views = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def _find(self, account_id) -> int:
+        """Returns the row of an account ID, or -1 if it is not stored."""
+        if not isinstance(account_id, int):
+            return -1
+        row = bisect_left(self._ids, account_id)
+        if row < len(self._ids) and self._ids[row] == account_id:
+            return row
+        return -1
+
+    def _to_scaled(self, balance: Decimal) -> int:
+        """Converts a balance to a scaled integer.
+
+        Raises:
+            ValueError: If the balance has more than `scale` decimal places.
+        """
+        return to_scaled(balance, self.scale)
+
+    def _from_scaled(self, scaled: int) -> Decimal:
+        """Converts a scaled integer back to a balance."""
+        return from_scaled(scaled, self.scale)
+
+    def _set_balance(self, account_id: int, balance: Decimal) -> None:
+        """Writes a balance back to the store, called by AccountView."""
+        scaled = self._to_scaled(balance)
+        with self._lock:
+            row = self._find(account_id)
+            if row >= 0:
+                self._balances[row] = scaled
+
+    def swap_balances(self, changes: Iterable[Tuple[int, Decimal, Decimal]]) -> List[Tuple[int, Decimal]]:
+        """Sets the balances of many accounts, each only if it still holds an expected balance.
+
+        Cheaper than a lookup and assignment per account, since no views are created; views that
+        exist are updated too. Callers hold the locks of the accounts.
+
+        Args:
+            changes (Iterable[Tuple[int, Decimal, Decimal]]): (account_id, expected balance, new
+                balance) triples.
+
+        Returns:
+            List[Tuple[int, Decimal]]: (account_id, current balance) of the stored accounts that
+                did not hold the expected balance, which are left unchanged.
+
+        Raises:
+            ValueError: If a balance has more than `scale` decimal places. Nothing is changed then.
+        """
+        scale = self.scale
+        changes = [(account_id, to_scaled(expected, scale), to_scaled(new, scale), new)
+                   for account_id, expected, new in changes]
+        stale = []
+        changed = []
+        with self._lock:
+            balances = self._balances
+            for account_id, expected, scaled, new in changes:
+                row = self._find(account_id)
+                if row < 0:
+                    continue
+                if balances[row] != expected:
+                    stale.append((account_id, self._from_scaled(balances[row])))
+                    continue
+                balances[row] = scaled
+                changed.append((account_id, new))
+        _update_views(self._views, changed)
+        return stale
+
+    def __getitem__(self, account_id) -> Account:
+        view = self._views.get(account_id)
+        if view is not None:
+            return view
+        with self._lock:
+            view = self._views.get(account_id)
+            if view is not None:
+                return view
+            row = self._find(account_id)
+            if row < 0:
+                raise KeyError(account_id)
+            view = AccountView.model_construct(
+                id=account_id,
+                name=self._names[row],
+                balance=self._from_scaled(self._balances[row])
+            )
+            view._store = self
+            self._views[account_id] = view
+        return view
+
+    def __setitem__(self, account_id: int, account: Account) -> None:
+        scaled = self._to_scaled(account.balance)
+        name = sys.intern(account.name)
+        with self._lock:
+            row = self._find(account_id)
+            if row >= 0:
+                self._balances[row] = scaled
+                self._names[row] = name
+            else:
+                row = bisect_left(self._ids, account_id)
+                self._ids.insert(row, account_id)
+                self._balances.insert(row, scaled)
+                self._names.insert(row, name)
+            # Drop a stale view so the next lookup reflects the stored account
+            self._views.pop(account_id, None)
+
+    def __delitem__(self, account_id: int) -> None:
+        with self._lock:
+            row = self._find(account_id)
+            if row < 0:
+                raise KeyError(account_id)
+            del self._ids[row]
+            del self._balances[row]
+            del self._names[row]
+            self._views.pop(account_id, None)
+
+    def __contains__(self, account_id) -> bool:
+        return self._find(account_id) >= 0
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._ids)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def last_id(self) -> int:
+        """Returns the highest stored account ID, or 0 if the store is empty."""
+        return self._ids[-1] if self._ids else 0
+
+    def rows(self) -> Iterator[Tuple[int, str, Decimal]]:
+        """Iterates over (id, name, balance) rows without creating account views.
+
+        Returns:
+            Iterator[Tuple[int, str, Decimal]]: The stored rows, in ID order.
+        """
+        from_scaled = self._from_scaled
+        with self._lock:
+            ids, names, balances = self._ids[:], self._names[:], self._balances[:]
+        for account_id, name, scaled in zip(ids, names, balances):
+            yield account_id, name, from_scaled(scaled)
+
+    def columns(self) -> Tuple[array, array]:
+        """Copies the ID and scaled balance columns, in ID order.
+
+        Returns:
+            Tuple[array, array]: `array('q')` copies of the IDs and of the balances scaled by 10**scale.
+        """
+        with self._lock:
+            return self._ids[:], self._balances[:]
+
+    def nbytes(self) -> int:
+        """Returns the approximate memory used by the columns, counting each distinct name once.
+
+        Returns:
+            int: Size in bytes.
+        """
+        distinct_names = {id(name): name for name in self._names}
+        return (
+            sys.getsizeof(self._ids)
+            + sys.getsizeof(self._balances)
+            + sys.getsizeof(self._names)
+            + sum(sys.getsizeof(name) for name in distinct_names.values())
+        )
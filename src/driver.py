@@ -0,0 +1,209 @@
+import argparse
+import json
+import shlex
+import sys
+import time
+from collections import deque
+from typing import Callable, Deque, Iterable, Iterator, List, Optional, TextIO, Tuple
+from banking_system import BankingSystem
+from main import main
+
+# Fields of each action, in the order a script line gives them. JSON actions use the same
+# names as server.py's protocol, e.g. {"op": "transfer", "to": 2, "amount": "50"}.
+FIELDS = {
+    'create': ('name', 'balance'),
+    'login': ('id',),
+    'deposit': ('amount',),
+    'withdraw': ('amount',),
+    'transfer': ('to', 'amount'),
+}
+
+# Parts of main.py's prompts, to tell where the program is
+WELCOME = "Do you have an account?"
+MENU = "'q' to quit"
+
+
+def parse_line(line: str) -> Optional[dict]:
+    """Parses one line of a script.
+
+    A line is either a JSON object with an 'op' field, or a command followed by its fields,
+    e.g. `create "Alice Smith" 100` or `transfer 2 50`. Blank lines and lines starting with '#'
+    are ignored.
+
+    Args:
+        line (str): The line.
+
+    Returns:
+        Optional[dict]: The action, or None for a blank line or comment.
+
+    Raises:
+        ValueError: If the line is not a valid action.
+    """
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+    if line.startswith('{'):
+        action = json.loads(line)
+        if not isinstance(action, dict) or action.get('op') not in FIELDS:
+            raise ValueError(f"Unknown action: {line}")
+        return action
+    words = shlex.split(line)
+    op = words[0].lower()
+    fields = FIELDS.get(op)
+    if fields is None or len(words) - 1 != len(fields):
+        raise ValueError(f"Unknown command or wrong number of fields: {line}")
+    return {'op': op, **dict(zip(fields, words[1:]))}
+
+
+def read_script(f: TextIO) -> Iterator[dict]:
+    """Streams the actions of a script file, one per line."""
+    for number, line in enumerate(f, start=1):
+        try:
+            action = parse_line(line)
+        except ValueError as err:
+            raise ValueError(f"Line {number}: {err}") from None
+        if action is not None:
+            yield action
+
+
+def _answers(action: dict) -> List[Tuple[str, str]]:
+    """Returns the (part of the prompt, answer) pairs main.py asks for to run an action."""
+    op = action['op']
+    if op == 'create':
+        return [(WELCOME, 'no'), ("your name", str(action.get('name', ''))),
+                ("initial balance", str(action.get('balance', '')))]
+    if op == 'login':
+        return [(WELCOME, 'yes'), ("account ID to login", str(action.get('id', '')))]
+    if op == 'transfer':
+        return [(MENU, 't'), ("recipient's account ID", str(action.get('to', ''))),
+                ("amount to transfer", str(action.get('amount', '')))]
+    return [(MENU, op[0]), (f"amount to {op}", str(action.get('amount', '')))]
+
+
+class ScriptedInput:
+    """Answers main.py's prompts from a stream of actions, in place of input().
+
+    Each answer is picked by the prompt it answers, so the script stays in step with the
+    program: when main.py goes back to a menu before an action is done, e.g. after an unknown
+    recipient, the rest of that action is dropped. An action that cannot run where the program
+    is, such as a deposit after a failed login, is skipped. A create or login while logged in
+    answers 'q', which returns from main.main; run it again to go on with the script. Once the
+    actions run out, a logged-in session quits and a logged-out one raises EOFError, as input()
+    does at the end of its input.
+
+    Attributes:
+        actions (int): Actions started.
+        skipped (int): Actions skipped.
+        finished (bool): Whether the last action is done and main.py was told to quit.
+    """
+    def __init__(self, actions: Iterable[dict], echo: Optional[Callable[[str], None]] = None):
+        """Initializes a ScriptedInput.
+
+        Args:
+            actions (Iterable[dict]): The actions, e.g. from read_script or workload.generate.
+            echo (Optional[Callable[[str], None]], optional): Shown every prompt with its answer,
+                for a transcript. Defaults to None.
+        """
+        self._actions = iter(actions)
+        self._next: Optional[dict] = None
+        self._pending: Deque[Tuple[str, str]] = deque()
+        self._echo = echo
+        self.actions = 0
+        self.skipped = 0
+        self.finished = False
+
+    def _peek(self) -> Optional[dict]:
+        if self._next is None:
+            self._next = next(self._actions, None)
+        return self._next
+
+    def _answer(self, prompt: str, answer: str) -> str:
+        if self._echo is not None:
+            self._echo(f"{prompt}{answer}")
+        return answer
+
+    def __call__(self, prompt: str = '') -> str:
+        while True:
+            if self._pending:
+                part, answer = self._pending.popleft()
+                if part in prompt:
+                    return self._answer(prompt, answer)
+                # main.py left the action early
+                self._pending.clear()
+            action = self._peek()
+            if action is None:
+                if MENU in prompt:
+                    self.finished = True
+                    return self._answer(prompt, 'q')
+                raise EOFError("End of script")
+            answers = _answers(action)
+            self._next = None
+            if answers[0][0] in prompt:
+                self.actions += 1
+                self._pending.extend(answers)
+            elif MENU in prompt and action['op'] in ('create', 'login'):
+                # Log out, keeping the action for the next run of main.main
+                self._next = action
+                return self._answer(prompt, 'q')
+            else:
+                self.skipped += 1
+
+
+def run_script(bank: BankingSystem, actions: Iterable[dict], transcript: Optional[TextIO] = None) -> dict:
+    """Runs actions through main.py's interactive loop, without a terminal.
+
+    Args:
+        bank (BankingSystem): The bank to run them against.
+        actions (Iterable[dict]): The actions, e.g. from read_script or workload.generate.
+        transcript (Optional[TextIO], optional): Where prompts, answers and messages are written.
+            Defaults to None: they are discarded.
+
+    Returns:
+        dict: 'actions' (started), 'skipped', 'seconds' and 'actions_per_sec'.
+    """
+    if transcript is not None:
+        def write(message: str) -> None:
+            transcript.write(f"{message}\n")
+    else:
+        def write(message: str) -> None:
+            pass
+    read = ScriptedInput(actions, echo=write if transcript is not None else None)
+    start = time.perf_counter()
+    while not read.finished:
+        try:
+            main(bank, read, write)
+        except EOFError:
+            break
+    # Quitting flushes already; ending logged out does not
+    bank.flush()
+    elapsed = time.perf_counter() - start
+    return {
+        'actions': read.actions,
+        'skipped': read.skipped,
+        'seconds': elapsed,
+        'actions_per_sec': read.actions / elapsed if elapsed else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a script of actions through the interactive program, without a terminal.")
+    parser.add_argument('script', help="JSON lines or commands like 'transfer 2 50', one per line; '-' for stdin")
+    parser.add_argument('--csv-path', default='data/accounts.csv')
+    parser.add_argument('--transcript', help="file for the prompts, answers and messages")
+    parser.add_argument('--journal', action='store_true')
+    parser.add_argument('--incremental', action='store_true')
+    parser.add_argument('--columnar', action='store_true')
+    parser.add_argument('--durability', default='always', choices=('always', 'group', 'manual'))
+    args = parser.parse_args()
+    bank = BankingSystem(csv_path=args.csv_path, journal=args.journal, incremental=args.incremental,
+                         columnar=args.columnar, durability=args.durability)
+    script = sys.stdin if args.script == '-' else open(args.script, 'r', encoding='utf-8')
+    transcript = open(args.transcript, 'w', encoding='utf-8') if args.transcript else None
+    try:
+        report = run_script(bank, read_script(script), transcript)
+    finally:
+        bank.close()
+        if transcript is not None:
+            transcript.close()
+    print(f"Ran {report['actions']:,} actions and skipped {report['skipped']:,} in {report['seconds']:.2f} s "
+          f"({report['actions_per_sec']:,.0f} actions/s).")
@@ -0,0 +1,338 @@
+import csv
+import io
+import os
+import struct
+import sys
+import threading
+import zlib
+from array import array
+from bisect import bisect_left
+from collections.abc import MutableMapping
+from decimal import Decimal
+from typing import BinaryIO, Dict, Iterator, Optional, Set, Tuple
+from account import Account
+
+# Index layout, all little-endian:
+#   header: magic (8 bytes), CSV size (u64), CSV mtime in ns (i64), record count (u64)
+#   then the IDs (i64 each) in ascending order, then the byte offset of each ID's row (i64 each)
+MAGIC = b'BANKIDX1'
+HEADER = struct.Struct('<8sQqQ')
+# Bytes read at a time by write_snapshot
+COPY_CHUNK = 1 << 20
+
+
+def _csv_lines(f, offsets: array) -> Iterator[str]:
+    """Yields the lines of a binary file as text, appending the offset of each line to offsets."""
+    position = f.tell()
+    for line in f:
+        offsets.append(position)
+        position += len(line)
+        yield line.decode('utf-8')
+
+
+class LazyAccounts(MutableMapping):
+    """A mapping of account IDs to accounts, parsed from a CSV snapshot one at a time on first access.
+
+    Opening the store only reads an offset index, '<csv_path>.idx', holding the byte offset of
+    every account's row. The index is rebuilt, with one pass over the file that does not create
+    any account, whenever the CSV file's size or modification time no longer match it. Looking
+    up an ID binary-searches the index and parses that single row; the account is then kept, so
+    its balance changes live in memory like in a dictionary store.
+
+    values() loads every account not loaded yet in one sequential pass, so full scans (totals,
+    name lookups) cost about what an eager load would, once. save_state does not need one:
+    write_snapshot copies the bytes of the rows never loaded. The CSV file stays open, so rows
+    not yet loaded are still read from the file the index was built for if save_state replaces it.
+
+    Attributes:
+        path (str): Path to the CSV snapshot.
+        index_path (str): Path to the offset index.
+    """
+    def __init__(self, path: str):
+        """Opens a CSV snapshot and its offset index, building the index if needed.
+
+        Args:
+            path (str): Path to the CSV snapshot.
+
+        Raises:
+            FileNotFoundError: If the CSV file does not exist.
+        """
+        self.path = path
+        self.index_path = f"{path}.idx"
+        self._file = open(path, 'rb')
+        self._lock = threading.Lock()
+        self._loaded: Dict[int, Account] = {}
+        self._deleted: Set[int] = set()
+        self._complete = False
+        self._ids, self._offsets = self._read_index()
+        self._count = len(self._ids)
+        self._last_id = self._ids[-1] if self._ids else 0
+        self._size = os.fstat(self._file.fileno()).st_size
+        # Whether the rows are stored in ID order, checked on the first write_snapshot
+        self._ordered: Optional[bool] = None
+
+    def _read_index(self) -> Tuple[array, array]:
+        """Reads the offset index, or rebuilds it if it does not match the CSV file."""
+        stat = os.fstat(self._file.fileno())
+        try:
+            with open(self.index_path, 'rb') as f:
+                data = f.read()
+            magic, size, mtime_ns, count = HEADER.unpack_from(data, 0)
+            if (magic, size, mtime_ns) == (MAGIC, stat.st_size, stat.st_mtime_ns) and len(data) == HEADER.size + 16 * count:
+                ids, offsets = array('q'), array('q')
+                ids.frombytes(data[HEADER.size:HEADER.size + 8 * count])
+                offsets.frombytes(data[HEADER.size + 8 * count:])
+                if sys.byteorder != 'little':
+                    ids.byteswap()
+                    offsets.byteswap()
+                return ids, offsets
+        except (FileNotFoundError, struct.error):
+            pass
+        ids, offsets = self._build_index()
+        self._write_index(ids, offsets, stat)
+        return ids, offsets
+
+    def _build_index(self) -> Tuple[array, array]:
+        """Finds the offset of every row with one pass of the CSV reader, which handles quoted names."""
+        self._file.seek(0)
+        line_offsets = array('q')
+        reader = csv.reader(_csv_lines(self._file, line_offsets))
+        next(reader, None) # header
+        ids, offsets = array('q'), array('q')
+        line = reader.line_num
+        for row in reader:
+            # The row starts at the first line the reader consumed for it
+            ids.append(int(row[0]))
+            offsets.append(line_offsets[line])
+            line = reader.line_num
+        if any(ids[i] >= ids[i + 1] for i in range(len(ids) - 1)):
+            # save_state writes rows in ID order, so only hand-edited files get here
+            rows = sorted(zip(ids, offsets))
+            ids, offsets = array('q', (row[0] for row in rows)), array('q', (row[1] for row in rows))
+        return ids, offsets
+
+    def _write_index(self, ids: array, offsets: array, stat: os.stat_result) -> None:
+        """Writes the offset index next to the CSV file. A read-only directory just skips it."""
+        if sys.byteorder != 'little':
+            ids, offsets = array('q', ids), array('q', offsets)
+            ids.byteswap()
+            offsets.byteswap()
+        tmp_path = f"{self.index_path}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, stat.st_size, stat.st_mtime_ns, len(ids)))
+                f.write(ids.tobytes())
+                f.write(offsets.tobytes())
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            pass
+
+    def _find(self, account_id) -> int:
+        """Returns the position of an ID in the index, or -1 if it is not indexed."""
+        if not isinstance(account_id, int):
+            return -1
+        position = bisect_left(self._ids, account_id)
+        if position < len(self._ids) and self._ids[position] == account_id:
+            return position
+        return -1
+
+    def _parse(self, offset: int) -> Account:
+        """Reads and validates the row at a byte offset."""
+        self._file.seek(offset)
+        lines = iter(lambda: self._file.readline().decode('utf-8'), '')
+        account_id, name, balance = next(csv.reader(lines))
+        return Account(id=int(account_id), name=name, balance=Decimal(balance))
+
+    def load_all(self) -> None:
+        """Loads every account not loaded yet, reading the CSV file once from the start."""
+        with self._lock:
+            if self._complete:
+                return
+            loaded, deleted = self._loaded, self._deleted
+            accounts = {}
+            self._file.seek(0)
+            reader = csv.reader(line.decode('utf-8') for line in self._file)
+            next(reader, None) # header
+            for account_id, name, balance in reader:
+                account_id = int(account_id)
+                if account_id in deleted:
+                    continue
+                account = loaded.get(account_id)
+                accounts[account_id] = account if account is not None else Account(
+                    id=account_id, name=name, balance=Decimal(balance)
+                )
+            # Keep ID order, with accounts added since the snapshot at the end
+            for account_id, account in loaded.items():
+                accounts.setdefault(account_id, account)
+            self._loaded = accounts
+            self._complete = True
+
+    @property
+    def complete(self) -> bool:
+        """Whether every account has been loaded."""
+        return self._complete
+
+    def can_copy(self) -> bool:
+        """Whether write_snapshot can be used: some rows are not loaded, and the CSV file keeps
+        them in ID order, as save_state writes them."""
+        if self._complete:
+            return False
+        if self._ordered is None:
+            offsets = self._offsets
+            self._ordered = all(offsets[i] < offsets[i + 1] for i in range(len(offsets) - 1))
+        return self._ordered
+
+    def cut(self) -> Tuple[Dict[int, Tuple[int, str, Decimal]], Set[int]]:
+        """Copies the (id, name, balance) rows of the loaded accounts and the deleted IDs.
+
+        Call it with balance changes blocked; accounts not loaded yet still have the balance of
+        their row in the CSV file.
+        """
+        with self._lock:
+            rows = {account_id: (account_id, account.name, account.balance)
+                    for account_id, account in self._loaded.items()}
+            return rows, set(self._deleted)
+
+    def _read(self, start: int, end: int) -> Iterator[bytes]:
+        """Reads a byte range of the CSV file in chunks."""
+        while start < end:
+            with self._lock:
+                self._file.seek(start)
+                chunk = self._file.read(min(COPY_CHUNK, end - start))
+            if not chunk:
+                return
+            start += len(chunk)
+            yield chunk
+
+    def write_snapshot(self, f: BinaryIO, rows: Dict[int, Tuple[int, str, Decimal]],
+                       deleted: Set[int]) -> Tuple[int, int, Dict[int, Decimal]]:
+        """Writes a CSV snapshot with the given rows, copying every other row from the CSV file.
+
+        The bytes of rows that were never loaded are copied as they are, without parsing them, so
+        the cost is about that of copying the file. Use it only if can_copy() is True.
+
+        Args:
+            f (BinaryIO): The file to write the snapshot to.
+            rows (Dict[int, Tuple[int, str, Decimal]]): Rows replacing those of the CSV file, or
+                added after them, by ID; see cut().
+            deleted (Set[int]): IDs whose rows are left out.
+
+        Returns:
+            Tuple[int, int, Dict[int, Decimal]]: The CRC-32 of the written snapshot, the CRC-32
+                of the CSV file it was copied from, and the balance each replaced or left-out row
+                had in that file.
+        """
+        ids, offsets, size = self._ids, self._offsets, self._size
+        checksum = source_checksum = 0
+        original: Dict[int, Decimal] = {}
+
+        def write(data: bytes) -> None:
+            nonlocal checksum
+            checksum = zlib.crc32(data, checksum)
+            f.write(data)
+
+        def format_row(row: Tuple[int, str, Decimal]) -> bytes:
+            text = io.StringIO()
+            csv.writer(text).writerow(row)
+            return text.getvalue().encode('utf-8')
+
+        # The header, then runs of copied rows between the replaced and the left-out ones
+        position = offsets[0] if ids else size
+        for chunk in self._read(0, position):
+            source_checksum = zlib.crc32(chunk, source_checksum)
+        write(format_row(('id', 'name', 'balance')))
+        replaced = sorted(i for i in map(self._find, set(rows) | deleted) if i >= 0)
+        last = b'\n'
+        for index in replaced:
+            start = offsets[index]
+            end = offsets[index + 1] if index + 1 < len(offsets) else size
+            for chunk in self._read(position, start):
+                source_checksum = zlib.crc32(chunk, source_checksum)
+                write(chunk)
+                last = chunk[-1:]
+            data = b''.join(self._read(start, end))
+            source_checksum = zlib.crc32(data, source_checksum)
+            account_id = ids[index]
+            original[account_id] = Decimal(next(csv.reader(io.StringIO(data.decode('utf-8'), newline='')))[2])
+            if account_id in rows and account_id not in deleted:
+                write(format_row(rows[account_id]))
+                last = b'\n'
+            position = end
+        for chunk in self._read(position, size):
+            source_checksum = zlib.crc32(chunk, source_checksum)
+            write(chunk)
+            last = chunk[-1:]
+        if last != b'\n':
+            # A hand-written file may lack its last line break
+            write(b'\r\n')
+        for account_id in sorted(rows):
+            if account_id not in original and account_id not in deleted:
+                write(format_row(rows[account_id]))
+        return checksum, source_checksum, original
+
+    def values(self):
+        """Loads every account, then returns a view of them."""
+        self.load_all()
+        return self._loaded.values()
+
+    @property
+    def loaded(self) -> int:
+        """Number of accounts parsed or added so far."""
+        return len(self._loaded)
+
+    def __getitem__(self, account_id) -> Account:
+        account = self._loaded.get(account_id)
+        if account is not None or self._complete:
+            if account is None:
+                raise KeyError(account_id)
+            return account
+        position = self._find(account_id)
+        if position < 0 or account_id in self._deleted:
+            raise KeyError(account_id)
+        with self._lock:
+            account = self._loaded.get(account_id)
+            if account is None:
+                account = self._loaded[account_id] = self._parse(self._offsets[position])
+        return account
+
+    def __setitem__(self, account_id: int, account: Account) -> None:
+        with self._lock:
+            if account_id not in self:
+                self._count += 1
+            self._deleted.discard(account_id)
+            self._loaded[account_id] = account
+            self._last_id = max(self._last_id, account_id)
+
+    def __delitem__(self, account_id: int) -> None:
+        with self._lock:
+            if account_id not in self:
+                raise KeyError(account_id)
+            self._loaded.pop(account_id, None)
+            if self._find(account_id) >= 0:
+                self._deleted.add(account_id)
+            self._count -= 1
+
+    def __contains__(self, account_id) -> bool:
+        if account_id in self._loaded:
+            return True
+        return self._find(account_id) >= 0 and account_id not in self._deleted
+
+    def __iter__(self) -> Iterator[int]:
+        deleted = self._deleted
+        for account_id in self._ids:
+            if account_id not in deleted:
+                yield account_id
+        for account_id in list(self._loaded):
+            if self._find(account_id) < 0:
+                yield account_id
+
+    def __len__(self) -> int:
+        return self._count
+
+    def last_id(self) -> int:
+        """Returns the highest account ID, or 0 if the store is empty."""
+        return self._last_id
+
+    def close(self) -> None:
+        """Closes the CSV file."""
+        self._file.close()
@@ -0,0 +1,198 @@
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from decimal import Decimal
+from typing import Dict, List, NamedTuple, Optional
+from persistence import sync_file
+
+KINDS = ('deposit', 'withdraw', 'transfer_out', 'transfer_in', 'rollback', 'interest', 'fee')
+# Kinds that add their amount to the balance; 'rollback' amounts are signed changes
+CREDITS = frozenset(('deposit', 'transfer_in', 'rollback', 'interest'))
+
+
+class LedgerEntry(NamedTuple):
+    """One ledger entry.
+
+    Attributes:
+        seq (int): Position of the entry in the ledger, starting at 0. Also the pagination cursor.
+        time_ns (int): When the entry was recorded, in nanoseconds since the epoch.
+        kind (str): 'deposit', 'withdraw', 'transfer_out', 'transfer_in', 'rollback' for a
+            balance restored by an atomic batch, or 'interest' and 'fee' charged by accrual.accrue.
+        account_id (int): The account whose balance changed.
+        amount (Decimal): The amount moved. For 'rollback' it is the signed balance change.
+        balance (Decimal): The account's balance after the entry.
+        counterparty (Optional[int]): The other account of a transfer, else None.
+    """
+    seq: int
+    time_ns: int
+    kind: str
+    account_id: int
+    amount: Decimal
+    balance: Decimal
+    counterparty: Optional[int]
+
+
+class Ledger:
+    """Append-only ledger of balance changes, indexed by account and by time.
+
+    Entries are appended to a CSV-like file as `time_ns,kind,account_id,amount,balance,counterparty`
+    lines through a buffered file, so recording one costs a formatted write into memory; the
+    buffer reaches the file on flush(), which BankingSystem calls before persisting a commit.
+
+    The index lives in memory and is rebuilt from the file when the ledger is opened: the byte
+    offset and time of every entry in two arrays, and for every account the sequence numbers of
+    its entries. Entry times never decrease, so both the global and the per-account entries are
+    in time order and time ranges are found by binary search. Queries only read the entries
+    they return.
+
+    Attributes:
+        path (str): Path to the ledger file.
+        fsync (bool): If True, flush() forces the ledger to disk.
+    """
+    def __init__(self, path: str, fsync: bool = False):
+        """Opens a ledger file, creating it if needed, and indexes its entries.
+
+        Args:
+            path (str): Path to the ledger file.
+            fsync (bool, optional): If True, flush() forces the ledger to disk. Defaults to False.
+        """
+        self.path = path
+        self.fsync = fsync
+        self._offsets = array('q')
+        self._times = array('q')
+        self._by_account: Dict[int, array] = {}
+        self._size = 0
+        self._last_time = 0
+        self._lock = threading.Lock()
+        self._index()
+        self._file = open(path, 'ab')
+
+    def _index(self) -> None:
+        """Rebuilds the in-memory index from the ledger file, dropping a torn last line."""
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return
+        end = data.rfind(b'\n') + 1
+        if end < len(data):
+            # A crash mid-append left a partial entry behind
+            with open(self.path, 'r+b') as f:
+                f.truncate(end)
+        offset = 0
+        for line in data[:end].splitlines(keepends=True):
+            time_ns, _, account_id, _ = line.split(b',', 3)
+            self._add(offset, int(time_ns), int(account_id))
+            offset += len(line)
+        self._size = offset
+        self._last_time = self._times[-1] if self._times else 0
+
+    def _add(self, offset: int, time_ns: int, account_id: int) -> None:
+        """Adds an entry to the index."""
+        seqs = self._by_account.get(account_id)
+        if seqs is None:
+            seqs = self._by_account[account_id] = array('q')
+        seqs.append(len(self._offsets))
+        self._offsets.append(offset)
+        self._times.append(time_ns)
+
+    def record(self, kind: str, account_id: int, amount: Decimal, balance: Decimal,
+               counterparty: Optional[int] = None) -> None:
+        """Appends an entry.
+
+        Called by Account methods while they hold the account's lock, so the entries of an
+        account are in the same order as its balance changes.
+
+        Args:
+            kind (str): One of KINDS.
+            account_id (int): The account whose balance changed.
+            amount (Decimal): The amount moved.
+            balance (Decimal): The balance after the change.
+            counterparty (Optional[int], optional): The other account of a transfer. Defaults to None.
+        """
+        with self._lock:
+            # Keep times non-decreasing even if the wall clock steps back
+            time_ns = max(time.time_ns(), self._last_time)
+            self._last_time = time_ns
+            line = f"{time_ns},{kind},{account_id},{amount},{balance},{'' if counterparty is None else counterparty}\n".encode()
+            self._file.write(line)
+            self._add(self._size, time_ns, account_id)
+            self._size += len(line)
+
+    def flush(self) -> None:
+        """Writes buffered entries to the ledger file."""
+        with self._lock:
+            if self.fsync:
+                sync_file(self._file)
+            else:
+                self._file.flush()
+
+    def close(self) -> None:
+        """Flushes and closes the ledger file."""
+        self.flush()
+        self._file.close()
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def _read(self, seqs) -> List[LedgerEntry]:
+        """Reads the entries with the given sequence numbers, in the given order."""
+        with self._lock:
+            self._file.flush()
+            offsets = [self._offsets[seq] for seq in seqs]
+        entries = []
+        with open(self.path, 'rb') as f:
+            for seq, offset in zip(seqs, offsets):
+                f.seek(offset)
+                time_ns, kind, account_id, amount, balance, counterparty = f.readline().decode().rstrip('\n').split(',')
+                entries.append(LedgerEntry(
+                    seq, int(time_ns), kind, int(account_id), Decimal(amount), Decimal(balance),
+                    int(counterparty) if counterparty else None
+                ))
+        return entries
+
+    def history(self, account_id: int, limit: int = 50, before: Optional[int] = None) -> List[LedgerEntry]:
+        """Returns the latest entries of an account, newest first.
+
+        Args:
+            account_id (int): The account.
+            limit (int, optional): Maximum number of entries. Defaults to 50.
+            before (Optional[int], optional): Only return entries with a lower seq, e.g. the seq of
+                the last entry of the previous page. Defaults to None (start from the newest).
+
+        Returns:
+            List[LedgerEntry]: Up to limit entries.
+        """
+        seqs = self._by_account.get(account_id, ())
+        end = len(seqs) if before is None else bisect_left(seqs, before)
+        return self._read(seqs[max(end - limit, 0):end][::-1])
+
+    def between(self, start_ns: int, end_ns: int, account_id: Optional[int] = None, limit: int = 50,
+                after: Optional[int] = None) -> List[LedgerEntry]:
+        """Returns the entries recorded in a time range, oldest first.
+
+        Args:
+            start_ns (int): Start of the range, in nanoseconds since the epoch, inclusive.
+            end_ns (int): End of the range, exclusive.
+            account_id (Optional[int], optional): Only return entries of this account. Defaults to None.
+            limit (int, optional): Maximum number of entries. Defaults to 50.
+            after (Optional[int], optional): Only return entries with a higher seq, e.g. the seq of
+                the last entry of the previous page. Defaults to None.
+
+        Returns:
+            List[LedgerEntry]: Up to limit entries.
+        """
+        times = self._times
+        if account_id is None:
+            first = bisect_left(times, start_ns)
+            if after is not None:
+                first = max(first, after + 1)
+            last = min(bisect_left(times, end_ns), first + limit)
+            return self._read(range(first, last))
+        seqs = self._by_account.get(account_id, ())
+        first = bisect_left(seqs, start_ns, key=times.__getitem__)
+        if after is not None:
+            first = max(first, bisect_right(seqs, after))
+        last = min(bisect_left(seqs, end_ns, key=times.__getitem__), first + limit)
+        return self._read(seqs[first:last])
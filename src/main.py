@@ -1,36 +1,132 @@
-from banking_system import BankingSystem
-from account import Account
-from typing import Optional
+import csv
+import threading
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
 
-def create_account(bank: BankingSystem) -> Optional[Account]:
+# Importing the banking system pulls in Pydantic, so it happens after the first prompt is shown
+if TYPE_CHECKING:
+    from banking_system import BankingSystem
+    from account import Account
+
+
+def open_bank(csv_path: str = 'data/accounts.csv', incremental: bool = False) -> 'BankingSystem':
+    """Opens the bank used by the interactive program.
+
+    Accounts are loaded lazily, one per ID on first access, so startup does not read the whole
+    CSV file, and commits copy the rows never loaded instead of parsing them. The CSV file keeps its format; the offset index written next to it is rebuilt
+    whenever it is missing or stale.
+
+    Args:
+        csv_path (str, optional): Path to the CSV file. Defaults to 'data/accounts.csv'.
+        incremental (bool, optional): Commit only the changed accounts, to an
+            'accounts.csv.delta' file next to the CSV file. Versions without incremental saves
+            do not read it, so data directories are only switched over on request.
+            Defaults to False.
+
+    Returns:
+        BankingSystem: The opened bank.
+    """
+    from banking_system import BankingSystem
+    return BankingSystem(csv_path=csv_path, lazy=True, incremental=incremental)
+
+
+def _open_in_background(opener: Callable[[], 'BankingSystem']) -> Callable[[], 'BankingSystem']:
+    """Starts opening a bank in a background thread.
+
+    Returns:
+        Callable[[], BankingSystem]: Waits for the bank and returns it, re-raising any error
+            raised while opening it.
+    """
+    result = {}
+
+    def run() -> None:
+        try:
+            result['bank'] = opener()
+        except BaseException as err:
+            result['error'] = err
+
+    thread = threading.Thread(target=run, name='bank-open', daemon=True)
+    thread.start()
+
+    def wait() -> 'BankingSystem':
+        thread.join()
+        if 'error' in result:
+            raise result['error']
+        return result['bank']
+    return wait
+
+
+def read_payments(path: str) -> List[Tuple[int, int, str]]:
+    """Reads the payments of a fan-out transfer from a CSV file of recipient_id,amount rows.
+
+    A first row whose recipient ID is not a number, e.g. 'recipient_id,amount', is skipped as
+    a header. Blank lines are ignored. Amounts are checked later, by Account.transfer_many.
+
+    Args:
+        path (str): Path to the CSV file.
+
+    Returns:
+        List[Tuple[int, int, str]]: (line number, recipient_id, amount) per payment.
+
+    Raises:
+        OSError: If the file cannot be read.
+        ValueError: If a row is not a recipient ID and an amount.
+    """
+    payments = []
+    with open(path, newline='', encoding='utf-8') as f:
+        for line, row in enumerate(csv.reader(f), start=1):
+            if not row or not ''.join(row).strip():
+                continue
+            if len(row) != 2:
+                raise ValueError(f"Line {line}: expected recipient_id,amount.")
+            try:
+                recipient_id = int(row[0])
+            except ValueError:
+                if line == 1:
+                    continue
+                raise ValueError(f"Line {line}: invalid account ID {row[0]!r}.") from None
+            payments.append((line, recipient_id, row[1].strip()))
+    return payments
+
+
+def create_account(bank: 'BankingSystem', read: Optional[Callable[[str], str]] = None,
+                   write: Optional[Callable[[str], None]] = None) -> Optional['Account']:
     """Creates a new account by prompting for name and initial balance.
 
     Uses the provided BankingSystem instance to create and store the account.
 
     Args:
         bank (BankingSystem): The banking system managing accounts.
+        read (Optional[Callable[[str], str]], optional): Shows a prompt and returns the answer.
+            Defaults to input.
+        write (Optional[Callable[[str], None]], optional): Shows a message. Defaults to print.
 
     Returns:
         Optional[Account]: The created Account object if successful, else None.
     """
-    name = input("Please enter your name to create an account: ")
-    initial_balance = input("Please enter an initial balance: ")
+    read = read or input
+    write = write or print
+    name = read("Please enter your name to create an account: ")
+    initial_balance = read("Please enter an initial balance: ")
 
     account, message = bank.create_account(name, initial_balance)
 
     if account:
-        print(message)
-        print("You can now login with your account ID.")
+        write(message)
+        write("You can now login with your account ID.")
         return account
     else:
-        print(message)
+        write(message)
         return None
     
-def login(bank: 'BankingSystem') -> Optional[Account]:
+def login(bank: 'BankingSystem', read: Optional[Callable[[str], str]] = None,
+          write: Optional[Callable[[str], None]] = None) -> Optional['Account']:
     """Login to an account by prompting for an account ID.
 
     Args:
         bank (BankingSystem): The banking system managing accounts.
+        read (Optional[Callable[[str], str]], optional): Shows a prompt and returns the answer.
+            Defaults to input.
+        write (Optional[Callable[[str], None]], optional): Shows a message. Defaults to print.
 
     Returns:
         Optional[Account]: The Account object if login is successful, else None.
@@ -38,22 +134,25 @@ def login(bank: 'BankingSystem') -> Optional[Account]:
     Raises:
         ValueError: If the entered account ID is not a valid integer.
     """
+    read = read or input
+    write = write or print
     try:
-        account_id = int(input("Please enter your account ID to login: "))
+        account_id = int(read("Please enter your account ID to login: "))
     except ValueError:
-        print("Invalid account ID. Please try again.")
+        write("Invalid account ID. Please try again.")
         return None
     
     account = bank.get_account(account_id)
 
     if account:
-        print(f"Welcome back, {account.name}! Your current balance is {account.balance}.")
+        write(f"Welcome back, {account.name}! Your current balance is {account.balance}.")
         return account
     else:
-        print("Invalid account ID. Please try again.")
+        write("Invalid account ID. Please try again.")
         return None
     
-def main(bank: BankingSystem = None):
+def main(bank: Optional['BankingSystem'] = None, read: Optional[Callable[[str], str]] = None,
+         write: Optional[Callable[[str], None]] = None, incremental: bool = False):
     """Runs the main interactive loop of the Simple Banking System.
 
     Prompts users to create an account, log in, and perform operations like deposit,
@@ -61,76 +160,114 @@ def main(bank: BankingSystem = None):
 
     Args:
         bank (BankingSystem, optional): The banking system instance to use. If None,
-            creates a new BankingSystem with default CSV path 'data/accounts.csv'.
-            Defaults to None.
+            opens 'data/accounts.csv' with open_bank, in the background while the first prompt
+            waits for input. Defaults to None.
+        read (Optional[Callable[[str], str]], optional): Shows a prompt and returns the answer,
+            e.g. driver.ScriptedInput for a headless run. Defaults to input.
+        write (Optional[Callable[[str], None]], optional): Shows a message. Defaults to print.
+        incremental (bool, optional): Passed to open_bank when no bank is given. Defaults to False.
 
     """
-    if bank is None:
-        bank = BankingSystem(csv_path='data/accounts.csv')
+    read = read or input
+    write = write or print
+    wait_for_bank = _open_in_background(lambda: open_bank(incremental=incremental)) if bank is None else None
     current_user = None # None if not logged in
 
     # The main interactive loop
     while True:
         if current_user is None:
             # if not logged in, prompt the user to log in
-            print("Welcome to Simple Banking System.")
-            exist_user = input("Do you have an account? Type 'yes' to login, or 'no' to create an account: ").strip().lower()
+            write("Welcome to Simple Banking System.")
+            exist_user = read("Do you have an account? Type 'yes' to login, or 'no' to create an account: ").strip().lower()
+            if wait_for_bank is not None:
+                bank, wait_for_bank = wait_for_bank(), None
             # Create account for new user
             if exist_user == 'no':
-                current_user = create_account(bank)
+                current_user = create_account(bank, read, write)
             # Log in for existing user
             elif exist_user == 'yes':
-                current_user = login(bank)
+                current_user = login(bank, read, write)
             else:
-                print("Invalid input. Please enter 'yes' or 'no'.")
+                write("Invalid input. Please enter 'yes' or 'no'.")
         else:
-            # if logged in, prompt the user for actions: 'd' to deposit, 'w' to withdraw, 't' to transfer, or 'q' to quit
-            user_input = input("Please enter 'd' to deposit, 'w' to withdraw, 't' to transfer, or 'q' to quit: ").strip().lower()
+            # if logged in, prompt the user for actions: 'd' to deposit, 'w' to withdraw, 't' to transfer,
+            # 'p' to pay many recipients from a CSV file, or 'q' to quit
+            user_input = read("Please enter 'd' to deposit, 'w' to withdraw, 't' to transfer, 'p' to pay many from a CSV file, or 'q' to quit: ").strip().lower()
             # Deposit money
             if user_input == 'd':
-                amount = input("Enter the amount to deposit: ")
-                success, message = current_user.deposit(amount)
+                amount = read("Enter the amount to deposit: ")
+                success, message = current_user.deposit(amount, bank)
                 if success:
-                    bank.save_state()
-                print(message)
+                    bank.commit(current_user)
+                write(message)
             # Withdraw money
             elif user_input == 'w':
-                amount = input("Enter the amount to withdraw: ")
-                success, message = current_user.withdraw(amount)
+                amount = read("Enter the amount to withdraw: ")
+                success, message = current_user.withdraw(amount, bank)
                 if success:
-                    bank.save_state()
-                print(message)
+                    bank.commit(current_user)
+                write(message)
             # Transfer money
             elif user_input == 't':
                 try:
-                    recipient_id = int(input("Enter the recipient's account ID: "))
+                    recipient_id = int(read("Enter the recipient's account ID: "))
                 except ValueError:
-                    print("Invalid account ID. Please try again.")
+                    write("Invalid account ID. Please try again.")
                     continue
                 
                 # Handle transfer money to the same account
                 if current_user.id == recipient_id:
-                    print("Cannot transfer to the same account!")
+                    write("Cannot transfer to the same account!")
                     continue
 
                 recipient = bank.get_account(recipient_id)
                 # Handle non-existent recipient
                 if not recipient:
-                    print(f"Recipient with ID {recipient_id} does not exist.")
+                    write(f"Recipient with ID {recipient_id} does not exist.")
                     continue
 
-                amount = input("Enter the amount to transfer: ")
+                amount = read("Enter the amount to transfer: ")
                 success, message = current_user.transfer(amount, recipient_id, bank)
                 if success:
-                    bank.save_state()
-                print(message)
+                    bank.commit(current_user, recipient)
+                write(message)
+            # Pay many recipients at once, all or nothing
+            elif user_input == 'p':
+                path = read("Enter the path of the payments CSV file (recipient_id,amount per line): ").strip()
+                try:
+                    rows = read_payments(path)
+                except (OSError, ValueError) as err:
+                    write(f"Cannot read payments: {err}")
+                    continue
+                if not rows:
+                    write(f"No payments found in {path}.")
+                    continue
+
+                # The bank commits the sender and every recipient together on success
+                success, messages = bank.transfer_many(current_user.id, [(recipient_id, amount) for _, recipient_id, amount in rows])
+                if success:
+                    write(f"Paid {len(rows)} payments. New balance: {current_user.balance}.")
+                elif len(set(messages)) == 1:
+                    write(messages[0])
+                else:
+                    from account import NOT_TRANSFERRED
+                    for (line, _, _), message in zip(rows, messages):
+                        if message != NOT_TRANSFERRED:
+                            write(f"Line {line}: {message}")
+                    write("No payments were made.")
             # Logout
             elif user_input == 'q':
-                print("Thank you for using the Simple Banking System. Goodbye!")
+                write("Thank you for using the Simple Banking System. Goodbye!")
+                # Persist commits still held by a 'group' or 'manual' durability policy
+                bank.flush()
                 break
             # Handle invalid user's input command
             else:
-                print("Invalid input. Please enter 'd', 'w', 't', or 'q'.")
+                write("Invalid input. Please enter 'd', 'w', 't', 'p', or 'q'.")
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description="Simple Banking System")
+    parser.add_argument('--incremental', action='store_true',
+                        help="commit only changed accounts, to data/accounts.csv.delta")
+    main(incremental=parser.parse_args().incremental)
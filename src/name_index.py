@@ -0,0 +1,86 @@
+import bisect
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+class NameIndex:
+    """Case-folded index of account names, for exact and prefix lookups.
+
+    Every distinct folded name maps to the set of IDs of its accounts, and the distinct names are
+    also kept in a sorted list, so a prefix lookup is a binary search followed by a scan of the
+    matching names only. Adding an account with a name already in the index is O(1); a new name
+    is inserted into the sorted list.
+    """
+    def __init__(self):
+        self._ids: Dict[str, Set[int]] = {}
+        self._names: List[str] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, rows: Iterable[Tuple[int, str]]) -> 'NameIndex':
+        """Builds an index in one pass, sorting the distinct names once at the end.
+
+        Args:
+            rows (Iterable[Tuple[int, str]]): (id, name) pairs.
+
+        Returns:
+            NameIndex: The new index.
+        """
+        index = cls()
+        ids = index._ids
+        for account_id, name in rows:
+            folded = name.casefold()
+            matches = ids.get(folded)
+            if matches is None:
+                ids[folded] = {account_id}
+            else:
+                matches.add(account_id)
+        index._names = sorted(ids)
+        return index
+
+    def add(self, account_id: int, name: str) -> None:
+        """Adds an account to the index.
+
+        Args:
+            account_id (int): The account's ID.
+            name (str): The account holder's name.
+        """
+        folded = name.casefold()
+        with self._lock:
+            matches = self._ids.get(folded)
+            if matches is None:
+                self._ids[folded] = {account_id}
+                bisect.insort(self._names, folded)
+            else:
+                matches.add(account_id)
+
+    def exact(self, name: str) -> List[int]:
+        """Returns the IDs of accounts whose name equals `name`, ignoring case, in ID order."""
+        with self._lock:
+            return sorted(self._ids.get(name.casefold(), ()))
+
+    def prefix(self, prefix: str, limit: Optional[int] = None) -> List[int]:
+        """Returns the IDs of accounts whose name starts with `prefix`, ignoring case.
+
+        Args:
+            prefix (str): The start of the name.
+            limit (Optional[int], optional): Stop after this many IDs. Defaults to None (all).
+
+        Returns:
+            List[int]: Matching IDs, grouped by name in alphabetical order.
+        """
+        folded = prefix.casefold()
+        results: List[int] = []
+        with self._lock:
+            names = self._names
+            position = bisect.bisect_left(names, folded)
+            while position < len(names) and names[position].startswith(folded):
+                results.extend(sorted(self._ids[names[position]]))
+                if limit is not None and len(results) >= limit:
+                    return results[:limit]
+                position += 1
+        return results
+
+    def __len__(self) -> int:
+        """Number of distinct folded names."""
+        return len(self._names)
@@ -0,0 +1,175 @@
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+from account import Account
+
+POLICIES = ('always', 'group', 'manual')
+
+
+def sync_file(f) -> None:
+    """Flushes an open file and forces its contents to disk."""
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def sync_directory(path: str) -> None:
+    """Forces the directory entry of a renamed file to disk.
+
+    Platforms that cannot open directories (Windows) are skipped.
+
+    Args:
+        path (str): Path of a file in the directory.
+    """
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class CommitScheduler:
+    """Decides when committed changes are persisted.
+
+    Three durability policies are supported:
+
+    - 'always': every commit is persisted before it returns.
+    - 'group': commits return immediately and a background writer persists them together once
+      group_size operations are pending or group_interval_ms has passed since the oldest one,
+      whichever comes first. An account changed several times in one group is written once.
+    - 'manual': commits are only collected, and persisted when flush() is called.
+
+    Attributes:
+        policy (str): The durability policy.
+        group_size (int): Pending operations that trigger a group commit.
+        group_interval_ms (float): Longest time a commit stays pending under the 'group' policy.
+        error (Optional[BaseException]): The error of the background writer's last failed flush,
+            or None once its changes have been persisted.
+    """
+    def __init__(self, persist: Callable[[Iterable[Account]], None], policy: str = 'always',
+                 group_size: int = 100, group_interval_ms: float = 50.0):
+        """Initializes a CommitScheduler and, for the 'group' policy, starts its writer thread.
+
+        Args:
+            persist (Callable[[Iterable[Account]], None]): Persists the given accounts.
+            policy (str, optional): 'always', 'group' or 'manual'. Defaults to 'always'.
+            group_size (int, optional): Pending operations that trigger a group commit. Defaults to 100.
+            group_interval_ms (float, optional): Longest delay of a group commit. Defaults to 50.0.
+
+        Raises:
+            ValueError: If the policy is unknown.
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown durability policy '{policy}'!")
+        self.policy = policy
+        self.group_size = group_size
+        self.group_interval_ms = group_interval_ms
+        self.error: Optional[BaseException] = None
+        self._persist = persist
+        self._pending: Dict[int, Account] = {}
+        self._pending_ops = 0
+        self._oldest = 0.0
+        self._flush_lock = threading.Lock()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._writer = None
+        if policy == 'group':
+            self._writer = threading.Thread(target=self._run, name='bank-group-commit', daemon=True)
+            self._writer.start()
+
+    def submit(self, accounts: Iterable[Account]) -> None:
+        """Schedules the given accounts for persistence according to the policy.
+
+        Args:
+            accounts (Iterable[Account]): The accounts changed by one operation.
+        """
+        if self.policy == 'always':
+            self._persist(accounts)
+            return
+        with self._condition:
+            # Wake the writer to start the interval timer on the first pending commit
+            first = not self._pending
+            if first:
+                self._oldest = time.monotonic()
+            for account in accounts:
+                self._pending[account.id] = account
+            self._pending_ops += 1
+            if first or self._pending_ops >= self.group_size:
+                self._condition.notify()
+
+    @property
+    def pending(self) -> int:
+        """Number of operations committed but not yet persisted."""
+        return self._pending_ops
+
+    def flush(self) -> None:
+        """Persists every pending change now.
+
+        If persisting fails, the changes stay pending, so a later flush can still persist them.
+        Changes the background writer failed to persist are pending too, so its error is only
+        raised again if persisting them fails again.
+
+        Raises:
+            BaseException: The error of persisting.
+        """
+        self._flush()
+
+    def _flush(self) -> None:
+        """Persists every pending change, and clears the writer's error once nothing failed is left."""
+        with self._flush_lock:
+            with self._condition:
+                batch, self._pending = self._pending, {}
+                ops, self._pending_ops = self._pending_ops, 0
+                oldest = self._oldest
+            if batch:
+                try:
+                    self._persist(batch.values())
+                except BaseException:
+                    # Keep the batch pending for the next flush; commits made meanwhile are newer
+                    with self._condition:
+                        for account_id, account in batch.items():
+                            self._pending.setdefault(account_id, account)
+                        self._pending_ops += ops
+                        self._oldest = oldest
+                    raise
+            self.error = None
+
+    def close(self) -> None:
+        """Stops the background writer and persists whatever is still pending."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if self._writer is not None:
+            self._writer.join()
+        self.flush()
+
+    def _run(self) -> None:
+        """Background writer of the 'group' policy."""
+        interval = self.group_interval_ms / 1000
+        while True:
+            with self._condition:
+                while not self._closed:
+                    if self._pending_ops >= self.group_size:
+                        break
+                    if self._pending:
+                        remaining = self._oldest + interval - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._condition.wait(remaining)
+                    else:
+                        self._condition.wait()
+                if self._closed:
+                    return
+            try:
+                self._flush()
+            except BaseException as err:
+                self.error = err
+                # The failed changes are pending again; retry after an interval rather than at once
+                with self._condition:
+                    if not self._closed:
+                        self._condition.wait(interval)
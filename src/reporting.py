@@ -0,0 +1,175 @@
+import argparse
+from decimal import Decimal
+from fractions import Fraction
+from typing import List, Optional, Sequence, Tuple, Union
+import numpy as np
+from account import locked
+from banking_system import BankingSystem
+from utils import from_scaled, to_scaled
+
+Amount = Union[str, int, Decimal]
+
+
+class BalanceReport:
+    """Aggregates over the balances of all accounts, computed with NumPy.
+
+    Balances are extracted from the bank once, as int64 numbers of 10**-scale units (cents for
+    scale 2), so every aggregate is exact and converts back to the same Decimal a loop over
+    Account objects would produce. Sums are split into 32-bit halves, so they cannot overflow.
+
+    Attributes:
+        ids (np.ndarray): Account IDs, int64.
+        balances (np.ndarray): Balances scaled by 10**scale, int64, in the same order as ids.
+        scale (int): Decimal places of the balances.
+    """
+    def __init__(self, ids: np.ndarray, balances: np.ndarray, scale: int):
+        self.ids = ids
+        self.balances = balances
+        self.scale = scale
+        self._sorted: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_bank(cls, bank: BankingSystem, scale: Optional[int] = None) -> 'BalanceReport':
+        """Extracts the balances of all accounts at one point in time.
+
+        Columnar and binary stores hand over their scaled balance column directly, copied while
+        balance changes are blocked. Accounts in a dictionary are read through a snapshot and
+        converted one by one.
+
+        Args:
+            bank (BankingSystem): The bank to report on.
+            scale (Optional[int], optional): Decimal places to keep for a dictionary store.
+                Defaults to bank.scale. Columnar and binary stores use their own scale.
+
+        Returns:
+            BalanceReport: The report.
+
+        Raises:
+            ValueError: If a balance has more than `scale` decimal places.
+        """
+        accounts = bank.accounts
+        columns = getattr(accounts, 'columns', None)
+        if columns is not None:
+            # Copying two arrays is quick enough to block balance changes meanwhile
+            with locked():
+                ids, balances = columns()
+            return cls(np.frombuffer(ids, dtype=np.int64), np.frombuffer(balances, dtype=np.int64), accounts.scale)
+        scale = bank.scale if scale is None else scale
+        ids = []
+        balances = []
+        with bank.snapshot() as snapshot:
+            for account_id, _, balance in snapshot.rows():
+                # Same check as utils.to_scaled, without its per-call overhead
+                scaled = balance.scaleb(scale)
+                integral = int(scaled)
+                if integral != scaled:
+                    to_scaled(balance, scale)
+                ids.append(account_id)
+                balances.append(integral)
+        return cls(np.array(ids, dtype=np.int64), np.array(balances, dtype=np.int64), scale)
+
+    def __len__(self) -> int:
+        return len(self.balances)
+
+    def _from_scaled(self, scaled: int) -> Decimal:
+        return from_scaled(int(scaled), self.scale)
+
+    def _to_scaled_ceiling(self, amount: Amount) -> int:
+        """Converts an amount to the smallest scaled integer not below it."""
+        scaled = Decimal(amount).scaleb(self.scale)
+        return int(scaled.to_integral_value(rounding='ROUND_CEILING'))
+
+    def _sorted_balances(self) -> np.ndarray:
+        """Returns the balances in ascending order, sorting them on first use."""
+        if self._sorted is None:
+            self._sorted = np.sort(self.balances)
+        return self._sorted
+
+    def total(self) -> Decimal:
+        """Returns the sum of all balances."""
+        balances = self.balances
+        # Each half sums to less than 2**63 for up to 2**31 accounts
+        high = int(np.sum(balances >> 32))
+        low = int(np.sum(balances & 0xFFFFFFFF))
+        return self._from_scaled((high << 32) + low)
+
+    def top(self, n: int = 10) -> List[Tuple[int, Decimal]]:
+        """Returns the n accounts with the highest balances.
+
+        Args:
+            n (int, optional): Number of accounts. Defaults to 10.
+
+        Returns:
+            List[Tuple[int, Decimal]]: (id, balance) pairs, highest balance first, and lowest ID
+                first among equal balances.
+        """
+        count = len(self.balances)
+        n = min(n, count)
+        if n <= 0:
+            return []
+        # Every balance at least the n-th highest is a candidate, including all ties with it
+        threshold = np.partition(self.balances, count - n)[count - n]
+        candidates = np.flatnonzero(self.balances >= threshold)
+        order = np.lexsort((self.ids[candidates], -self.balances[candidates]))[:n]
+        chosen = candidates[order]
+        return [(int(account_id), self._from_scaled(balance))
+                for account_id, balance in zip(self.ids[chosen], self.balances[chosen])]
+
+    def histogram(self, edges: Sequence[Amount]) -> List[int]:
+        """Counts the balances in each bucket between consecutive edges.
+
+        Args:
+            edges (Sequence[Amount]): Increasing bucket edges, e.g. ["0", "100", "1000"]. Bucket i
+                holds the balances with edges[i] <= balance < edges[i + 1].
+
+        Returns:
+            List[int]: len(edges) - 1 counts.
+        """
+        scaled_edges = np.array([self._to_scaled_ceiling(edge) for edge in edges], dtype=np.int64)
+        positions = np.searchsorted(self._sorted_balances(), scaled_edges, side='left')
+        return [int(count) for count in np.diff(positions)]
+
+    def percentiles(self, percents: Sequence[Amount]) -> List[Optional[Decimal]]:
+        """Returns balance percentiles by the nearest-rank method.
+
+        The p-th percentile is the smallest balance that at least p percent of the balances are
+        less than or equal to, so it is always an actual balance and needs no rounding.
+
+        Args:
+            percents (Sequence[Amount]): Percentages between 0 and 100, e.g. [50, 90, "99.9"].
+
+        Returns:
+            List[Optional[Decimal]]: One balance per percentage, or None if there are no accounts.
+        """
+        ordered = self._sorted_balances()
+        count = len(ordered)
+        results = []
+        for percent in percents:
+            if not count:
+                results.append(None)
+                continue
+            rank = Fraction(Decimal(percent)) * count / 100
+            index = max(-(-rank.numerator // rank.denominator), 1) - 1
+            results.append(self._from_scaled(ordered[min(index, count - 1)]))
+        return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report on the balances of all accounts.")
+    parser.add_argument('--csv-path', default='data/accounts.csv')
+    parser.add_argument('--columnar', action='store_true')
+    parser.add_argument('--top', type=int, default=10, help="number of top accounts to list")
+    parser.add_argument('--edges', default="0,100,1000,10000,100000", help="comma-separated histogram edges")
+    args = parser.parse_args()
+    report = BalanceReport.from_bank(BankingSystem(csv_path=args.csv_path, columnar=args.columnar, trusted=True))
+    print(f"Accounts: {len(report):,}")
+    print(f"Total:    {report.total()}")
+    p50, p90, p99 = report.percentiles([50, 90, 99])
+    print(f"Median:   {p50}, 90th percentile: {p90}, 99th percentile: {p99}")
+    print("Top accounts:")
+    for account_id, balance in report.top(args.top):
+        print(f"  {account_id:>10}  {balance}")
+    edges = args.edges.split(',')
+    print("Histogram:")
+    for low, high, count in zip(edges, edges[1:], report.histogram(edges)):
+        print(f"  [{low}, {high}): {count:,}")
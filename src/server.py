@@ -0,0 +1,197 @@
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from banking_system import BankingSystem
+from account import Account
+
+
+class Session:
+    """State of one client connection.
+
+    Attributes:
+        account (Optional[Account]): The logged-in account, or None if not logged in.
+    """
+    def __init__(self):
+        self.account: Optional[Account] = None
+
+
+class BankServer:
+    """Serves a BankingSystem over TCP with a JSON-lines protocol.
+
+    Each request is one JSON object per line with an 'op' field, and each response is one JSON
+    object per line with 'ok' (bool) and 'message' (str) fields. Supported operations mirror
+    main.py:
+
+        {"op": "create", "name": "Alice", "balance": "100"}  -> also returns "id"
+        {"op": "login", "id": 1}
+        {"op": "deposit", "amount": "50"}
+        {"op": "withdraw", "amount": "20"}
+        {"op": "transfer", "to": 2, "amount": "10"}
+        {"op": "balance"}                                     -> also returns "balance"
+        {"op": "stats", "enabled": true}                      -> also returns "stats"
+
+    The 'stats' operation needs no login. It returns BankingSystem.stats(), after switching
+    recording on or off if 'enabled' is given.
+
+    Balance changes run on the event loop, since they are short and in memory. Persistence runs
+    in a single background thread, so slow disk writes never stall other sessions; a response is
+    only sent once the change has been committed.
+
+    Attributes:
+        bank (BankingSystem): The banking system being served.
+    """
+    def __init__(self, bank: BankingSystem):
+        """Initializes a BankServer.
+
+        Args:
+            bank (BankingSystem): The banking system to serve.
+        """
+        self.bank = bank
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='bank-commit')
+
+    async def _commit(self, *accounts: Account) -> None:
+        """Commits the given accounts without blocking the event loop."""
+        await asyncio.get_running_loop().run_in_executor(self._executor, self.bank.commit, *accounts)
+
+    async def dispatch(self, session: Session, request: dict) -> dict:
+        """Executes one request for a session.
+
+        Args:
+            session (Session): The session the request belongs to.
+            request (dict): The decoded request.
+
+        Returns:
+            dict: The response to send back.
+        """
+        op = request.get('op')
+        if op == 'create':
+            # create_account commits by itself, so it runs off the event loop as a whole
+            account, message = await asyncio.get_running_loop().run_in_executor(
+                self._executor, self.bank.create_account, str(request.get('name', '')), str(request.get('balance', ''))
+            )
+            if account is None:
+                return {'ok': False, 'message': message}
+            return {'ok': True, 'message': message, 'id': account.id}
+        if op == 'login':
+            try:
+                account = self.bank.get_account(int(request.get('id')))
+            except (TypeError, ValueError, OverflowError): # e.g. a missing ID or 1e999
+                account = None
+            if account is None:
+                return {'ok': False, 'message': "Invalid account ID. Please try again."}
+            session.account = account
+            return {'ok': True, 'message': f"Welcome back, {account.name}! Your current balance is {account.balance}."}
+        if op == 'stats':
+            if 'enabled' in request:
+                self.bank.metrics.enabled = bool(request['enabled'])
+            state = 'on' if self.bank.metrics.enabled else 'off'
+            return {'ok': True, 'message': f"Stats recording is {state}.", 'stats': self.bank.stats()}
+        if op not in ('deposit', 'withdraw', 'transfer', 'balance'):
+            return {'ok': False, 'message': f"Unknown operation '{op}'!"}
+
+        account = session.account
+        if account is None:
+            return {'ok': False, 'message': "Please login first."}
+        if op == 'balance':
+            return {'ok': True, 'message': f"Your current balance is {account.balance}.", 'balance': str(account.balance)}
+        amount = str(request.get('amount', ''))
+        if op == 'deposit':
+            success, message = account.deposit(amount, self.bank)
+            touched = (account,)
+        elif op == 'withdraw':
+            success, message = account.withdraw(amount, self.bank)
+            touched = (account,)
+        else:
+            try:
+                recipient_id = int(request.get('to'))
+            except (TypeError, ValueError, OverflowError):
+                return {'ok': False, 'message': "Invalid account ID. Please try again."}
+            # Handle transfer money to the same account
+            if recipient_id == account.id:
+                return {'ok': False, 'message': "Cannot transfer to the same account!"}
+            recipient = self.bank.get_account(recipient_id)
+            # Handle non-existent recipient
+            if recipient is None:
+                return {'ok': False, 'message': f"Recipient with ID {recipient_id} does not exist."}
+            success, message = account.transfer(amount, recipient_id, self.bank)
+            touched = (account, recipient)
+        if success:
+            await self._commit(*touched)
+        return {'ok': success, 'message': message}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serves one client connection until it disconnects."""
+        session = Session()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError
+                except ValueError:
+                    response = {'ok': False, 'message': "Invalid request, expected a JSON object per line."}
+                else:
+                    response = await self.dispatch(session, request)
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8765) -> asyncio.AbstractServer:
+        """Starts listening for connections.
+
+        Args:
+            host (str, optional): Address to listen on. Defaults to '127.0.0.1'.
+            port (int, optional): Port to listen on, 0 for any free port. Defaults to 8765.
+
+        Returns:
+            asyncio.AbstractServer: The listening server.
+        """
+        return await asyncio.start_server(self.handle, host, port)
+
+    def close(self) -> None:
+        """Waits for pending commits, stops the background writer and flushes the bank."""
+        self._executor.shutdown(wait=True)
+        self.bank.flush()
+
+
+async def serve(bank: BankingSystem, host: str, port: int) -> None:
+    """Serves the bank until cancelled."""
+    bank_server = BankServer(bank)
+    server = await bank_server.start(host, port)
+    print(f"Serving Simple Banking System on {', '.join(str(sock.getsockname()) for sock in server.sockets)}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        bank_server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the Simple Banking System over TCP.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--csv-path', default='data/accounts.csv')
+    parser.add_argument('--journal', action='store_true', help="append to a journal instead of rewriting the CSV file")
+    parser.add_argument('--durability', choices=['always', 'group', 'manual'], default='always',
+                        help="when commits are persisted (default: always)")
+    parser.add_argument('--fsync', action='store_true', help="force every persisted commit to disk")
+    parser.add_argument('--ledger', action='store_true', help="record every balance change in a ledger")
+    parser.add_argument('--stats', action='store_true', help="record operation counts and latencies from the start")
+    parser.add_argument('--stats-path', help="dump the stats to this JSON file periodically")
+    parser.add_argument('--stats-interval', type=float, default=60.0, help="seconds between stats dumps (default: 60)")
+    args = parser.parse_args()
+    bank = BankingSystem(csv_path=args.csv_path, journal=args.journal, durability=args.durability, fsync=args.fsync,
+                         ledger=args.ledger, stats=args.stats, stats_path=args.stats_path,
+                         stats_interval=args.stats_interval)
+    try:
+        asyncio.run(serve(bank, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,484 @@
+import argparse
+import csv
+import multiprocessing
+import os
+import threading
+import uuid
+from decimal import Decimal
+from typing import Dict, List, Optional, Set, Tuple
+from account import Account
+from banking_system import BankingSystem
+from persistence import sync_file
+from utils import convert_decimal
+
+
+def shard_path(csv_path: str, shard: int) -> str:
+    """Returns the data file of one shard, e.g. 'data/accounts.shard0.csv' for 'data/accounts.csv'."""
+    stem, extension = os.path.splitext(csv_path)
+    return f"{stem}.shard{shard}{extension}"
+
+
+def split_csv(csv_path: str, shards: int) -> List[int]:
+    """Splits an accounts CSV file into the shard files of a ShardedBank.
+
+    Args:
+        csv_path (str): The CSV file to split. The shard files are written next to it.
+        shards (int): Number of shards.
+
+    Returns:
+        List[int]: Number of accounts written to each shard.
+    """
+    files = [open(shard_path(csv_path, shard), 'w', newline='', encoding='utf-8') for shard in range(shards)]
+    counts = [0] * shards
+    try:
+        writers = [csv.writer(f) for f in files]
+        for writer in writers:
+            writer.writerow(['id', 'name', 'balance'])
+        with open(csv_path, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for row in reader:
+                shard = int(row[0]) % shards
+                writers[shard].writerow(row)
+                counts[shard] += 1
+    finally:
+        for f in files:
+            f.close()
+    return counts
+
+
+class _Shard:
+    """The part of a ShardedBank running in a worker process.
+
+    Requests are handled one at a time, so holds placed by a prepared transfer need no locking.
+    Money held by a prepared transfer stays in the sender's balance, and so on disk, until the
+    transfer commits; withdrawals and transfers only see the balance minus the holds.
+    """
+    def __init__(self, bank: BankingSystem):
+        self.bank = bank
+        # Prepared outgoing transfers: txid -> (account ID, amount), and the total held per account
+        self.holds: Dict[str, Tuple[int, Decimal]] = {}
+        self.held: Dict[int, Decimal] = {}
+        # IDs of cross-shard transfers already applied by this shard, for recovery
+        self.txids_path = f"{bank.csv_path}.txids"
+        self.txids: Set[str] = set()
+        self._txid_records = 0
+        self._load_txids()
+
+    def _load_txids(self) -> None:
+        """Reads the applied transfer IDs, resolving intents a crash left unconfirmed.
+
+        '<shard file>.txids' holds 'intent,txid,account_id,balance' before a side is applied,
+        'applied,txid' once its balance is persisted, and 'forget,txid' once the router is done
+        with the transfer. The bank is flushed before every intent, so an unconfirmed intent was
+        applied exactly if the account's persisted balance is the one it names. The file is then
+        rewritten with the transfer IDs still needed.
+        """
+        if not os.path.exists(self.txids_path):
+            return
+        intents = {}
+        with open(self.txids_path, 'r') as f:
+            for line in f.read().splitlines():
+                record = line.split(',')
+                if len(record) == 1: # written before intents were recorded
+                    self.txids.add(record[0])
+                elif record[0] == 'intent':
+                    intents[record[1]] = (int(record[2]), Decimal(record[3]))
+                elif record[0] == 'applied':
+                    intents.pop(record[1], None)
+                    self.txids.add(record[1])
+                elif record[0] == 'forget':
+                    self.txids.discard(record[1])
+        for txid, (account_id, balance) in intents.items():
+            account = self.bank.get_account(account_id)
+            if account is not None and account.balance == balance:
+                self.txids.add(txid)
+        self._rewrite_txids()
+
+    def _rewrite_txids(self) -> None:
+        """Replaces the transfer ID file with one 'applied' record per ID still needed."""
+        tmp_path = f"{self.txids_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.writelines(f"applied,{txid}\n" for txid in self.txids)
+            if self.bank.fsync:
+                sync_file(f)
+        os.replace(tmp_path, self.txids_path)
+        self._txid_records = len(self.txids)
+
+    def _append_txid(self, record: str) -> None:
+        """Appends a record to the transfer ID file."""
+        with open(self.txids_path, 'a') as f:
+            f.write(f"{record}\n")
+            if self.bank.fsync:
+                sync_file(f)
+        self._txid_records += 1
+
+    def next_id(self) -> int:
+        return self.bank.next_id
+
+    @staticmethod
+    def _copy(account: Optional[Account]) -> Optional[Account]:
+        """Returns a plain copy of an account to send to the router, since views cannot be pickled."""
+        return None if account is None else Account.from_trusted(id=account.id, name=account.name, balance=account.balance)
+
+    def create(self, name: str, initial_balance: str, account_id: int) -> Tuple[Optional[Account], str]:
+        account, message = self.bank.create_account(name, initial_balance, account_id)
+        return self._copy(account), message
+
+    def get(self, account_id: int) -> Optional[Account]:
+        return self._copy(self.bank.get_account(account_id))
+
+    def _over_available(self, account: Account, amount: str) -> bool:
+        """Whether amount is more than the account's balance minus the money held for transfers."""
+        held = self.held.get(account.id)
+        if not held:
+            return False
+        try:
+            amount = convert_decimal(amount)
+        except (ValueError, TypeError):
+            return False # reported by the Account method
+        return amount > account.balance - held
+
+    def deposit(self, account_id: int, amount: str) -> Tuple[bool, str]:
+        account = self.bank.get_account(account_id)
+        if account is None:
+            return False, f"Account {account_id} does not exist."
+        success, message = account.deposit(amount, self.bank)
+        if success:
+            self.bank.commit(account)
+        return success, message
+
+    def withdraw(self, account_id: int, amount: str) -> Tuple[bool, str]:
+        account = self.bank.get_account(account_id)
+        if account is None:
+            return False, f"Account {account_id} does not exist."
+        if self._over_available(account, amount):
+            return False, "Insufficient balance!"
+        success, message = account.withdraw(amount, self.bank)
+        if success:
+            self.bank.commit(account)
+        return success, message
+
+    def transfer(self, account_id: int, amount: str, recipient_id: int) -> Tuple[bool, str]:
+        """Transfers between two accounts of this shard."""
+        account = self.bank.get_account(account_id)
+        if account is None:
+            return False, f"Account {account_id} does not exist."
+        if self.bank.get_account(recipient_id) is None:
+            return False, f"Recipient with ID {recipient_id} does not exist."
+        if self._over_available(account, amount):
+            return False, "Insufficient balance!"
+        success, message = account.transfer(amount, recipient_id, self.bank)
+        if success:
+            self.bank.commit(account, self.bank.get_account(recipient_id))
+        return success, message
+
+    def prepare_debit(self, txid: str, account_id: int, amount: str) -> Tuple[bool, str]:
+        """Phase one of a cross-shard transfer on the sender's shard: validate and hold the amount."""
+        account = self.bank.get_account(account_id)
+        if account is None:
+            return False, f"Account {account_id} does not exist."
+        try:
+            amount = convert_decimal(amount)
+        except (ValueError, TypeError) as err:
+            return False, str(err)
+        if amount <= 0:
+            return False, "Transfer amount must be positive!"
+        # Rejected now, since a committed transfer this shard cannot store could never be applied
+        message = account._check_scale(amount)
+        if message:
+            return False, message
+        if amount > account.balance - self.held.get(account_id, 0):
+            return False, "Insufficient balance!"
+        self.holds[txid] = (account_id, amount)
+        self.held[account_id] = self.held.get(account_id, 0) + amount
+        return True, ""
+
+    def _release(self, txid: str) -> Tuple[int, Decimal]:
+        """Removes the hold of a prepared transfer."""
+        account_id, amount = self.holds.pop(txid)
+        self.held[account_id] -= amount
+        if not self.held[account_id]:
+            del self.held[account_id]
+        return account_id, amount
+
+    def abort_debit(self, txid: str) -> None:
+        """Phase two of an aborted transfer: release the held amount."""
+        if txid in self.holds:
+            self._release(txid)
+
+    def commit_debit(self, txid: str, recipient_id: int) -> Decimal:
+        """Phase two of a committed transfer on the sender's shard. Returns the new balance."""
+        account_id, amount = self._release(txid)
+        return self.apply_debit(txid, account_id, amount, recipient_id)
+
+    def apply_debit(self, txid: str, account_id: int, amount: Decimal, recipient_id: int) -> Decimal:
+        """Debits a committed transfer, unless this shard already applied it."""
+        account = self.bank.get_account(account_id)
+        if txid not in self.txids:
+            self._apply(txid, account, 'transfer_out', -amount, recipient_id)
+        return account.balance
+
+    def prepare_credit(self, txid: str, account_id: int, amount: Decimal) -> Tuple[bool, str]:
+        """Phase one of a cross-shard transfer on the recipient's shard: check the account exists
+        and its store can hold the amount and the balance it leaves."""
+        account = self.bank.get_account(account_id)
+        if account is None:
+            return False, f"Recipient with ID {account_id} does not exist."
+        message = account._check_scale(amount) or account._check_range(account.balance + amount)
+        if message:
+            return False, message
+        return True, ""
+
+    def apply_credit(self, txid: str, account_id: int, amount: Decimal, sender_id: int) -> None:
+        """Phase two of a committed transfer on the recipient's shard, skipped if already applied."""
+        if txid in self.txids:
+            return
+        self._apply(txid, self.bank.get_account(account_id), 'transfer_in', amount, sender_id)
+
+    def _apply(self, txid: str, account: Account, kind: str, change: Decimal, counterparty: int) -> None:
+        """Applies one side of a cross-shard transfer and persists it together with its transfer ID.
+
+        The intent is written while the persisted balances match the ones in memory, and the
+        balance is persisted before the transfer ID is confirmed, whatever the durability policy,
+        so recovery can tell whether the side reached the disk.
+        """
+        self.bank.flush()
+        balance = account.balance + change
+        self._append_txid(f"intent,{txid},{account.id},{balance}")
+        account.balance = balance
+        self.bank.record(kind, account.id, abs(change), balance, counterparty)
+        self.bank.commit(account)
+        self.bank.flush()
+        self.txids.add(txid)
+        self._append_txid(f"applied,{txid}")
+
+    def forget(self, txid: str) -> None:
+        """Drops the ID of a transfer the router has logged as done on both shards."""
+        if txid in self.txids:
+            self.txids.discard(txid)
+            self._append_txid(f"forget,{txid}")
+            # Keep the file proportional to the transfers in flight
+            if self._txid_records > 2 * len(self.txids) + 1000:
+                self._rewrite_txids()
+
+    def forget_all(self) -> None:
+        """Drops every transfer ID, once the router has no transfers left in flight."""
+        self.txids.clear()
+        self._rewrite_txids()
+
+    def flush(self) -> None:
+        self.bank.flush()
+
+    def close(self) -> None:
+        self.bank.close()
+
+
+def _serve_shard(conn, csv_path: str, options: dict) -> None:
+    """Worker process main loop: load one shard, then answer requests until closed."""
+    shard = _Shard(BankingSystem(csv_path=csv_path, **options))
+    conn.send(shard.next_id())
+    while True:
+        try:
+            op, args = conn.recv()
+        except EOFError:
+            shard.close()
+            return
+        try:
+            result = getattr(shard, op)(*args)
+        except Exception as err:
+            result = err
+        conn.send(result)
+        if op == 'close':
+            return
+
+
+class ShardedBank:
+    """Routes banking operations to shards, each loaded and owned by its own worker process.
+
+    Account IDs are split across shards by `account_id % shards`, each shard persisting to its own
+    file (see shard_path) with the persistence options of a BankingSystem. Loading happens in all
+    workers at once. The router itself holds no accounts: it allocates IDs, forwards requests,
+    and coordinates transfers between shards with two-phase commit:
+
+    1. The sender's shard validates the amount and holds it, so it cannot be spent elsewhere,
+       and the recipient's shard checks the recipient exists. Either shard can vote no, after
+       which the hold is released and nothing is written.
+    2. The decision is appended to '<csv_path>.2pc' before either shard applies it. Each shard
+       then applies its side, persists it, and records the transfer ID in '<shard file>.txids'.
+       Once both have, a 'done' record follows and the shards drop the transfer ID.
+
+    On start, transfers decided but not done, e.g. because a worker died, are re-sent to both
+    shards, which skip any side they already applied.
+
+    Requests to different shards run in parallel when the router is used from several threads.
+
+    Attributes:
+        csv_path (str): Base path of the shard files and the transfer decision log.
+        shards (int): Number of shards.
+    """
+    def __init__(self, csv_path: str = 'data/accounts.csv', shards: int = 4, **options):
+        """Starts one worker per shard and waits until every shard is loaded.
+
+        Args:
+            csv_path (str, optional): Base path of the shard files. Defaults to 'data/accounts.csv'.
+            shards (int, optional): Number of shards. Defaults to 4.
+            **options: BankingSystem options used by every shard, e.g. journal=True.
+        """
+        self.csv_path = csv_path
+        self.shards = shards
+        self._fsync = options.get('fsync', False)
+        self._conns = []
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._processes = []
+        for shard in range(shards):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_serve_shard, args=(child, shard_path(csv_path, shard), options),
+                name=f"bank-shard-{shard}", daemon=True
+            )
+            process.start()
+            self._conns.append(parent)
+            self._processes.append(process)
+        # Shards load in parallel; each sends its next free ID when ready
+        self.next_id = max(conn.recv() for conn in self._conns)
+        self._id_lock = threading.Lock()
+        self._log_lock = threading.Lock()
+        self._recover()
+
+    def shard_of(self, account_id: int) -> int:
+        """Returns the shard owning an account ID."""
+        return account_id % self.shards
+
+    def _call(self, shard: int, op: str, *args):
+        """Sends a request to a shard and waits for the answer, re-raising errors of the worker."""
+        with self._locks[shard]:
+            self._conns[shard].send((op, args))
+            result = self._conns[shard].recv()
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def _log(self, line: str) -> None:
+        """Appends a record to the transfer decision log."""
+        with self._log_lock, open(f"{self.csv_path}.2pc", 'a') as f:
+            f.write(f"{line}\n")
+            if self._fsync:
+                sync_file(f)
+
+    def _recover(self) -> None:
+        """Completes transfers that were decided but not acknowledged by both shards."""
+        try:
+            with open(f"{self.csv_path}.2pc", 'r') as f:
+                data = f.read()
+        except FileNotFoundError:
+            data = ''
+        # Drop a torn record left behind by a crash mid-append; its transfer was never applied
+        data = data[:data.rfind('\n') + 1]
+        pending = {}
+        for record in (line.split(',') for line in data.splitlines()):
+            if len(record) == 5 and record[1] == 'commit':
+                pending[record[0]] = record
+            elif len(record) == 2 and record[1] == 'done':
+                pending.pop(record[0], None)
+        for txid, _, sender_id, recipient_id, amount in pending.values():
+            sender_id, recipient_id, amount = int(sender_id), int(recipient_id), Decimal(amount)
+            self._call(self.shard_of(sender_id), 'apply_debit', txid, sender_id, amount, recipient_id)
+            self._call(self.shard_of(recipient_id), 'apply_credit', txid, recipient_id, amount, sender_id)
+            self._log(f"{txid},done")
+        # Every decision is now applied, so the log and the shards' transfer IDs can start over
+        for shard in range(self.shards):
+            self._call(shard, 'forget_all')
+        if os.path.exists(f"{self.csv_path}.2pc"):
+            os.remove(f"{self.csv_path}.2pc")
+
+    def create_account(self, name: str, initial_balance: str) -> Tuple[Optional[Account], str]:
+        """Creates an account on the shard owning the next free ID.
+
+        Returns:
+            Tuple[Optional[Account], str]: A copy of the created account (or None) and a message.
+        """
+        with self._id_lock:
+            account_id = self.next_id
+            self.next_id += 1
+        return self._call(self.shard_of(account_id), 'create', name, initial_balance, account_id)
+
+    def get_account(self, account_id: int) -> Optional[Account]:
+        """Returns a copy of an account, or None if it does not exist.
+
+        The copy lives in this process, so changing it does not change the account.
+        """
+        return self._call(self.shard_of(account_id), 'get', account_id)
+
+    def deposit(self, account_id: int, amount: str) -> Tuple[bool, str]:
+        """Deposits into an account and commits it, as Account.deposit."""
+        return self._call(self.shard_of(account_id), 'deposit', account_id, amount)
+
+    def withdraw(self, account_id: int, amount: str) -> Tuple[bool, str]:
+        """Withdraws from an account and commits it, as Account.withdraw."""
+        return self._call(self.shard_of(account_id), 'withdraw', account_id, amount)
+
+    def transfer(self, account_id: int, amount: str, recipient_id: int) -> Tuple[bool, str]:
+        """Transfers between two accounts, with two-phase commit if they live on different shards.
+
+        Args:
+            account_id (int): The sender.
+            amount (str): The amount to transfer as a string representation of a number.
+            recipient_id (int): The recipient.
+
+        Returns:
+            Tuple[bool, str]: Success flag and message, as Account.transfer.
+        """
+        if account_id == recipient_id:
+            return False, "Cannot transfer to the same account!"
+        sender_shard, recipient_shard = self.shard_of(account_id), self.shard_of(recipient_id)
+        if sender_shard == recipient_shard:
+            return self._call(sender_shard, 'transfer', account_id, amount, recipient_id)
+
+        txid = uuid.uuid4().hex
+        # Phase one: both shards vote
+        success, message = self._call(sender_shard, 'prepare_debit', txid, account_id, amount)
+        if not success:
+            return False, message
+        # The sender's shard has checked the amount
+        amount = convert_decimal(amount)
+        success, message = self._call(recipient_shard, 'prepare_credit', txid, recipient_id, amount)
+        if not success:
+            self._call(sender_shard, 'abort_debit', txid)
+            return False, message
+        # Phase two: the decision is durable before either side applies it
+        try:
+            self._log(f"{txid},commit,{account_id},{recipient_id},{amount}")
+        except OSError:
+            self._call(sender_shard, 'abort_debit', txid)
+            raise
+        balance = self._call(sender_shard, 'commit_debit', txid, recipient_id)
+        self._call(recipient_shard, 'apply_credit', txid, recipient_id, amount, account_id)
+        self._log(f"{txid},done")
+        # Recovery will not re-send a transfer logged as done, so the shards can drop its ID
+        self._call(sender_shard, 'forget', txid)
+        self._call(recipient_shard, 'forget', txid)
+        return True, f"Transferred {amount} to account {recipient_id}. New balance: {balance}"
+
+    def flush(self) -> None:
+        """Persists commits held by the durability policy of every shard."""
+        for shard in range(self.shards):
+            self._call(shard, 'flush')
+
+    def close(self) -> None:
+        """Flushes and stops every shard worker."""
+        for shard in range(self.shards):
+            self._call(shard, 'close')
+        for process in self._processes:
+            process.join()
+        for conn in self._conns:
+            conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Split an accounts CSV file into shard files.")
+    parser.add_argument('csv_path')
+    parser.add_argument('--shards', type=int, default=4)
+    args = parser.parse_args()
+    counts = split_csv(args.csv_path, args.shards)
+    print(f"Split {sum(counts)} accounts into {args.shards} shards: {counts}")
@@ -0,0 +1,101 @@
+from decimal import Decimal
+from itertools import islice
+from typing import Callable, Dict, Iterator, Optional, Set, Tuple
+from account import Account, account_lock, locked
+from totals import Totals
+
+# Rows resolved per hold of the account locks by Snapshot.rows
+CHUNK_SIZE = 4096
+
+
+class Snapshot:
+    """A point-in-time view of the balances of a bank, kept up while balances keep changing.
+
+    Nothing is copied when the snapshot is taken. Instead, while the snapshot is open, the bank
+    hands it the previous balance of every account the first time that account changes, and
+    accounts opened after it are left out. Reads return the kept balance if there is one and the
+    current balance otherwise, so they see every account as it was when the snapshot was taken.
+    Writers pay one dictionary insert per open snapshot for the first change of an account.
+
+    A change is handed to the snapshot right after it is made, under the account's lock, so
+    reads hold that lock to never catch a change in between. rows() holds all locks for a chunk
+    of rows at a time, which blocks writers for a fraction of a millisecond per chunk instead
+    of once for the whole store.
+
+    Only balance changes recorded through the bank (BankingSystem.record) are kept, which
+    includes every Account method given the bank. Close the snapshot when done, or use it as a
+    context manager, so writers stop keeping balances for it.
+    """
+    def __init__(self, accounts: Dict[int, Account], release: Callable[['Snapshot'], None]):
+        """Initializes a Snapshot. Use BankingSystem.snapshot() rather than calling this directly.
+
+        Args:
+            accounts (Dict[int, Account]): The bank's account store.
+            release (Callable[[Snapshot], None]): Called once by close().
+        """
+        self._accounts = accounts
+        self._release = release
+        self._before: Dict[int, Decimal] = {}
+        self._opened: Set[int] = set()
+        self.closed = False
+
+    def _keep(self, account_id: int, balance: Decimal) -> None:
+        """Keeps the balance an account had before its first change since the snapshot."""
+        self._before.setdefault(account_id, balance)
+
+    def _exclude(self, account_id: int) -> None:
+        """Leaves out an account opened after the snapshot."""
+        self._opened.add(account_id)
+
+    def balance(self, account_id: int) -> Optional[Decimal]:
+        """Returns the balance of an account at the snapshot, or None if it did not exist yet."""
+        with account_lock(account_id):
+            account = self._accounts.get(account_id)
+            if account is None or account_id in self._opened:
+                return None
+            return self._before.get(account_id, account.balance)
+
+    def rows(self) -> Iterator[Tuple[int, str, Decimal]]:
+        """Iterates over the (id, name, balance) rows at the snapshot, in store order."""
+        accounts = self._accounts
+        before = self._before
+        opened = self._opened
+        # Balances are read while the locks are held. A store's rows() may have read them earlier,
+        # but after the snapshot was taken: if such an account has no kept balance once no change
+        # is in flight, it has not changed since.
+        if hasattr(accounts, 'rows'):
+            rows = accounts.rows()
+            while True:
+                with locked():
+                    batch = list(islice(rows, CHUNK_SIZE))
+                    chunk = [
+                        (account_id, name, before.get(account_id, balance))
+                        for account_id, name, balance in batch if account_id not in opened
+                    ]
+                if not batch:
+                    return
+                yield from chunk
+        values = list(accounts.values())
+        for start in range(0, len(values), CHUNK_SIZE):
+            with locked():
+                chunk = [
+                    (account.id, account.name, before.get(account.id, account.balance))
+                    for account in values[start:start + CHUNK_SIZE] if account.id not in opened
+                ]
+            yield from chunk
+
+    def totals(self) -> Totals:
+        """Computes the aggregates of all accounts at the snapshot."""
+        return Totals.build(balance for _, _, balance in self.rows())
+
+    def close(self) -> None:
+        """Stops keeping balances for the snapshot. Reads are no longer consistent afterwards."""
+        if not self.closed:
+            self.closed = True
+            self._release(self)
+
+    def __enter__(self) -> 'Snapshot':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
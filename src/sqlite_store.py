@@ -0,0 +1,398 @@
+import argparse
+import csv
+import queue
+import sqlite3
+import threading
+import weakref
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from account import Account, locked
+from columnar_store import AccountView
+from storage import Storage
+
+# Balances are kept as decimal text, so every Decimal round-trips exactly
+SCHEMA = "CREATE TABLE IF NOT EXISTS accounts (id INTEGER PRIMARY KEY, name TEXT NOT NULL, balance TEXT NOT NULL)"
+UPSERT = ("INSERT INTO accounts (id, name, balance) VALUES (?, ?, ?) "
+          "ON CONFLICT(id) DO UPDATE SET name = excluded.name, balance = excluded.balance")
+UPDATE = "UPDATE accounts SET balance = ? WHERE id = ?"
+# Rows fetched per query by SQLiteAccounts.rows
+CHUNK_SIZE = 10000
+
+
+class ConnectionPool:
+    """Hands out SQLite connections to threads, reusing idle ones.
+
+    A single thread keeps reusing one connection. Threads working at the same time each get
+    their own, up to `size`, after which they wait for one to be returned. Connections are in
+    autocommit mode, so transactions are started explicitly, and may move between threads.
+
+    Attributes:
+        path (str): Path to the database file.
+        size (int): Most connections opened at once.
+    """
+    def __init__(self, path: str, size: int = 8, synchronous: str = 'NORMAL', timeout: float = 30.0):
+        """Initializes a pool. Connections are only opened when needed.
+
+        Args:
+            path (str): Path to the database file.
+            size (int, optional): Most connections opened at once. Defaults to 8.
+            synchronous (str, optional): SQLite's synchronous setting, 'FULL' to sync every
+                commit to disk. Defaults to 'NORMAL'.
+            timeout (float, optional): Seconds to wait for a lock held by another connection.
+                Defaults to 30.0.
+        """
+        self.path = path
+        self.size = size
+        self._synchronous = synchronous
+        self._timeout = timeout
+        # Last in, first out, so a lone thread keeps getting the connection it just returned
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def _open(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=self._timeout, isolation_level=None, check_same_thread=False)
+        connection.execute(f"PRAGMA synchronous = {self._synchronous}")
+        return connection
+
+    @property
+    def opened(self) -> int:
+        """Number of connections opened so far."""
+        return len(self._connections)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Lends out a connection for the duration of a with block."""
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                connection = self._open() if len(self._connections) < self.size else None
+                if connection is not None:
+                    self._connections.append(connection)
+            if connection is None:
+                connection = self._idle.get()
+        try:
+            yield connection
+        finally:
+            self._idle.put(connection)
+
+    def close(self) -> None:
+        """Closes every connection. Call it once no thread uses the pool any more."""
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections = []
+            self._idle = queue.LifoQueue()
+
+
+class SQLiteAccounts(MutableMapping):
+    """A mapping of account IDs to accounts stored in an SQLite database.
+
+    A lookup reads the account with one query and returns an AccountView. Balance changes made
+    through views are kept as unsaved until SQLiteStorage writes them, and lookups and rows()
+    see them over the stored balances, so the database plus the unsaved changes is the state of
+    the bank. New accounts are kept the same way until they are written.
+
+    With cache=True, every account looked up stays in memory and later lookups skip the query.
+    Without the cache, a view only stays while someone holds it, so memory grows with the
+    unsaved changes rather than with the accounts touched.
+    """
+    def __init__(self, pool: ConnectionPool, cache: bool = True):
+        """Opens the store over a database holding the accounts table.
+
+        Args:
+            pool (ConnectionPool): Connections to the database.
+            cache (bool, optional): Keep every account looked up in memory. Defaults to True.
+        """
+        self._pool = pool
+        self._views = {} if cache else weakref.WeakValueDictionary()
+        # Balances changed since they were last written, and names of accounts to insert
+        self._unsaved: Dict[int, Decimal] = {}
+        self._inserts: Dict[int, str] = {}
+        # Bumped whenever unsaved changes are written, so a read racing the write is retried
+        self._writes = 0
+        self._lock = threading.Lock()
+        with pool.connection() as connection:
+            self._count, last_id = connection.execute("SELECT COUNT(*), MAX(id) FROM accounts").fetchone()
+        self._last_id = last_id or 0
+
+    def _query(self, sql: str, params: tuple) -> list:
+        """Runs a query, holding the lock afterwards if no unsaved change was written meanwhile.
+
+        The caller must release self._lock, which guards the unsaved changes the rows are read with.
+        """
+        while True:
+            writes = self._writes
+            with self._pool.connection() as connection:
+                rows = connection.execute(sql, params).fetchall()
+            self._lock.acquire()
+            if self._writes == writes:
+                return rows
+            self._lock.release()
+
+    def _set_balance(self, account_id: int, balance: Decimal) -> None:
+        """Keeps a balance changed through a view until it is written, called by AccountView."""
+        with self._lock:
+            self._unsaved[account_id] = balance
+
+    def _take(self, account_ids: Iterable[int]) -> Tuple[list, list]:
+        """Returns the unsaved inserts and balance updates of the given accounts, for SQLiteStorage.
+
+        Returns:
+            Tuple[list, list]: (id, name, balance) rows to insert and (balance, id) rows to update.
+        """
+        inserts = []
+        updates = []
+        with self._lock:
+            for account_id in account_ids:
+                balance = self._unsaved.get(account_id)
+                if balance is None:
+                    continue
+                name = self._inserts.get(account_id)
+                if name is not None:
+                    inserts.append((account_id, name, balance))
+                else:
+                    updates.append((balance, account_id))
+        return inserts, updates
+
+    def _written(self, inserts: list, updates: list) -> None:
+        """Drops the changes SQLiteStorage wrote, unless they changed again meanwhile."""
+        unsaved = self._unsaved
+        with self._lock:
+            self._writes += 1
+            for account_id, name, balance in inserts:
+                if unsaved.get(account_id) is balance:
+                    del unsaved[account_id]
+                if self._inserts.get(account_id) is name:
+                    del self._inserts[account_id]
+            for balance, account_id in updates:
+                if unsaved.get(account_id) is balance:
+                    del unsaved[account_id]
+
+    def unsaved(self) -> List[int]:
+        """Returns the IDs of the accounts with changes not written yet."""
+        with self._lock:
+            return list(self._unsaved)
+
+    def __getitem__(self, account_id) -> Account:
+        view = self._views.get(account_id)
+        if view is not None:
+            return view
+        if not isinstance(account_id, int):
+            raise KeyError(account_id)
+        row = self._query("SELECT name, balance FROM accounts WHERE id = ?", (account_id,))
+        try:
+            view = self._views.get(account_id)
+            if view is not None:
+                return view
+            name = self._inserts.get(account_id)
+            if name is None:
+                if not row:
+                    raise KeyError(account_id)
+                name, stored = row[0]
+                balance = self._unsaved.get(account_id)
+                if balance is None:
+                    balance = Decimal(stored)
+            else:
+                balance = self._unsaved[account_id]
+            view = AccountView.model_construct(id=account_id, name=name, balance=balance)
+            view._store = self
+            self._views[account_id] = view
+        finally:
+            self._lock.release()
+        return view
+
+    def __setitem__(self, account_id: int, account: Account) -> None:
+        # IDs above the highest one are new without asking the database
+        new = account_id > self._last_id or account_id not in self
+        with self._lock:
+            if new:
+                self._count += 1
+            self._last_id = max(self._last_id, account_id)
+            self._inserts[account_id] = account.name
+            self._unsaved[account_id] = account.balance
+            # Drop a stale view so the next lookup reflects the stored account
+            self._views.pop(account_id, None)
+
+    def __delitem__(self, account_id: int) -> None:
+        if account_id not in self:
+            raise KeyError(account_id)
+        with self._pool.connection() as connection:
+            connection.execute("DELETE FROM accounts WHERE id = ?", (account_id,))
+        with self._lock:
+            self._count -= 1
+            self._unsaved.pop(account_id, None)
+            self._inserts.pop(account_id, None)
+            self._views.pop(account_id, None)
+
+    def __contains__(self, account_id) -> bool:
+        if account_id in self._views or account_id in self._inserts:
+            return True
+        if not isinstance(account_id, int):
+            return False
+        with self._pool.connection() as connection:
+            return connection.execute("SELECT 1 FROM accounts WHERE id = ?", (account_id,)).fetchone() is not None
+
+    def __iter__(self) -> Iterator[int]:
+        for account_id, _, _ in self.rows():
+            yield account_id
+
+    def __len__(self) -> int:
+        return self._count
+
+    def last_id(self) -> int:
+        """Returns the highest account ID, or 0 if there are no accounts."""
+        return self._last_id
+
+    def rows(self) -> Iterator[Tuple[int, str, Decimal]]:
+        """Iterates over (id, name, balance) rows, with unsaved changes, without creating views.
+
+        Rows are read CHUNK_SIZE at a time, each chunk with the unsaved changes at the time it
+        is read.
+
+        Returns:
+            Iterator[Tuple[int, str, Decimal]]: All rows, in ID order.
+        """
+        with self._lock:
+            pending = sorted(self._inserts)
+        position = 0
+        last = -1 << 63
+        while True:
+            chunk = self._query("SELECT id, name, balance FROM accounts WHERE id > ? ORDER BY id LIMIT ?",
+                                (last, CHUNK_SIZE))
+            try:
+                unsaved, inserts = self._unsaved, self._inserts
+                rows = []
+                # Merge accounts not inserted yet into the stored ones, in ID order
+                end = chunk[-1][0] if len(chunk) == CHUNK_SIZE else None
+                for account_id, name, stored in chunk:
+                    while position < len(pending) and pending[position] < account_id:
+                        inserted = pending[position]
+                        if inserted in inserts:
+                            rows.append((inserted, inserts[inserted], unsaved[inserted]))
+                        position += 1
+                    if position < len(pending) and pending[position] == account_id:
+                        position += 1
+                    balance = unsaved.get(account_id)
+                    rows.append((account_id, inserts.get(account_id, name), Decimal(stored) if balance is None else balance))
+                while position < len(pending) and (end is None or pending[position] < end):
+                    inserted = pending[position]
+                    if inserted in inserts:
+                        rows.append((inserted, inserts[inserted], unsaved[inserted]))
+                    position += 1
+            finally:
+                self._lock.release()
+            yield from rows
+            if end is None:
+                return
+            last = end
+
+
+class SQLiteStorage(Storage):
+    """Keeps accounts in an SQLite database in WAL mode.
+
+    Each persist() is one transaction of per-row statements, an UPDATE of the balance of every
+    changed account and an INSERT of every new one, so the two balances of a transfer are
+    written together or not at all. In WAL mode readers do not wait for that writer, so lookups
+    from other threads, each on a pooled connection, go on while a commit is written. Writers
+    take turns. save() writes every unsaved change and checkpoints the WAL into the database
+    file.
+
+    Attributes:
+        path (str): Path to the database file.
+        pool (ConnectionPool): Connections to the database.
+        cache (bool): Whether accounts looked up stay in memory, see SQLiteAccounts.
+        accounts (Optional[SQLiteAccounts]): The account store, once opened.
+    """
+    def __init__(self, path: str, cache: bool = True, pool_size: int = 8, fsync: bool = False):
+        """Initializes an SQLiteStorage. The database is created by open() if it does not exist.
+
+        Args:
+            path (str): Path to the database file.
+            cache (bool, optional): Keep every account looked up in memory. Defaults to True.
+            pool_size (int, optional): Most connections opened at once. Defaults to 8.
+            fsync (bool, optional): If True, every commit is synced to disk; otherwise it
+                survives a crash of the process but not of the machine. Defaults to False.
+        """
+        self.path = path
+        self.cache = cache
+        self.pool = ConnectionPool(path, pool_size, 'FULL' if fsync else 'NORMAL')
+        self.accounts: Optional[SQLiteAccounts] = None
+        self._write_lock = threading.Lock()
+
+    def open(self) -> SQLiteAccounts:
+        with self.pool.connection() as connection:
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute(SCHEMA)
+        self.accounts = SQLiteAccounts(self.pool, self.cache)
+        return self.accounts
+
+    def _write(self, account_ids: List[int]) -> None:
+        """Writes the unsaved changes of the given accounts in one transaction."""
+        store = self.accounts
+        if not account_ids:
+            return
+        with self._write_lock:
+            # Lock the accounts, so the changes are a consistent cut of them
+            with locked(*account_ids):
+                inserts, updates = store._take(account_ids)
+            if not inserts and not updates:
+                return
+            with self.pool.connection() as connection:
+                connection.execute("BEGIN IMMEDIATE")
+                try:
+                    connection.executemany(UPSERT, [(account_id, name, str(balance)) for account_id, name, balance in inserts])
+                    connection.executemany(UPDATE, [(str(balance), account_id) for balance, account_id in updates])
+                    connection.execute("COMMIT")
+                except BaseException:
+                    connection.execute("ROLLBACK")
+                    raise
+            store._written(inserts, updates)
+
+    def persist(self, accounts: Iterable[Account]) -> None:
+        self._write([account.id for account in accounts])
+
+    def save(self) -> None:
+        with locked():
+            account_ids = self.accounts.unsaved()
+        self._write(account_ids)
+        with self.pool.connection() as connection:
+            connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+def csv_to_sqlite(csv_path: str, db_path: str) -> int:
+    """Copies the accounts of a CSV snapshot into an SQLite database, replacing any with the same IDs.
+
+    Args:
+        csv_path (str): The CSV file to read, with 'id', 'name' and 'balance' columns.
+        db_path (str): The database to write.
+
+    Returns:
+        int: Number of accounts copied.
+    """
+    storage = SQLiteStorage(db_path)
+    storage.open()
+    try:
+        with open(csv_path, 'r', newline='', encoding='utf-8') as f, storage.pool.connection() as connection:
+            rows = [(int(row['id']), row['name'], str(Decimal(row['balance']))) for row in csv.DictReader(f)]
+            connection.execute("BEGIN IMMEDIATE")
+            connection.executemany(UPSERT, rows)
+            connection.execute("COMMIT")
+        return len(rows)
+    finally:
+        storage.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Copy a CSV snapshot into an SQLite database.")
+    parser.add_argument('source')
+    parser.add_argument('destination')
+    args = parser.parse_args()
+    count = csv_to_sqlite(args.source, args.destination)
+    print(f"Copied {count} accounts from {args.source} to {args.destination}.")
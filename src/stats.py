@@ -0,0 +1,193 @@
+import functools
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Latencies are counted in power-of-two buckets of nanoseconds: bucket b holds [2**(b-1), 2**b)
+BUCKETS = 48
+
+
+class _Series:
+    """Count, latency histogram and bytes written of one operation."""
+    __slots__ = ('count', 'total_ns', 'max_ns', 'bytes', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.bytes = 0
+        self.buckets = [0] * BUCKETS
+
+    def percentile(self, fraction: float) -> int:
+        """Returns the upper bound of the bucket holding the given fraction of the samples, in ns."""
+        rank = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= rank:
+                return min(1 << bucket, self.max_ns)
+        return self.max_ns
+
+    def as_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'mean_us': self.total_ns / self.count / 1000 if self.count else 0.0,
+            'p50_us': self.percentile(0.5) / 1000,
+            'p99_us': self.percentile(0.99) / 1000,
+            'max_us': self.max_ns / 1000,
+            'bytes': self.bytes,
+            # Upper bound of every non-empty bucket in microseconds, with its count
+            'histogram': {f"{(1 << bucket) / 1000:g}": count for bucket, count in enumerate(self.buckets) if count},
+        }
+
+
+# Methods registered with instrument(): (class, attribute, original function, timed wrapper)
+_instrumented: List[Tuple[type, str, Callable, Callable]] = []
+# Number of Stats instances currently recording; wrappers are installed while it is positive
+_recording = 0
+# Reentrant, since __del__ may run while the lock is held by the same thread
+_recording_lock = threading.RLock()
+
+
+def _install(on: bool) -> None:
+    """Swaps the timed wrappers in for the original methods, or back."""
+    for cls, attribute, original, wrapper in _instrumented:
+        setattr(cls, attribute, wrapper if on else original)
+
+
+class Stats:
+    """Per-operation counts, latency histograms and bytes written.
+
+    Recording is switched on and off at runtime through `enabled`. Instrumented code reads the
+    flag before taking a timestamp, so while it is off an operation pays one attribute lookup
+    and nothing is recorded. Methods registered with instrument() cost nothing at all while no
+    Stats is recording, since their timed wrappers are only installed meanwhile.
+
+    Attributes:
+        enabled (bool): Whether observations are recorded.
+    """
+    def __init__(self, enabled: bool = False):
+        self._enabled = False
+        self._series: Dict[str, _Series] = {}
+        self._lock = threading.Lock()
+        self._dump_stop: Optional[threading.Event] = None
+        self._dumper: Optional[threading.Thread] = None
+        self.enabled = enabled
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, enabled: bool) -> None:
+        global _recording
+        enabled = bool(enabled)
+        with _recording_lock:
+            if enabled == self._enabled:
+                return
+            self._enabled = enabled
+            _recording += 1 if enabled else -1
+            if _recording == (1 if enabled else 0):
+                _install(enabled)
+
+    def __del__(self):
+        # A discarded Stats stops counting as recording
+        self.enabled = False
+
+    def observe(self, name: str, elapsed_ns: int, nbytes: int = 0) -> None:
+        """Records one operation.
+
+        Args:
+            name (str): The operation, e.g. 'save_state'.
+            elapsed_ns (int): How long it took, in nanoseconds.
+            nbytes (int, optional): Bytes it wrote. Defaults to 0.
+        """
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                series = self._series[name] = _Series()
+            series.count += 1
+            series.total_ns += elapsed_ns
+            series.bytes += nbytes
+            if elapsed_ns > series.max_ns:
+                series.max_ns = elapsed_ns
+            series.buckets[min(elapsed_ns.bit_length(), BUCKETS - 1)] += 1
+
+    def snapshot(self, reset: bool = False) -> Dict[str, dict]:
+        """Returns the recorded operations.
+
+        Args:
+            reset (bool, optional): Start over after taking the snapshot. Defaults to False.
+
+        Returns:
+            Dict[str, dict]: Per operation name: 'count', 'mean_us', 'p50_us', 'p99_us', 'max_us',
+                'bytes', and 'histogram' mapping bucket upper bounds in microseconds to counts.
+                Percentiles are bucket upper bounds, so within a factor of two.
+        """
+        with self._lock:
+            series = self._series
+            if reset:
+                self._series = {}
+            return {name: series[name].as_dict() for name in sorted(series)}
+
+    def dump(self, path: str) -> None:
+        """Writes a snapshot to a JSON file, replacing it atomically."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'time': time.time(), 'stats': self.snapshot()}, f, indent=1)
+        os.replace(tmp_path, path)
+
+    def start_dump(self, path: str, interval: float = 60.0) -> None:
+        """Starts a background thread dumping a snapshot to `path` every `interval` seconds."""
+        self.stop_dump()
+        stop = self._dump_stop = threading.Event()
+
+        def run() -> None:
+            while not stop.wait(interval):
+                self.dump(path)
+            # A final dump, so the file covers everything up to stop_dump
+            self.dump(path)
+
+        self._dumper = threading.Thread(target=run, name='bank-stats-dump', daemon=True)
+        self._dumper.start()
+
+    def stop_dump(self) -> None:
+        """Stops the dump thread after a final dump, if one is running."""
+        if self._dumper is not None:
+            self._dump_stop.set()
+            self._dumper.join()
+            self._dumper = None
+
+
+def instrument(cls: type, attribute: str, position: int, keyword: str, name: Optional[str] = None) -> None:
+    """Times a method in the stats of the bank passed to it, while any Stats is recording.
+
+    Args:
+        cls (type): The class defining the method.
+        attribute (str): The method's name.
+        position (int): Position of the bank (or recorder) among the method's arguments after self.
+        keyword (str): Name of that argument. Objects without a `metrics` attribute, such as a
+            bare Ledger, are not recorded.
+        name (Optional[str], optional): The operation name. Defaults to the method's name.
+    """
+    method = getattr(cls, attribute)
+    name = name or attribute
+
+    @functools.wraps(method)
+    def wrapper(account, *args, **kwargs):
+        bank = args[position] if len(args) > position else kwargs.get(keyword)
+        metrics = getattr(bank, 'metrics', None)
+        if metrics is None or not metrics.enabled:
+            return method(account, *args, **kwargs)
+        start = time.perf_counter_ns()
+        try:
+            return method(account, *args, **kwargs)
+        finally:
+            metrics.observe(name, time.perf_counter_ns() - start)
+
+    with _recording_lock:
+        _instrumented.append((cls, attribute, method, wrapper))
+        if _recording:
+            setattr(cls, attribute, wrapper)
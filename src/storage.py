@@ -0,0 +1,32 @@
+from abc import ABC, abstractmethod
+from collections.abc import MutableMapping
+from typing import Iterable
+from account import Account
+
+
+class Storage(ABC):
+    """A backend keeping the accounts of a BankingSystem, in place of its CSV file.
+
+    BankingSystem(storage=...) calls open() once for its account store, persist() with the
+    accounts of every commit when the durability policy persists them, save() from save_state
+    and close() from close(). The store becomes the bank's `accounts` mapping. Balance changes
+    made through its accounts must show in later lookups and reach the backend with the next
+    persist() of that account or save(), even if the account object is dropped in between.
+
+    The CSV snapshot, journal, delta and binary snapshot formats are built into BankingSystem
+    rather than implemented as a Storage.
+    """
+    @abstractmethod
+    def open(self) -> MutableMapping:
+        """Opens the backend and returns its account store, a mapping of IDs to accounts."""
+
+    @abstractmethod
+    def persist(self, accounts: Iterable[Account]) -> None:
+        """Writes the current state of the given created or changed accounts, all or nothing."""
+
+    @abstractmethod
+    def save(self) -> None:
+        """Writes every change not persisted yet."""
+
+    def close(self) -> None:
+        """Releases the backend's resources."""
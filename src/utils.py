@@ -1,15 +1,118 @@
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Optional, Union
 
-def convert_decimal(amount: str):
+# Limits on amounts accepted by convert_decimal, like a SQL NUMERIC(precision, scale): at most
+# MAX_SCALE digits after the decimal point and MAX_PRECISION - MAX_SCALE digits before it.
+# MAX_PRECISION matches the default decimal context, beyond which Decimal arithmetic rounds.
+MAX_PRECISION = 28
+MAX_SCALE = 12
+MAX_INPUT_LENGTH = 64 # characters, longer strings are rejected before parsing
+MAX_SCALED = 2 ** 63 - 1 # largest scaled balance an int64 column or record holds
+
+INVALID_INPUT = "Invalid input, please input numbers only!"
+
+# Recently converted strings, mapped to their Decimal or to the error message they raised.
+# Amounts typed by users repeat a lot ("100", "50.00"), and Decimals are immutable, so a
+# cached result can be handed out again without parsing.
+CACHE_SIZE = 4096
+_cache: Dict[str, Union[Decimal, str]] = {}
+# Strings without an exponent no longer than this have too few digits to break the limits, so
+# convert_decimal only checks that they parse to a finite number (see set_limits)
+_plain_length = min(MAX_SCALE, MAX_PRECISION - MAX_SCALE)
+
+
+def set_limits(max_precision: int = 28, max_scale: int = 12) -> None:
     '''
-    A function to convert to Decimal, 
-    different from the default Decimal(),'NaN' and 'Infinity' are not allowed
+    Changes the precision and scale limits used by convert_decimal by default
+    '''
+    global MAX_PRECISION, MAX_SCALE, _plain_length
+    MAX_PRECISION, MAX_SCALE = max_precision, max_scale
+    _plain_length = min(max_scale, max_precision - max_scale)
+    _cache.clear()
+
+
+def _check(amount, max_precision: int, max_scale: int) -> Union[Decimal, str]:
+    '''
+    Parses an amount with Decimal's parser and checks it against the limits,
+    returning the Decimal or the error message, so invalid amounts cost no extra raise
     '''
     try:
-        amount = Decimal(amount)
-        # check for 'NaN' and 'Infinity' 
-        if not amount.is_finite():
-            raise ValueError("Invalid input, please input numbers only!")
-        return amount
-    except:
-        raise ValueError("Invalid input, please input numbers only!")
\ No newline at end of file
+        value = Decimal(amount)
+    except (InvalidOperation, TypeError, ValueError):
+        return INVALID_INPUT
+    # check for 'NaN' and 'Infinity'
+    if not value.is_finite():
+        return INVALID_INPUT
+    if value.adjusted() >= max_precision - max_scale:
+        return "Too many digits!"
+    # A string without an exponent has at most as many decimal places as characters after its
+    # point; only count them exactly (as_tuple is comparatively slow) when that bound is too high
+    if type(amount) is str and 'e' not in amount and 'E' not in amount:
+        point = amount.find('.')
+        if point < 0 or len(amount) - point - 1 <= max_scale:
+            return value
+    if -value.as_tuple().exponent > max_scale:
+        return "Too many decimal places!"
+    return value
+
+
+def convert_decimal(amount: str, max_precision: Optional[int] = None, max_scale: Optional[int] = None):
+    '''
+    A function to convert to Decimal,
+    different from the default Decimal(),'NaN' and 'Infinity' are not allowed
+
+    Amounts with more than max_scale decimal places, or more than max_precision - max_scale
+    integer digits, are rejected. Both default to the module limits (see set_limits).
+    Strings converted with the default limits are cached, so repeated amounts, valid or not,
+    skip parsing altogether; an amount seen for the first time costs more than Decimal(),
+    because of the limit checks.
+    '''
+    if type(amount) is str and max_precision is None and max_scale is None:
+        result = _cache.get(amount)
+        if result is None:
+            if len(amount) > MAX_INPUT_LENGTH:
+                raise ValueError(INVALID_INPUT)
+            if len(amount) <= _plain_length and 'e' not in amount and 'E' not in amount:
+                try:
+                    result = Decimal(amount)
+                except InvalidOperation:
+                    result = INVALID_INPUT
+                else:
+                    # check for 'NaN' and 'Infinity'
+                    if not result.is_finite():
+                        result = INVALID_INPUT
+            else:
+                result = _check(amount, MAX_PRECISION, MAX_SCALE)
+            if len(_cache) >= CACHE_SIZE:
+                _cache.clear()
+            _cache[amount] = result
+    else:
+        result = _check(
+            amount,
+            MAX_PRECISION if max_precision is None else max_precision,
+            MAX_SCALE if max_scale is None else max_scale
+        )
+    if type(result) is str:
+        raise ValueError(result)
+    return result
+
+
+def to_scaled(amount: Decimal, scale: int) -> int:
+    '''
+    Converts an amount to an integer number of 10**-scale units, e.g. cents for scale 2.
+    Raises ValueError if the amount has more than scale decimal places, or does not fit in 64 bits
+    '''
+    scaled = Decimal(amount).scaleb(scale)
+    if scaled != scaled.to_integral_value():
+        raise ValueError(f"Balance {amount} has more than {scale} decimal places!")
+    scaled = int(scaled)
+    if not -MAX_SCALED <= scaled <= MAX_SCALED:
+        raise ValueError(f"Balance {amount} exceeds {from_scaled(MAX_SCALED, scale)}!")
+    return scaled
+
+
+def from_scaled(scaled: int, scale: int) -> Decimal:
+    '''
+    Converts an integer number of 10**-scale units back to an amount
+    '''
+    return Decimal(scaled).scaleb(-scale)
@@ -0,0 +1,114 @@
+import argparse
+import json
+import random
+import sys
+from bisect import bisect
+from itertools import accumulate
+from typing import Dict, Iterator, Optional
+
+# Default share of each operation within a session
+MIX = {'deposit': 0.4, 'withdraw': 0.3, 'transfer': 0.3}
+
+
+class Zipf:
+    """Draws ranks 1..n, rank k with probability proportional to 1 / k**skew.
+
+    With skew around 1, a few accounts get most of the traffic and most accounts almost none,
+    as in production; skew 0 draws uniformly.
+    """
+    def __init__(self, n: int, skew: float = 1.0, rng: Optional[random.Random] = None):
+        self._cumulative = list(accumulate(1 / rank ** skew for rank in range(1, n + 1)))
+        self._rng = rng or random.Random()
+
+    def __call__(self) -> int:
+        cumulative = self._cumulative
+        return bisect(cumulative, self._rng.random() * cumulative[-1]) + 1
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """Parses an operation mix like 'deposit=4,withdraw=3,transfer=3'; weights need not add up to 1."""
+    mix = {}
+    for part in text.split(','):
+        op, _, weight = part.partition('=')
+        op = op.strip()
+        if op not in MIX:
+            raise ValueError(f"Unknown operation {op!r}, expected one of {', '.join(MIX)}.")
+        mix[op] = float(weight)
+    return mix
+
+
+def generate(accounts: int, sessions: int, ops_per_session: int = 5, mix: Optional[Dict[str, float]] = None,
+             skew: float = 1.0, create_ratio: float = 0.01, seed: int = 0) -> Iterator[dict]:
+    """Generates a skewed workload of sessions for driver.run_script, or server.py's protocol.
+
+    Each session logs in to an account drawn from a Zipf distribution, or with probability
+    create_ratio creates a new one, then runs between 1 and 2 * ops_per_session - 1
+    operations drawn from the mix. Transfer recipients follow the same distribution. Popularity
+    ranks are mapped to shuffled IDs, so hot accounts are spread over the ID range. Amounts are
+    log-normal with a median of 20.09 and two decimal places, so some withdrawals bounce.
+
+    Args:
+        accounts (int): Accounts the bank already has, with IDs 1 to accounts.
+        sessions (int): Number of sessions.
+        ops_per_session (int, optional): Mean operations per session. Defaults to 5.
+        mix (Optional[Dict[str, float]], optional): Weight of 'deposit', 'withdraw' and
+            'transfer'. Defaults to MIX.
+        skew (float, optional): Zipf exponent of account popularity. Defaults to 1.0.
+        create_ratio (float, optional): Share of sessions that create an account. Defaults to 0.01.
+        seed (int, optional): Random seed; the same arguments give the same workload. Defaults to 0.
+
+    Yields:
+        dict: Actions, e.g. {'op': 'login', 'id': 42} or {'op': 'transfer', 'to': 7, 'amount': '12.50'}.
+
+    Raises:
+        ValueError: If sessions need existing accounts and there are none.
+    """
+    if accounts < 1 and create_ratio < 1:
+        raise ValueError("Sessions that log in need at least one account!")
+    rng = random.Random(seed)
+    mix = mix or MIX
+    ops, weights = list(mix), list(accumulate(mix.values()))
+    ids = list(range(1, accounts + 1))
+    rng.shuffle(ids)
+    popular = Zipf(accounts, skew, rng) if accounts else None
+
+    def amount() -> str:
+        return f"{rng.lognormvariate(3.0, 1.0):.2f}"
+
+    for session in range(sessions):
+        if popular is None or rng.random() < create_ratio:
+            user = None
+            yield {'op': 'create', 'name': f"Customer {session}", 'balance': amount()}
+        else:
+            user = ids[popular() - 1]
+            yield {'op': 'login', 'id': user}
+        for _ in range(rng.randint(1, 2 * ops_per_session - 1)):
+            op = rng.choices(ops, cum_weights=weights)[0]
+            if op == 'transfer':
+                if popular is None or accounts < 2:
+                    continue
+                recipient = ids[popular() - 1]
+                while recipient == user:
+                    recipient = ids[popular() - 1]
+                yield {'op': 'transfer', 'to': recipient, 'amount': amount()}
+            else:
+                yield {'op': op, 'amount': amount()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a skewed workload as JSON lines, for driver.py.")
+    parser.add_argument('--accounts', type=int, required=True, help="accounts the bank already has (IDs 1 to N)")
+    parser.add_argument('--sessions', type=int, default=10000)
+    parser.add_argument('--ops-per-session', type=int, default=5)
+    parser.add_argument('--mix', type=parse_mix, default=MIX, help="operation weights (default: deposit=0.4,withdraw=0.3,transfer=0.3)")
+    parser.add_argument('--skew', type=float, default=1.0, help="Zipf exponent of account popularity, 0 for uniform")
+    parser.add_argument('--create-ratio', type=float, default=0.01, help="share of sessions creating an account")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="file to write (default: stdout)")
+    args = parser.parse_args()
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    for action in generate(args.accounts, args.sessions, args.ops_per_session, args.mix, args.skew,
+                           args.create_ratio, args.seed):
+        out.write(json.dumps(action) + '\n')
+    if args.output:
+        out.close()
@@ -204,4 +204,49 @@ def test_transfer_infinity(bank_system, account):
     assert not success # unsuccessful flag
     assert account.balance == Decimal('100') # sender balance unchanged
     assert recipient.balance == Decimal('50') # recipient balance unchanged
-    assert message == "Invalid input, please input numbers only!" # Not successful message
\ No newline at end of file
+    assert message == "Invalid input, please input numbers only!" # Not successful message
+
+# An account built from trusted data behaves like a validated one
+def test_from_trusted():
+    account = Account.from_trusted(1, "Alice", Decimal('100'))
+    assert account == Account(id=1, name="Alice", balance=Decimal('100'))
+    success, _ = account.deposit("50")
+    assert success
+    assert account.balance == Decimal('150')
+
+# Pay several recipients at once; a recipient may be paid twice
+def test_transfer_many_valid(bank_system, account):
+    bob = Account(id=2, name="Bob", balance=Decimal('50'))
+    carol = Account(id=3, name="Carol", balance=Decimal('0'))
+    bank_system.accounts = {1: account, 2: bob, 3: carol}
+    success, messages = account.transfer_many([(2, "10"), (3, "20.50"), (2, "5")], bank_system)
+    assert success
+    assert messages == ["Transferred 10 to account 2.", "Transferred 20.50 to account 3.", "Transferred 5 to account 2."]
+    assert account.balance == Decimal('64.50') # 100 - 35.50
+    assert bob.balance == Decimal('65')
+    assert carol.balance == Decimal('20.50')
+
+# One invalid payment cancels all of them, and only its message names the problem
+def test_transfer_many_invalid_payment(bank_system, account):
+    bob = Account(id=2, name="Bob", balance=Decimal('50'))
+    bank_system.accounts = {1: account, 2: bob}
+    success, messages = account.transfer_many([(2, "10"), (999, "10"), (2, "-1"), (1, "5")], bank_system)
+    assert not success
+    assert messages == [
+        "Not transferred, another payment failed.",
+        "Recipient with ID 999 does not exist.",
+        "Transfer amount must be positive!",
+        "Cannot transfer to the same account!",
+    ]
+    assert account.balance == Decimal('100')
+    assert bob.balance == Decimal('50')
+
+# The balance must cover the total, not just each payment
+def test_transfer_many_insufficient_total(bank_system, account):
+    bob = Account(id=2, name="Bob", balance=Decimal('50'))
+    bank_system.accounts = {1: account, 2: bob}
+    success, messages = account.transfer_many([(2, "60"), (2, "60")], bank_system)
+    assert not success
+    assert messages == ["Insufficient balance for the total of 120!"] * 2
+    assert account.balance == Decimal('100')
+    assert bob.balance == Decimal('50')
@@ -0,0 +1,78 @@
+import pytest
+from decimal import Decimal, ROUND_HALF_UP
+from accrual import Schedule, accrue
+from banking_system import BankingSystem
+
+SCHEDULE = Schedule(
+    rate=Decimal('0.0125'), fee=Decimal('2'), fee_waived_from=Decimal('1000'),
+    tiers=((Decimal('10000'), Decimal('0.02')),),
+)
+
+# Tiered interest, waived and capped fees, applied in chunks and saved once
+@pytest.mark.parametrize("workers,columnar", [(0, False), (2, False), (0, True)])
+def test_accrue(tmp_path, monkeypatch, workers, columnar):
+    csv_path = str(tmp_path / "accounts.csv")
+    bank = BankingSystem(csv_path=csv_path, ledger=not columnar, columnar=columnar)
+    bank.create_accounts([("Alice", "100"), ("Bob", "0.50"), ("Carol", "20000"), ("Dave", "0"), ("Erin", "999")])
+    saves = []
+    save_state = bank.save_state
+    monkeypatch.setattr(bank, 'save_state', lambda: saves.append(1) or save_state())
+
+    report = accrue(bank, SCHEDULE, workers=workers, chunk_size=2)
+    assert (report['accounts'], report['changed'], report['capped']) == (5, 4, 1)
+    # 1.25 + 0.00625 (rounded to 0.01) + 400 + 12.4875 (rounded to 12.49)
+    assert report['interest'] == Decimal('413.75')
+    assert report['fees'] == Decimal('2.51')
+    assert len(saves) == 1
+    assert bank.verify(full=True)[0]
+    balances = {1: Decimal('99.25'), 2: Decimal('0'), 3: Decimal('20400'), 4: Decimal('0'), 5: Decimal('1011.49')}
+    assert {a.id: a.balance for a in bank.accounts.values()} == balances
+    assert {a.id: a.balance for a in BankingSystem(csv_path=csv_path, columnar=columnar).accounts.values()} == balances
+    if not columnar:
+        assert [(e.kind, e.amount, e.balance) for e in bank.ledger.history(1)] == [
+            ('fee', Decimal('2'), Decimal('99.25')),
+            ('interest', Decimal('1.25'), Decimal('101.25')),
+        ]
+
+# Interest is rounded once, with the schedule's rounding mode
+def test_accrue_rounding(tmp_path):
+    bank = BankingSystem(csv_path=str(tmp_path / "accounts.csv"))
+    bank.create_accounts([("Alice", "2.5"), ("Bob", "3.5")])
+    accrue(bank, Schedule(rate=Decimal('0.01'), scale=1))
+    assert [a.balance for a in bank.accounts.values()] == [Decimal('2.5'), Decimal('3.5')] # 0.025 and 0.035 round to 0.0
+    accrue(bank, Schedule(rate=Decimal('0.1'), scale=1)) # 0.25 and 0.35 round half to even
+    assert [a.balance for a in bank.accounts.values()] == [Decimal('2.7'), Decimal('3.9')]
+    accrue(bank, Schedule(rate=Decimal('0.5'), scale=0, rounding=ROUND_HALF_UP)) # 1.35 and 1.95 round half up
+    assert [a.balance for a in bank.accounts.values()] == [Decimal('3.7'), Decimal('5.9')]
+
+# A balance changed while its chunk is with a worker is charged on its new value
+@pytest.mark.parametrize("columnar", [False, True])
+def test_accrue_recomputes_changed_balance(tmp_path, columnar):
+    bank = BankingSystem(csv_path=str(tmp_path / "accounts.csv"), columnar=columnar)
+    bank.create_accounts([(f"Customer {i}", "100") for i in range(5)])
+
+    def deposit_after_first_chunk(done, seconds):
+        if done == 1:
+            bank.get_account(3).deposit("100", bank)
+    report = accrue(bank, Schedule(rate=Decimal('0.1')), workers=2, chunk_size=1, progress=deposit_after_first_chunk)
+    assert report['recomputed'] == 1
+    assert bank.get_account(3).balance == Decimal('220')
+    assert bank.get_account(4).balance == Decimal('110')
+    assert bank.verify(full=True)[0]
+
+# Invalid schedules are rejected before any balance changes
+@pytest.mark.parametrize("schedule,message", [
+    (Schedule(rate=Decimal('-0.01')), "Interest rates must be non-negative numbers!"),
+    (Schedule(fee=Decimal('NaN')), "The fee must be a non-negative number!"),
+    (Schedule(fee=Decimal('0.001')), "The fee cannot have more than 2 decimal places!"),
+    (Schedule(tiers=((Decimal('100'), Decimal('0.02')), (Decimal('10'), Decimal('0.01')))),
+     "Tiers must be in ascending order of minimum balance!"),
+    (Schedule(rounding='ROUND_NEAREST'), "Unknown rounding mode 'ROUND_NEAREST'!"),
+    (Schedule(rate=Decimal('0.01'), scale=4), "The store keeps 2 decimal places, the schedule needs 4!"),
+])
+def test_accrue_invalid_schedule(tmp_path, schedule, message):
+    bank = BankingSystem(csv_path=str(tmp_path / "accounts.csv"), columnar=True)
+    bank.create_account("Alice", "100")
+    with pytest.raises(ValueError, match=message):
+        accrue(bank, schedule)
+    assert bank.get_account(1).balance == Decimal('100')
@@ -1,5 +1,9 @@
 import pytest
 import csv
+import json
+import os
+import threading
+from types import SimpleNamespace
 from banking_system import BankingSystem
 from account import Account
 from decimal import Decimal
@@ -105,3 +109,460 @@ def test_load_empty_file(tmp_path):
     new_bank.accounts = {}
     new_bank.load_state()
     assert len(new_bank.accounts) == 0
+
+# Journaled commits append to the journal and leave the CSV snapshot untouched
+def test_journal_commit(tmp_path):
+    csv_path = str(tmp_path / "accounts.csv")
+    bank = BankingSystem(csv_path=csv_path, journal=True)
+    account, _ = bank.create_account("Alice", "100")
+    account.deposit("50")
+    bank.commit(account)
+    with open(csv_path) as f:
+        assert f.read().strip() == "id,name,balance" # snapshot not rewritten
+    assert bank.journal.entries == 2
+
+    # The journal is replayed on top of the snapshot when loading
+    new_bank = BankingSystem(csv_path=csv_path, journal=True)
+    assert new_bank.accounts[1].balance == Decimal('150')
+
+# The journal is folded back into the snapshot once it reaches compact_threshold
+def test_journal_compaction(tmp_path):
+    csv_path = str(tmp_path / "accounts.csv")
+    bank = BankingSystem(csv_path=csv_path, journal=True, compact_threshold=3)
+    bank.create_account("Alice", "100")
+    bank.create_account("Bob", "50")
+    assert bank.journal.entries == 2
+    bank.create_account("Carol", "10")
+    assert bank.journal.entries == 0
+
+    # The compacted snapshot is readable without the journal
+    new_bank = BankingSystem(csv_path=csv_path)
+    assert len(new_bank.accounts) == 3
+    assert new_bank.accounts[3].name == "Carol"
+
+# The ID high-water mark is persisted and survives a restart
+def test_next_id_persisted(tmp_path):
+    csv_path = str(tmp_path / "accounts.csv")
+    bank = BankingSystem(csv_path=csv_path)
+    bank.create_account("Alice", "100")
+    bank.reserve_ids(5) # IDs 2-6 are reserved but never used
+    bank.save_state()
+
+    new_bank = BankingSystem(csv_path=csv_path)
+    account, _ = new_bank.create_account("Bob", "50")
+    assert account.id == 7
+
+# Bulk creation reserves one contiguous range and skips invalid rows
+def test_create_accounts(tmp_path):
+    bank = BankingSystem(csv_path=str(tmp_path / "accounts.csv"))
+    bank.create_account("Alice", "100")
+    results = bank.create_accounts([("Bob", "50"), ("Carol", "-1"), ("Dave", "abc"), ("Eve", "0")])
+    assert [account.id if account else None for account, _ in results] == [2, None, None, 3]
+    assert results[1][1] == "Initial balance cannot be negative!"
+    assert results[2][1] == "Invalid input, please input numbers only!"
+    assert bank.next_id == 4
+    assert len(BankingSystem(csv_path=str(tmp_path / "accounts.csv")).accounts) == 3
+
+# Concurrent reservations never hand out the same ID twice
+def test_reserve_ids_concurrent(tmp_path):
+    bank = BankingSystem(csv_path=str(tmp_path / "accounts.csv"))
+    reserved = []
+    def worker():
+        for _ in range(1000):
+            reserved.append(bank.reserve_ids(1))
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(reserved) == list(range(1, 4001))
+
+# A batch applies every valid operation in order and reports failures per operation
+def test_apply_batch(tmp_path):
+    csv_path = str(tmp_path / "accounts.csv")
+    bank = BankingSystem(csv_path=csv_path)
+    bank.create_accounts([("Alice", "100"), ("Bob", "50")])
+    results = bank.apply_batch([
+        ('deposit', 1, '50'),
+        ('withdraw', 2, '80'),
+        ('transfer', 1, '30', 2),
+        ('transfer', 1, '30', 1),
+        ('deposit', 999, '10'),
+        ('refund', 1, '10'),
+    ])
+    assert results == [
+        None,
+        "Insufficient balance!",
+        None,
+        "Cannot transfer to the same account!",
+        "Account 999 does not exist.",
+        "Unknown operation 'refund'!",
+    ]
+    # Persisted once at the end of the batch
+    new_bank = BankingSystem(csv_path=csv_path)
+    assert new_bank.accounts[1].balance == Decimal('120')
+    assert new_bank.accounts[2].balance == Decimal('80')
+
+# An atomic batch rolls back every balance change if any operation fails
+def test_apply_batch_atomic_rollback(tmp_path):
+    csv_path = str(tmp_path / "accounts.csv")
+    bank = BankingSystem(csv_path=csv_path)
+    bank.create_accounts([("Alice", "100"), ("Bob", "50")])
+    results = bank.apply_batch([
+        ('deposit', 1, '50'),
+        ('transfer', 1, '100', 2),
+        ('withdraw', 2, 'abc'),
+        ('deposit', 2, '10'),
+    ], atomic=True)
+    assert results == ["Batch rolled back!", "Batch rolled back!", "Invalid input, please input numbers only!", "Batch rolled back!"]
+    assert bank.accounts[1].balance == Decimal('100')
+    assert bank.accounts[2].balance == Decimal('50')
+
+# A deposit made by another thread during an atomic batch survives its rollback
+def test_apply_batch_atomic_keeps_concurrent_changes(tmp_path, monkeypatch):
+    bank = BankingSystem(csv_path=str(tmp_path / "accounts.csv"))
+    bank.create_accounts([("Alice", "100"), ("Bob", "50")])
+    threads = []
+    record = bank.record
+
+    def record_and_deposit(*args):
+        record(*args)
+        if not threads:
+            thread = threading.Thread(target=bank.get_account(1).deposit, args=("1000", bank))
+            threads.append(thread)
+            thread.start()
+            thread.join(0.1) # waits for the batch's locks
+    monkeypatch.setattr(bank, 'record', record_and_deposit)
+    bank.apply_batch([('deposit', 1, '50'), ('withdraw', 2, 'abc')], atomic=True)
+    threads[0].join()
+    assert bank.get_account(1).balance == Decimal('1100')
+    assert bank.verify(full=True)[0]
+
+# Operations with missing or extra fields are reported instead of raising
+def test_apply_batch_malformed_ops(tmp_path):
+    bank = BankingSystem(csv_path=str(tmp_path / "accounts.csv"))
+    bank.create_accounts([("Alice", "100"), ("Bob", "50")])
+    results = bank.apply_batch([('deposit', 1), ('transfer', 1, '5'), (), ('withdraw', 1, '5', 2), ('deposit', 1, '5')])
+    assert results == [
+        "Malformed 'deposit' operation, expected 3 fields!",
+        "Malformed 'transfer' operation, expected 4 fields!",
+        "Unknown operation 'None'!",
+        "Malformed 'withdraw' operation, expected 3 fields!",
+        None,
+    ]
+    assert bank.apply_batch([('transfer', 1, '5'), ('deposit', 2, '5')], atomic=True) == [
+        "Malformed 'transfer' operation, expected 4 fields!", "Batch rolled back!"]
+    assert bank.get_account(2).balance == Decimal('50')
+
+# A trusted load of a snapshot written by save_state gives the same accounts
+def test_trusted_load(tmp_path):
+    csv_path = str(tmp_path / "accounts.csv")
+    bank = BankingSystem(csv_path=csv_path)
+    bank.create_accounts([("Alice", "100.50"), ("Smith, Bob", "0")])
+
+    new_bank = BankingSystem(csv_path=csv_path, trusted=True)
+    assert new_bank.accounts == bank.accounts
+
+# A snapshot that was changed after save_state falls back to the validating path
+def test_trusted_load_checksum_mismatch(tmp_path):
+    csv_path = str(tmp_path / "accounts.csv")
+    bank = BankingSystem(csv_path=csv_path)
+    bank.create_account("Alice", "100")
+    with open(csv_path, 'a') as f:
+        f.write("2,Mallory,-100\n") # invalid row, rejected by Account validation
+
+    with pytest.raises(ValueError):
+        BankingSystem(csv_path=csv_path, trusted=True)
+
+# Concurrent transfers in both directions neither deadlock nor create or lose money
+def test_concurrent_transfers_conserve_total(tmp_path):
+    bank = BankingSystem(csv_path=str(tmp_path / "accounts.csv"))
+    bank.create_accounts([(f"Customer {i}", "100") for i in range(10)])
+
+    def worker(seed):
+        for i in range(2000):
+            sender = (seed + i) % 10 + 1
+            recipient = (seed * 3 + i * 7) % 10 + 1
+            if sender != recipient:
+                bank.get_account(sender).transfer("1.5", recipient, bank)
+            if i % 500 == 0:
+                bank.save_state() # persisting while transfers are in flight
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=60)
+        assert not thread.is_alive()
+
+    assert sum(account.balance for account in bank.accounts.values()) == Decimal('1000')
+    assert all(account.balance >= 0 for account in bank.accounts.values())
+    # Every saved snapshot is a consistent cut, so the saved total is conserved too
+    saved = BankingSystem(csv_path=str(tmp_path / "accounts.csv"))
+    assert sum(account.balance for account in saved.accounts.values()) == Decimal('1000')
+
+# Incremental commits write only the changed accounts to the delta file, merged on load
+def test_incremental_delta(tmp_path):
+    csv_path = str(tmp_path / "accounts.csv")
+    bank = BankingSystem(csv_path=csv_path, incremental=True, dirty_ratio=0.5)
+    bank.create_accounts((f"User {i}", "100") for i in range(10))
+    with open(csv_path, 'rb') as f:
+        snapshot = f.read()
+
+    account = bank.get_account(3)
+    account.deposit("50")
+    bank.commit(account)
+    with open(f"{csv_path}.delta", newline='') as f:
+        assert list(csv.reader(f))[1:] == [['3', 'User 2', '150']]
+    with open(csv_path, 'rb') as f:
+        assert f.read() == snapshot # the CSV file was not rewritten
+
+    for trusted in (False, True):
+        new_bank = BankingSystem(csv_path=csv_path, trusted=trusted, incremental=True)
+        assert new_bank.accounts == bank.accounts
+    # Accounts loaded from the delta stay dirty, so the next delta keeps them
+    other = new_bank.get_account(5)
+    other.withdraw("10")
+    new_bank.commit(other)
+    assert BankingSystem(csv_path=csv_path).accounts == new_bank.accounts
+
+# Once more than dirty_ratio of the accounts are dirty, the CSV file is rewritten and the delta dropped
+def test_incremental_fallback_to_full_rewrite(tmp_path):
+    csv_path = str(tmp_path / "accounts.csv")
+    bank = BankingSystem(csv_path=csv_path, incremental=True, dirty_ratio=0.2)
+    bank.create_accounts((f"User {i}", "100") for i in range(10))
+    for account_id in (1, 2):
+        bank.get_account(account_id).deposit("1")
+        bank.commit(bank.get_account(account_id))
+    assert os.path.exists(f"{csv_path}.delta")
+
+    bank.get_account(3).deposit("1")
+    bank.commit(bank.get_account(3))
+    assert not os.path.exists(f"{csv_path}.delta")
+    assert BankingSystem(csv_path=csv_path).accounts == bank.accounts
+
+# A delta written against an older snapshot is ignored
+def test_incremental_stale_delta_ignored(tmp_path):
+    csv_path = str(tmp_path / "accounts.csv")
+    bank = BankingSystem(csv_path=csv_path, incremental=True)
+    bank.create_accounts((f"User {i}", "100") for i in range(20))
+    bank.get_account(1).deposit("1")
+    bank.commit(bank.get_account(1))
+    with open(f"{csv_path}.delta", 'rb') as f:
+        stale = f.read()
+    bank.get_account(1).deposit("1")
+    bank.save_state()
+    # A crash between writing the snapshot and removing the delta leaves the old delta behind
+    with open(f"{csv_path}.delta", 'wb') as f:
+        f.write(stale)
+    assert BankingSystem(csv_path=csv_path).accounts[1].balance == Decimal('102')
+
+# Name lookups see loaded accounts and accounts created after the index was built
+@pytest.mark.parametrize("options", [{}, {'columnar': True}, {'csv_path': 'accounts.bin'}])
+def test_find_by_name(tmp_path, options):
+    csv_path = str(tmp_path / options.pop('csv_path', 'accounts.csv'))
+    BankingSystem(csv_path=csv_path, **options).create_accounts([("Alice", "1"), ("Bob", "2"), ("alice", "3")])
+    bank = BankingSystem(csv_path=csv_path, **options)
+    assert bank.find_by_name("ALICE") == [1, 3]
+    bank.create_account("Alicia", "4")
+    bank.create_accounts([("Bobby", "5")])
+    assert bank.find_by_name("ali", prefix=True) == [1, 3, 4]
+    assert bank.find_by_name("bo", prefix=True) == [2, 5]
+    assert bank.find_by_name("bo", prefix=True, limit=1) == [2]
+    # Replacing the accounts drops the index
+    bank.accounts = {}
+    assert bank.find_by_name("alice") == []
+
+# Deposits, withdrawals, transfers and atomic rollbacks are recorded in the bank's ledger
+def test_ledger_records_operations(tmp_path):
+    csv_path = str(tmp_path / "accounts.csv")
+    bank = BankingSystem(csv_path=csv_path, ledger=True)
+    bank.create_accounts([("Alice", "100"), ("Bob", "50")])
+    alice = bank.get_account(1)
+    alice.deposit("25", bank)
+    alice.withdraw("abc", bank) # failed operations are not recorded
+    alice.transfer("30", 2, bank)
+    bank.apply_batch([('withdraw', 2, '10'), ('deposit', 1, '-1')], atomic=True)
+    bank.commit(alice, bank.get_account(2))
+
+    assert [(e.kind, e.amount, e.balance, e.counterparty) for e in bank.ledger.history(1)] == [
+        ('transfer_out', Decimal('30'), Decimal('95'), 2),
+        ('deposit', Decimal('25'), Decimal('125'), None),
+    ]
+    assert [(e.kind, e.amount, e.balance) for e in bank.ledger.history(2)] == [
+        ('rollback', Decimal('10'), Decimal('80')),
+        ('withdraw', Decimal('10'), Decimal('70')),
+        ('transfer_in', Decimal('30'), Decimal('80')),
+    ]
+    # Committed entries are on disk for the next session
+    assert len(BankingSystem(csv_path=csv_path, ledger=True).ledger) == 5
+
+# Totals follow deposits, withdrawals, transfers, rollbacks and new accounts
+def test_totals_follow_operations(tmp_path):
+    bank = BankingSystem(csv_path=str(tmp_path / "accounts.csv"))
+    bank.create_accounts([("Alice", "100"), ("Bob", "0")])
+    assert bank.totals.as_dict() == {'total': '100', 'count': 2, 'zero': 1}
+    alice, bob = bank.get_account(1), bank.get_account(2)
+    alice.deposit("50", bank)
+    alice.transfer("30", 2, bank)
+    bob.withdraw("30", bank)
+    bank.apply_batch([('withdraw', 1, '120'), ('deposit', 2, 'abc')], atomic=True)
+    bank.create_account("Carol", "5")
+    assert bank.totals.as_dict() == {'total': '125', 'count': 3, 'zero': 1}
+    assert bank.verify(full=True) == (True, "Totals are consistent: 3 accounts holding 125, 1 of them empty.")
+
+# verify reports balances changed behind the bank's back, and accounts it was not told about
+def test_verify_reports_drift(tmp_path):
+    bank = BankingSystem(csv_path=str(tmp_path / "accounts.csv"))
+    bank.create_accounts([("Alice", "100")])
+    bank.totals
+    bank.get_account(1).balance = Decimal('90')
+    assert bank.verify()[0]
+    assert bank.verify(full=True) == (False, "Totals drifted from the accounts: total 100 != 90.")
+    bank.accounts[2] = Account(id=2, name="Bob", balance=Decimal('0'))
+    success, message = bank.verify()
+    assert not success
+    assert "Account count drifted: tracked 1, stored 2." in message
+
+# Account methods called without the bank make it rebuild its totals instead of reporting drift
+def test_totals_after_direct_calls(tmp_path):
+    bank = BankingSystem(csv_path=str(tmp_path / "accounts.csv"))
+    bank.create_accounts([("Alice", "100"), ("Bob", "0")])
+    assert bank.totals.total == Decimal('100')
+    alice = bank.get_account(1)
+    alice.deposit("5")
+    alice.withdraw("10")
+    # Anything with get_account can route a transfer, without recording it
+    assert alice.transfer("20", 2, SimpleNamespace(get_account=bank.accounts.get))[0]
+    assert bank.totals.as_dict() == {'total': '95', 'count': 2, 'zero': 0}
+    assert bank.verify(full=True) == (True, "Totals are consistent: 2 accounts holding 95, 0 of them empty.")
+    # Changes recorded by the bank keep the rebuilt totals up to date
+    alice.deposit("5", bank)
+    assert bank.totals.total == Decimal('100') and bank.verify(full=True)[0]
+
+# A snapshot edited after save_state is reported by verify after loading
+def test_load_drift(tmp_path):
+    csv_path = str(tmp_path / "accounts.csv")
+    BankingSystem(csv_path=csv_path).create_accounts([("Alice", "100"), ("Bob", "5")])
+    assert BankingSystem(csv_path=csv_path).verify()[0]
+    with open(csv_path, 'a') as f:
+        f.write("3,Carol,0\n")
+    success, message = BankingSystem(csv_path=csv_path).verify()
+    assert not success
+    assert message == "Snapshot totals drifted since the last save: count 2 != 3, zero 0 != 1."
+
+# Operations and persistence calls are only timed while stats are enabled
+def test_stats_toggle(tmp_path):
+    csv_path = str(tmp_path / "accounts.csv")
+    bank = BankingSystem(csv_path=csv_path, journal=True, ledger=True)
+    bank.create_accounts([("Alice", "100"), ("Bob", "50")])
+    alice = bank.get_account(1)
+    alice.deposit("10", bank)
+    assert bank.stats() == {}
+
+    bank.metrics.enabled = True
+    alice.deposit("10", bank)
+    alice.withdraw("5", bank)
+    alice.transfer("5", 2, bank)
+    alice.deposit("1") # without the bank there are no stats to record into
+    bank.commit(alice)
+    bank.save_state()
+    stats = bank.stats(reset=True)
+    assert {name: series['count'] for name, series in stats.items()} == {
+        'deposit': 1, 'withdraw': 1, 'transfer': 1, 'persist': 1,
+        'journal_append': 1, 'ledger_flush': 1, 'save_state': 1,
+    }
+    assert stats['save_state']['bytes'] == os.path.getsize(csv_path)
+    assert stats['journal_append']['bytes'] > 0
+    assert bank.stats() == {}
+
+    bank.metrics.enabled = False
+    alice.deposit("10", bank)
+    assert bank.stats() == {}
+
+# Stats enabled from the start include load_state, and are dumped on close
+def test_stats_on_load_and_dump(tmp_path):
+    stats_path = tmp_path / "stats.json"
+    bank = BankingSystem(csv_path=str(tmp_path / "accounts.csv"), incremental=True, stats=True,
+                         stats_path=str(stats_path))
+    bank.create_accounts([(f"Customer {i}", "10") for i in range(20)])
+    bank.get_account(1).deposit("5", bank)
+    bank.commit(bank.get_account(1))
+    bank.close()
+    dumped = json.loads(stats_path.read_text())['stats']
+    assert dumped['load_state']['count'] == 1
+    assert dumped['save_changes']['bytes'] > 0
+
+# A lazy bank parses only the accounts it touches, and incremental commits keep it that way
+def test_lazy_load(tmp_path):
+    csv_path = str(tmp_path / "accounts.csv")
+    BankingSystem(csv_path=csv_path).create_accounts([(f"Customer {i}", "10") for i in range(100)])
+    bank = BankingSystem(csv_path=csv_path, lazy=True, incremental=True)
+    assert bank.accounts.loaded == 0 and bank.next_id == 101
+    account = bank.get_account(42)
+    account.deposit("5", bank)
+    bank.commit(account)
+    created, _ = bank.create_account("Late", "1")
+    assert created.id == 101
+    assert bank.accounts.loaded == 2
+
+    reopened = BankingSystem(csv_path=csv_path, lazy=True, incremental=True)
+    assert reopened.get_account(42).balance == Decimal('15')
+    assert reopened.get_account(101).name == "Late"
+    # Full scans and rewrites load everything
+    assert reopened.totals.count == 101
+    reopened.save_state()
+    assert BankingSystem(csv_path=csv_path).totals.total == Decimal('1006')
+
+# A lazy bank's full save copies the rows it never loaded, and keeps the checksum and totals
+def test_lazy_save_copies_rows(tmp_path):
+    csv_path = str(tmp_path / "accounts.csv")
+    BankingSystem(csv_path=csv_path).create_accounts([(f"Customer {i}", "10") for i in range(100)] + [("Smith, Bob\nJr.", "0")])
+    bank = BankingSystem(csv_path=csv_path, lazy=True)
+    account = bank.get_account(42)
+    account.deposit("5", bank)
+    bank.commit(account)
+    bank.get_account(101).deposit("2", bank)
+    del bank.accounts[7]
+    bank.create_account("Late", "1")
+    assert bank.accounts.loaded == 3 and not bank.accounts.complete
+    bank.close()
+
+    eager = BankingSystem(csv_path=csv_path, trusted=True)
+    assert eager.load_drift is None
+    assert eager._base_checksum is not None # loaded through the checksum
+    assert sorted(eager.accounts) == [i for i in range(1, 103) if i != 7]
+    assert eager.get_account(101).name == "Smith, Bob\nJr." and eager.get_account(101).balance == Decimal('2')
+    assert eager.totals.total == Decimal('998') and eager.totals.zero == 0 # 1000 + 5 + 2 + 1 - 10
+    assert eager.verify(full=True)[0]
+
+# Lazy loading needs a CSV dictionary store
+def test_lazy_needs_csv(tmp_path):
+    with pytest.raises(ValueError):
+        BankingSystem(csv_path=str(tmp_path / "accounts.csv"), lazy=True, columnar=True)
+
+# A fan-out transfer is persisted in one commit and recorded as one transfer per payment
+def test_transfer_many(tmp_path, monkeypatch):
+    csv_path = str(tmp_path / "accounts.csv")
+    bank = BankingSystem(csv_path=csv_path, ledger=True)
+    bank.create_accounts([("Alice", "100"), ("Bob", "0"), ("Carol", "0")])
+    persisted = []
+    commit = bank.commit
+    monkeypatch.setattr(bank, 'commit', lambda *accounts: persisted.append(accounts) or commit(*accounts))
+
+    success, _ = bank.transfer_many(1, [(2, "30"), (3, "20"), (2, "10")])
+    assert success
+    assert [sorted(a.id for a in accounts) for accounts in persisted] == [[1, 2, 3]]
+    assert [(e.kind, e.amount, e.balance, e.counterparty) for e in bank.ledger.history(1)] == [
+        ('transfer_out', Decimal('10'), Decimal('40'), 2),
+        ('transfer_out', Decimal('20'), Decimal('50'), 3),
+        ('transfer_out', Decimal('30'), Decimal('70'), 2),
+    ]
+    assert bank.verify(full=True)[0]
+    assert {a.id: a.balance for a in BankingSystem(csv_path=csv_path).accounts.values()} == {
+        1: Decimal('40'), 2: Decimal('40'), 3: Decimal('20')}
+
+    # Failures persist nothing
+    assert bank.transfer_many(1, [(2, "50")]) == (False, ["Insufficient balance for the total of 50!"])
+    assert bank.transfer_many(9, [(2, "1")]) == (False, ["Account 9 does not exist."])
+    assert len(persisted) == 1
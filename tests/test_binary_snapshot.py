@@ -0,0 +1,135 @@
+import pytest
+import csv
+from binary_snapshot import BinaryAccounts, write_binary, csv_to_binary, binary_to_csv
+from banking_system import BankingSystem
+from account import Account
+from decimal import Decimal
+
+@pytest.fixture
+def snapshot(tmp_path):
+    path = str(tmp_path / "accounts.bin")
+    write_binary(path, [(2, "Bob", Decimal('50.25')), (1, "Alice", Decimal('100')), (3, "Zoë", Decimal('0'))])
+    accounts = BinaryAccounts(path)
+    yield accounts
+    accounts.close()
+
+# Records are sorted by ID and looked up in the mapped file
+def test_lookup(snapshot):
+    assert list(snapshot) == [1, 2, 3]
+    assert len(snapshot) == 3
+    assert snapshot[2].name == "Bob"
+    assert snapshot[2].balance == Decimal('50.25')
+    assert snapshot[3].name == "Zoë" # names are UTF-8
+    assert snapshot.get(4) is None
+    assert "abc" not in snapshot
+    assert snapshot.last_id() == 3
+
+# Balance changes are written into the record in place
+def test_in_place_update(snapshot):
+    snapshot[1].deposit("0.50")
+    snapshot.flush()
+    reopened = BinaryAccounts(snapshot.path)
+    assert reopened[1].balance == Decimal('100.50')
+    reopened.close()
+
+# Added accounts are kept in memory until the snapshot is rewritten
+def test_added_accounts_and_rewrite(snapshot):
+    snapshot[4] = Account(id=4, name="Dave", balance=Decimal('10'))
+    added = snapshot[4]
+    assert snapshot.pending == 1
+    assert list(snapshot) == [1, 2, 3, 4]
+    snapshot.rewrite()
+    assert snapshot.pending == 0
+    # Views handed out before the rewrite keep writing to the new file
+    added.deposit("5")
+    assert list(BinaryAccounts(snapshot.path).rows())[-1] == (4, "Dave", Decimal('15.00'))
+
+# A failed rewrite leaves the mapped snapshot and the added accounts in place
+def test_rewrite_failure(snapshot, monkeypatch):
+    import binary_snapshot
+    snapshot[4] = Account(id=4, name="Dave", balance=Decimal('10'))
+
+    def failing(path, rows, scale=2, fsync=False):
+        with open(path, 'wb') as f:
+            f.write(b"partial")
+        raise OSError("disk full")
+    monkeypatch.setattr(binary_snapshot, 'write_binary', failing)
+    with pytest.raises(OSError, match="disk full"):
+        snapshot.rewrite()
+    assert snapshot[1].balance == Decimal('100') and snapshot.pending == 1
+    monkeypatch.undo()
+    snapshot.rewrite()
+    assert list(BinaryAccounts(snapshot.path).rows())[-1] == (4, "Dave", Decimal('10.00'))
+
+# swap_balances writes stored and added accounts holding the expected balance
+def test_swap_balances(snapshot):
+    snapshot[4] = Account(id=4, name="Dave", balance=Decimal('10'))
+    alice = snapshot[1]
+    stale = snapshot.swap_balances([
+        (1, Decimal('100'), Decimal('101')), (2, Decimal('1'), Decimal('2')), (4, Decimal('10'), Decimal('11')),
+    ])
+    assert stale == [(2, Decimal('50.25'))]
+    assert alice.balance == Decimal('101')
+    assert snapshot[4].balance == Decimal('11')
+    snapshot.flush()
+    reopened = BinaryAccounts(snapshot.path)
+    assert [balance for _, _, balance in reopened.rows()] == [Decimal('101'), Decimal('50.25'), Decimal('0')]
+    reopened.close()
+
+# Renaming or deleting a stored account is rejected
+def test_unsupported_changes(snapshot):
+    with pytest.raises(ValueError):
+        snapshot[1] = Account(id=1, name="Mallory", balance=Decimal('1'))
+    with pytest.raises(ValueError, match="Cannot delete an account stored in a binary snapshot!"):
+        del snapshot[1]
+
+# A file that is not a binary snapshot is rejected
+def test_not_a_snapshot(tmp_path):
+    path = tmp_path / "accounts.bin"
+    path.write_bytes(b"id,name,balance\n")
+    with pytest.raises(ValueError):
+        BinaryAccounts(str(path))
+
+# CSV and binary snapshots convert both ways without losing anything
+def test_round_trip(tmp_path):
+    csv_path = str(tmp_path / "accounts.csv")
+    with open(csv_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerows([['id', 'name', 'balance'], [1, "Smith, Alice", '100.5'], [2, "Bob", '0']])
+    assert csv_to_binary(csv_path, str(tmp_path / "accounts.bin")) == 2
+    assert binary_to_csv(str(tmp_path / "accounts.bin"), str(tmp_path / "copy.csv")) == 2
+    copy = BankingSystem(csv_path=str(tmp_path / "copy.csv"))
+    assert copy.accounts[1].name == "Smith, Alice"
+    assert copy.accounts[1].balance == Decimal('100.5')
+
+# A BankingSystem on a '.bin' path serves and commits accounts through the mapped snapshot
+def test_banking_system_binary(tmp_path):
+    path = str(tmp_path / "accounts.bin")
+    bank = BankingSystem(csv_path=path)
+    alice, _ = bank.create_account("Alice", "100")
+    bank.create_account("Bob", "50")
+    alice.transfer("30", 2, bank)
+    bank.commit(alice, bank.get_account(2))
+
+    new_bank = BankingSystem(csv_path=path)
+    assert isinstance(new_bank.accounts, BinaryAccounts)
+    assert new_bank.next_id == 3
+    assert new_bank.get_account(1).balance == Decimal('70')
+    assert new_bank.get_account(2).balance == Decimal('80')
+
+# Amounts and initial balances are checked against the scale in the file header
+def test_banking_system_binary_scale(tmp_path):
+    path = str(tmp_path / "accounts.bin")
+    write_binary(path, [(1, "Alice", Decimal('10.5'))], 1)
+    bank = BankingSystem(csv_path=path, scale=2)
+    assert bank.scale == 1
+    alice = bank.get_account(1)
+    assert alice.withdraw("0.05", bank) == (False, "Amount cannot have more than 1 decimal places!")
+    assert alice.balance == Decimal('10.5')
+    assert bank.create_account("Bob", "0.05") == (None, "Initial balance cannot have more than 1 decimal places!")
+    account, _ = bank.create_account("Bob", "0.5")
+    account.deposit("0.1", bank)
+    bank.save_state()
+    reopened = BinaryAccounts(path)
+    assert [balance for _, _, balance in reopened.rows()] == [Decimal('10.5'), Decimal('0.6')]
+    reopened.close()
@@ -0,0 +1,60 @@
+import csv
+import pytest
+from decimal import Decimal
+from banking_system import BankingSystem
+from bulk_import import import_csv
+
+def write_import(path, rows, header=('id', 'name', 'balance')):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+# Valid rows get consecutive IDs in file order, invalid ones go to the rejects file with a reason
+@pytest.mark.parametrize("workers", [0, 2])
+def test_import(tmp_path, workers):
+    bank = BankingSystem(csv_path=str(tmp_path / "accounts.csv"))
+    bank.create_account("Existing", "1")
+    import_path = str(tmp_path / "import.csv")
+    write_import(import_path, [
+        (10, "Alice", "100.50"),
+        (11, "Bob", "-5"),
+        (12, "Carol", "abc"),
+        (13,),
+        (14, "Smith, Dave", "0"),
+    ])
+    progress = []
+    report = import_csv(bank, import_path, workers=workers, chunk_size=2,
+                        progress=lambda rows, seconds: progress.append(rows))
+    assert (report['rows'], report['imported'], report['rejected'], report['first_id']) == (5, 2, 3, 2)
+    assert progress[-1] == 4
+    # Persisted with the existing account, with new IDs
+    saved = BankingSystem(csv_path=str(tmp_path / "accounts.csv"))
+    assert [(a.id, a.name, a.balance) for a in saved.accounts.values()] == [
+        (1, "Existing", Decimal('1')), (2, "Alice", Decimal('100.50')), (3, "Smith, Dave", Decimal('0'))
+    ]
+    assert bank.find_by_name("alice") == [2]
+    with open(f"{import_path}.rejects.csv", newline='') as f:
+        assert list(csv.reader(f)) == [
+            ['line', 'name', 'balance', 'reason'],
+            ['3', 'Bob', '-5', "Initial balance cannot be negative!"],
+            ['4', 'Carol', 'abc', "Invalid input, please input numbers only!"],
+            ['5', '13', '', "Expected at least 3 columns!"],
+        ]
+
+# Balances are checked against the scale of a columnar store
+def test_import_columnar_scale(tmp_path):
+    bank = BankingSystem(csv_path=str(tmp_path / "accounts.csv"), columnar=True, scale=2)
+    import_path = str(tmp_path / "import.csv")
+    write_import(import_path, [("Alice", "1.005"), ("Bob", "1.25")], header=('name', 'balance'))
+    report = import_csv(bank, import_path, workers=0, rejects_path=str(tmp_path / "rejects.csv"))
+    assert (report['imported'], report['rejected']) == (1, 1)
+    assert bank.accounts[1].name == "Bob"
+
+# A file without name and balance columns is refused
+def test_import_missing_columns(tmp_path):
+    bank = BankingSystem(csv_path=str(tmp_path / "accounts.csv"))
+    import_path = str(tmp_path / "import.csv")
+    write_import(import_path, [("Alice", "1")], header=('name', 'amount'))
+    with pytest.raises(ValueError, match="needs 'name' and 'balance' columns"):
+        import_csv(bank, import_path, workers=0)
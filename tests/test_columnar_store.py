@@ -0,0 +1,111 @@
+import pytest
+from columnar_store import ColumnarAccounts, AccountView
+from banking_system import BankingSystem
+from account import Account
+from decimal import Decimal
+
+@pytest.fixture
+def store():
+    store = ColumnarAccounts(scale=2)
+    store[1] = Account(id=1, name="Alice", balance=Decimal('100'))
+    store[2] = Account(id=2, name="Bob", balance=Decimal('50.25'))
+    return store
+
+# Stored accounts are handed out as views with exact balances
+def test_get_view(store):
+    account = store[2]
+    assert isinstance(account, AccountView)
+    assert account.name == "Bob"
+    assert account.balance == Decimal('50.25')
+    assert store[2] is account # the same view while it is alive
+    assert store.get(999) is None
+    assert "abc" not in store
+
+# Balance changes made through a view are written back to the columns
+def test_view_write_back(store):
+    store[1].deposit("0.10")
+    assert list(store.rows())[0] == (1, "Alice", Decimal('100.10'))
+
+# A balance with more decimal places than the store keeps is rejected
+def test_view_scale_overflow(store):
+    account = store[1]
+    with pytest.raises(ValueError):
+        account.balance = Decimal('100.001')
+    assert account.deposit("0.001") == (False, "Amount cannot have more than 2 decimal places!")
+    assert account.balance == Decimal('100')
+    assert list(store.rows())[0][2] == Decimal('100')
+
+# swap_balances only changes accounts holding the expected balance, and updates live views
+def test_swap_balances(store):
+    bob = store[2]
+    stale = store.swap_balances([(1, Decimal('99'), Decimal('1')), (2, Decimal('50.25'), Decimal('60')), (9, Decimal('0'), Decimal('1'))])
+    assert stale == [(1, Decimal('100'))]
+    assert bob.balance == Decimal('60')
+    assert [balance for _, _, balance in store.rows()] == [Decimal('100'), Decimal('60')]
+    with pytest.raises(ValueError):
+        store.swap_balances([(1, Decimal('100'), Decimal('1')), (2, Decimal('60'), Decimal('0.001'))])
+    assert store[1].balance == Decimal('100') # nothing changed
+
+# Account methods reject amounts the store cannot hold instead of raising
+def test_amount_scale_rejected(tmp_path):
+    bank = BankingSystem(csv_path=str(tmp_path / "accounts.csv"), columnar=True)
+    bank.create_accounts([("Alice", "10"), ("Bob", "0")])
+    alice = bank.get_account(1)
+    message = "Amount cannot have more than 2 decimal places!"
+    assert alice.deposit("0.005", bank) == (False, message)
+    assert alice.withdraw("0.005", bank) == (False, message)
+    assert alice.transfer("0.005", 2, bank) == (False, message)
+    assert alice.transfer_many([(2, "1"), (2, "0.005")], bank) == (False, ["Not transferred, another payment failed.", message])
+    assert alice.deposit("0.50", bank)[0]
+    assert [balance for _, _, balance in bank.accounts.rows()] == [Decimal('10.50'), Decimal('0')]
+    assert bank.verify(full=True)[0]
+
+# Balances beyond the 64-bit columns are rejected with a message, leaving every balance unchanged
+def test_balance_range_rejected(tmp_path):
+    bank = BankingSystem(csv_path=str(tmp_path / "accounts.csv"), columnar=True, scale=4)
+    message = "Balance cannot exceed 922337203685477.5807!"
+    assert bank.create_account("Zed", "922337203685477.5808") == (None, "Initial balance cannot exceed 922337203685477.5807!")
+    bank.create_accounts([("Alice", "922337203685477"), ("Bob", "1")])
+    alice, bob = bank.get_account(1), bank.get_account(2)
+    assert alice.deposit("1", bank) == (False, message)
+    assert bob.transfer("1", 1, bank) == (False, message)
+    assert bob.transfer_many([(1, "0.5"), (1, "0.5")], bank) == (False, [message, message])
+    assert alice.deposit("0.5807", bank)[0]
+    assert [balance for _, _, balance in bank.accounts.rows()] == [Decimal('922337203685477.5807'), Decimal('1')]
+    assert bank.verify(full=True)[0]
+    with pytest.raises(ValueError):
+        alice.balance = Decimal('922337203685477.5808')
+
+# Out-of-order inserts keep the ID column sorted; deletes remove the row
+def test_insert_and_delete(store):
+    store[0] = Account(id=0, name="Zed", balance=Decimal('1'))
+    assert list(store) == [0, 1, 2]
+    del store[1]
+    assert list(store) == [0, 2]
+    assert len(store) == 2
+    with pytest.raises(KeyError):
+        store[1]
+
+# Equal names share one interned string
+def test_names_interned():
+    store = ColumnarAccounts()
+    for account_id in range(1, 4):
+        store[account_id] = Account(id=account_id, name="".join(["Al", "ice"]), balance=Decimal('0'))
+    assert store[1].name is store[3].name
+
+# A BankingSystem runs on the columnar store and persists it like a dictionary
+def test_banking_system_columnar(tmp_path):
+    csv_path = str(tmp_path / "accounts.csv")
+    bank = BankingSystem(csv_path=csv_path, columnar=True)
+    account, _ = bank.create_account("Alice", "100")
+    bank.create_account("Bob", "50")
+    account.transfer("25.50", 2, bank)
+    bank.commit(account, bank.get_account(2))
+    account, message = bank.create_account("Carol", "0.001")
+    assert account is None
+    assert message == "Initial balance cannot have more than 2 decimal places!"
+
+    new_bank = BankingSystem(csv_path=csv_path, columnar=True)
+    assert isinstance(new_bank.accounts, ColumnarAccounts)
+    assert new_bank.get_account(1).balance == Decimal('74.50')
+    assert new_bank.get_account(2).balance == Decimal('75.50')
@@ -0,0 +1,53 @@
+import io
+import pytest
+from decimal import Decimal
+from banking_system import BankingSystem
+from driver import parse_line, read_script, run_script
+
+# Initiate BankingSystem
+@pytest.fixture
+def bank_system(tmp_path):
+    return BankingSystem(csv_path=str(tmp_path / "accounts.csv"))
+
+# Script lines are commands or JSON objects; comments and blank lines are ignored
+def test_parse_line():
+    assert parse_line('create "Alice Smith" 100') == {'op': 'create', 'name': "Alice Smith", 'balance': "100"}
+    assert parse_line('{"op": "transfer", "to": 2, "amount": "5"}') == {'op': 'transfer', 'to': 2, 'amount': "5"}
+    assert parse_line("  # a comment") is None and parse_line("") is None
+    for line in ("deposit", "fly 1", '{"op": "fly"}'):
+        with pytest.raises(ValueError):
+            parse_line(line)
+    with pytest.raises(ValueError, match="Line 2"):
+        list(read_script(io.StringIO("login 1\nlogin\n")))
+
+# A script runs through main's prompts, switching users by quitting and starting main again
+def test_run_script(bank_system):
+    script = io.StringIO(
+        'create Alice 100\ncreate Bob 50\nlogin 1\ndeposit 50\ntransfer 2 25\n'
+        'withdraw 500\nlogin 2\nwithdraw 10\n'
+    )
+    transcript = io.StringIO()
+    report = run_script(bank_system, read_script(script), transcript)
+    assert report['actions'] == 8 and report['skipped'] == 0
+    assert bank_system.get_account(1).balance == Decimal('125')
+    assert bank_system.get_account(2).balance == Decimal('65')
+    output = transcript.getvalue()
+    assert "Insufficient balance!" in output
+    assert "Enter the amount to deposit: 50" in output
+    assert output.count("Goodbye!") == 4
+    # Commits were saved
+    assert BankingSystem(csv_path=bank_system.csv_path).get_account(2).balance == Decimal('65')
+
+# Actions stay in step with the program when one fails part way
+def test_run_script_failures(bank_system):
+    bank_system.create_account("Alice", "100")
+    actions = [
+        {'op': 'login', 'id': 99},  # fails, so the deposit cannot run
+        {'op': 'deposit', 'amount': "10"},
+        {'op': 'login', 'id': 1},
+        {'op': 'transfer', 'to': 99, 'amount': "5"},  # unknown recipient: the amount is never asked for
+        {'op': 'deposit', 'amount': "5"},
+    ]
+    report = run_script(bank_system, actions)
+    assert report['actions'] == 4 and report['skipped'] == 1
+    assert bank_system.get_account(1).balance == Decimal('105')
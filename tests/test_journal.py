@@ -0,0 +1,55 @@
+import pytest
+from journal import Journal
+from account import Account
+from decimal import Decimal
+
+@pytest.fixture
+def journal(tmp_path):
+    return Journal(str(tmp_path / "accounts.csv.journal"))
+
+# Appended records are replayed in order, the last record for an account wins
+def test_append_and_replay(journal):
+    alice = Account(id=1, name="Alice", balance=Decimal('100'))
+    journal.append([alice])
+    alice.balance = Decimal('150')
+    journal.append([alice, Account(id=2, name="Bob", balance=Decimal('50'))])
+    assert journal.entries == 3
+
+    accounts = journal.replay({})
+    assert journal.entries == 3
+    assert accounts[1].balance == Decimal('150')
+    assert accounts[2].name == "Bob"
+
+# Replaying a missing journal leaves the snapshot untouched
+def test_replay_missing_file(journal):
+    accounts = {1: Account(id=1, name="Alice", balance=Decimal('100'))}
+    assert journal.replay(accounts) == accounts
+    assert journal.entries == 0
+
+# A record torn by a crash mid-append is ignored
+def test_replay_torn_record(journal):
+    journal.append([Account(id=1, name="Alice", balance=Decimal('100'))])
+    with open(journal.path, 'a') as f:
+        f.write("1,Alice,99")
+    accounts = journal.replay({})
+    assert accounts[1].balance == Decimal('100')
+    assert journal.entries == 1
+
+# Rotated records are still replayed until they are discarded
+def test_rotate_and_discard(journal):
+    journal.append([Account(id=1, name="Alice", balance=Decimal('100'))])
+    journal.rotate()
+    assert journal.entries == 0
+    journal.append([Account(id=2, name="Bob", balance=Decimal('50'))])
+    assert sorted(journal.replay({})) == [1, 2]
+
+    journal.discard_rotated()
+    assert sorted(journal.replay({})) == [2]
+
+# Rotating twice without discarding keeps the records of both rotations
+def test_rotate_twice(journal):
+    journal.append([Account(id=1, name="Alice", balance=Decimal('100'))])
+    journal.rotate()
+    journal.append([Account(id=2, name="Bob", balance=Decimal('50'))])
+    journal.rotate()
+    assert sorted(journal.replay({})) == [1, 2]
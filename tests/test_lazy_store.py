@@ -0,0 +1,72 @@
+import csv
+import os
+import pytest
+from decimal import Decimal
+from account import Account
+from lazy_store import LazyAccounts
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "accounts.csv"
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['id', 'name', 'balance'])
+        writer.writerow([1, "Alice", "100"])
+        writer.writerow([2, "Smith, Bob\nJr.", "50.5"]) # quoted over two lines
+        writer.writerow([3, "Zoë", "0"])
+    return str(path)
+
+# Lookups parse only the requested rows, including quoted multi-line names
+def test_lookup_on_demand(csv_path):
+    store = LazyAccounts(csv_path)
+    assert len(store) == 3 and store.loaded == 0
+    assert store[3].name == "Zoë"
+    assert store[2] == Account(id=2, name="Smith, Bob\nJr.", balance=Decimal('50.5'))
+    assert store.loaded == 2
+    assert 1 in store and 4 not in store
+    with pytest.raises(KeyError):
+        store[4]
+
+# The index is written next to the CSV file, reused, and rebuilt once the file changes
+def test_index_reuse_and_rebuild(csv_path, monkeypatch):
+    LazyAccounts(csv_path)
+    assert os.path.exists(f"{csv_path}.idx")
+    monkeypatch.setattr(LazyAccounts, '_build_index', lambda self: pytest.fail("index rebuilt"))
+    assert LazyAccounts(csv_path)[1].name == "Alice"
+    monkeypatch.undo()
+    with open(csv_path, 'a', newline='', encoding='utf-8') as f:
+        csv.writer(f).writerow([4, "Dave", "7"])
+    store = LazyAccounts(csv_path)
+    assert store[4].balance == Decimal('7')
+
+# Added, changed and deleted accounts are kept in memory; values() loads the rest in ID order
+def test_changes_and_full_load(csv_path):
+    store = LazyAccounts(csv_path)
+    store[1].balance += 1
+    store[5] = Account(id=5, name="Eve", balance=Decimal('5'))
+    del store[3]
+    assert len(store) == 3 and store.last_id() == 5
+    assert list(store) == [1, 2, 5]
+    assert [(account.id, account.balance) for account in store.values()] == [
+        (1, Decimal('101')), (2, Decimal('50.5')), (5, Decimal('5'))
+    ]
+    assert 3 not in store
+
+# write_snapshot copies the rows not given, replaces and drops the others, and appends new ones
+def test_write_snapshot(csv_path, tmp_path):
+    with open(csv_path, 'rb+') as f:
+        f.truncate(os.path.getsize(csv_path) - 2) # no line break after the last row
+    store = LazyAccounts(csv_path)
+    assert store.can_copy()
+    store[1].balance += 1
+    store[5] = Account(id=5, name="Eve", balance=Decimal('5'))
+    del store[3]
+    rows, deleted = store.cut()
+    out = tmp_path / "snapshot.csv"
+    with open(out, 'wb') as f:
+        _, _, original = store.write_snapshot(f, rows, deleted)
+    assert original == {1: Decimal('100'), 3: Decimal('0')}
+    with open(out, newline='', encoding='utf-8') as f:
+        assert list(csv.reader(f)) == [
+            ['id', 'name', 'balance'], ['1', 'Alice', '101'], ['2', "Smith, Bob\nJr.", '50.5'], ['5', 'Eve', '5'],
+        ]
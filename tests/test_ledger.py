@@ -0,0 +1,65 @@
+import pytest
+from decimal import Decimal
+from ledger import Ledger
+
+@pytest.fixture
+def ledger(tmp_path):
+    return Ledger(str(tmp_path / "accounts.csv.ledger"))
+
+def record_many(ledger, count, account_id=1):
+    for i in range(count):
+        ledger.record('deposit', account_id, Decimal(1), Decimal(i + 1))
+
+# Recorded entries are returned newest first, with every field
+def test_record_and_history(ledger):
+    ledger.record('deposit', 1, Decimal('50'), Decimal('150'))
+    ledger.record('transfer_out', 1, Decimal('20'), Decimal('130'), 2)
+    ledger.record('transfer_in', 2, Decimal('20'), Decimal('20'), 1)
+    first, second = ledger.history(1)
+    assert (first.seq, first.kind, first.amount, first.balance, first.counterparty) == (1, 'transfer_out', Decimal('20'), Decimal('130'), 2)
+    assert (second.seq, second.kind, second.counterparty) == (0, 'deposit', None)
+    assert [entry.seq for entry in ledger.history(2)] == [2]
+    assert ledger.history(3) == []
+
+# History pages continue from the seq of the last entry of the previous page
+def test_history_pagination(ledger):
+    record_many(ledger, 10)
+    record_many(ledger, 5, account_id=2)
+    page = ledger.history(1, limit=4)
+    assert [entry.balance for entry in page] == [Decimal(10), Decimal(9), Decimal(8), Decimal(7)]
+    page = ledger.history(1, limit=4, before=page[-1].seq)
+    assert [entry.balance for entry in page] == [Decimal(6), Decimal(5), Decimal(4), Decimal(3)]
+    page = ledger.history(1, limit=4, before=page[-1].seq)
+    assert [entry.balance for entry in page] == [Decimal(2), Decimal(1)]
+
+# Time range queries use the entry times, for the whole ledger or one account
+def test_between(ledger, monkeypatch):
+    clock = iter(range(100, 1000, 10))
+    monkeypatch.setattr('ledger.time.time_ns', lambda: next(clock))
+    record_many(ledger, 3, account_id=1) # times 100, 110, 120
+    record_many(ledger, 3, account_id=2) # times 130, 140, 150
+    record_many(ledger, 3, account_id=1) # times 160, 170, 180
+    assert [entry.seq for entry in ledger.between(130, 160)] == [3, 4, 5]
+    assert [entry.time_ns for entry in ledger.between(0, 125)] == [100, 110, 120]
+    own = ledger.between(110, 1000, account_id=1, limit=3)
+    assert [entry.seq for entry in own] == [1, 2, 6]
+    assert [entry.seq for entry in ledger.between(110, 1000, account_id=1, after=own[-1].seq)] == [7, 8]
+    assert [entry.seq for entry in ledger.between(0, 1000, limit=2, after=6)] == [7, 8]
+
+# Entry times never go backwards, even if the clock does
+def test_clock_step_back(ledger, monkeypatch):
+    clock = iter([500, 400, 600])
+    monkeypatch.setattr('ledger.time.time_ns', lambda: next(clock))
+    record_many(ledger, 3)
+    assert [entry.time_ns for entry in ledger.between(0, 1000)] == [500, 500, 600]
+
+# Reopening the ledger rebuilds the index, and a torn last entry is dropped
+def test_reopen(ledger):
+    record_many(ledger, 3)
+    ledger.close()
+    with open(ledger.path, 'ab') as f:
+        f.write(b"123,deposit,1,")
+    reopened = Ledger(ledger.path)
+    assert len(reopened) == 3
+    reopened.record('withdraw', 1, Decimal(1), Decimal(2))
+    assert [entry.kind for entry in reopened.history(1, limit=2)] == ['withdraw', 'deposit']
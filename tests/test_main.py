@@ -73,4 +73,60 @@ def test_transfer_valid(capsys, bank_system):
     captured = capsys.readouterr()
     assert "Transferred 30 to account 2" in captured.out
     assert bank_system.get_account(1).balance == Decimal('70') # 100 - 30 == 70
-    assert bank_system.get_account(2).balance == Decimal('80') # 50 + 30 == 80
\ No newline at end of file
+    assert bank_system.get_account(2).balance == Decimal('80') # 50 + 30 == 80
+
+# Without a bank, main opens one in the background and uses it after the first prompt
+def test_main_opens_bank(capsys, tmp_path, monkeypatch):
+    import main as main_module
+    monkeypatch.setattr(main_module, 'open_bank', lambda incremental: BankingSystem(csv_path=str(tmp_path / "accounts.csv")))
+    with patch('builtins.input', side_effect=['no', 'Alice', '100', 'q']):
+        main()
+    assert "Account created for Alice with ID 1" in capsys.readouterr().out
+    assert BankingSystem(csv_path=str(tmp_path / "accounts.csv")).get_account(1).name == "Alice"
+
+# The bank main opens keeps the CSV format unless incremental saves are asked for
+@pytest.mark.parametrize("incremental", [False, True])
+def test_open_bank_format(tmp_path, incremental):
+    import main as main_module
+    csv_path = tmp_path / "accounts.csv"
+    BankingSystem(csv_path=str(csv_path)).create_accounts([(f"Customer {i}", "100") for i in range(20)])
+    bank = main_module.open_bank(str(csv_path), incremental=incremental)
+    account = bank.get_account(1)
+    account.deposit("10", bank)
+    bank.commit(account)
+    bank.close()
+    assert (tmp_path / "accounts.csv.delta").exists() == incremental
+    assert BankingSystem(csv_path=str(csv_path)).get_account(1).balance == Decimal('110')
+
+# Pay many recipients from a CSV file with a header row
+def test_pay_many(capsys, tmp_path, bank_system):
+    bank_system.create_accounts([("Alice", "100"), ("Bob", "0"), ("Carol", "0")])
+    payments = tmp_path / "payroll.csv"
+    payments.write_text("recipient_id,amount\n2,30\n\n3,20\n")
+    with patch('builtins.input', side_effect=['yes', '1', 'p', str(payments), 'q']):
+        main(bank=bank_system)
+    assert "Paid 2 payments. New balance: 50." in capsys.readouterr().out
+    assert bank_system.get_account(2).balance == Decimal('30')
+    assert bank_system.get_account(3).balance == Decimal('20')
+
+# A bad payment is reported with its line, and nothing is paid
+def test_pay_many_invalid(capsys, tmp_path, bank_system):
+    bank_system.create_accounts([("Alice", "100"), ("Bob", "0")])
+    payments = tmp_path / "payroll.csv"
+    payments.write_text("2,30\n999,20\n2,abc\n")
+    with patch('builtins.input', side_effect=['yes', '1', 'p', str(payments), 'p', str(tmp_path / "missing.csv"), 'q']):
+        main(bank=bank_system)
+    out = capsys.readouterr().out
+    assert "Line 2: Recipient with ID 999 does not exist." in out
+    assert "Line 3: Invalid input, please input numbers only!" in out
+    assert "Line 1:" not in out
+    assert "No payments were made." in out
+    assert "Cannot read payments:" in out
+    assert bank_system.get_account(1).balance == Decimal('100')
+
+# An unknown command lists every valid one
+def test_invalid_command(capsys, bank_system):
+    bank_system.create_account("Alice", "100")
+    with patch('builtins.input', side_effect=['yes', '1', 'x', 'q']):
+        main(bank=bank_system)
+    assert "Invalid input. Please enter 'd', 'w', 't', 'p', or 'q'." in capsys.readouterr().out
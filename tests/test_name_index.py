@@ -0,0 +1,50 @@
+import pytest
+from name_index import NameIndex
+
+@pytest.fixture
+def index():
+    return NameIndex.build([(1, "Alice"), (2, "alice"), (3, "Alicia"), (4, "Bob"), (5, "ALICE")])
+
+# Exact lookups ignore case and return every matching ID
+def test_exact(index):
+    assert index.exact("aLiCe") == [1, 2, 5]
+    assert index.exact("Bob") == [4]
+    assert index.exact("Carol") == []
+
+# Prefix lookups return the IDs of every name starting with the prefix, grouped by name
+def test_prefix(index):
+    assert index.prefix("ali") == [1, 2, 5, 3]
+    assert index.prefix("ALIC") == [1, 2, 5, 3]
+    assert index.prefix("alici") == [3]
+    assert index.prefix("z") == []
+    assert index.prefix("") == [1, 2, 5, 3, 4]
+
+# A prefix lookup stops after limit IDs
+def test_prefix_limit(index):
+    assert index.prefix("a", limit=2) == [1, 2]
+
+# Added accounts are found right away, new names included
+def test_add(index):
+    index.add(6, "Alicia")
+    index.add(7, "Aaron")
+    assert index.exact("alicia") == [3, 6]
+    assert index.prefix("a") == [7, 1, 2, 5, 3, 6]
+    assert len(index) == 4
+
+# Adding the same account twice does not duplicate it
+def test_add_twice(index):
+    index.add(4, "Bob")
+    assert index.exact("bob") == [4]
+
+# Many accounts sharing one name are all kept, in ID order
+def test_add_common_name():
+    index = NameIndex()
+    for account_id in range(50000, 0, -1):
+        index.add(account_id, "Smith")
+    assert index.exact("smith") == list(range(1, 50001))
+    assert len(index) == 1
+
+# Non-ASCII names are folded the way str.casefold does
+def test_casefold():
+    index = NameIndex.build([(1, "Straße")])
+    assert index.exact("STRASSE") == [1]
@@ -0,0 +1,148 @@
+import threading
+import pytest
+from decimal import Decimal
+from account import Account
+from banking_system import BankingSystem
+from persistence import CommitScheduler
+
+class Recorder:
+    """A persist callback that records every batch it is given."""
+    def __init__(self):
+        self.batches = []
+        self.event = threading.Event()
+
+    def __call__(self, accounts):
+        self.batches.append(sorted(account.id for account in accounts))
+        self.event.set()
+
+def make_account(account_id):
+    return Account(id=account_id, name=f"User {account_id}", balance=Decimal('100'))
+
+# Unknown policies are rejected
+def test_unknown_policy():
+    with pytest.raises(ValueError, match="Unknown durability policy 'sometimes'!"):
+        CommitScheduler(Recorder(), policy='sometimes')
+
+# The 'always' policy persists every commit before returning
+def test_always_policy():
+    recorder = Recorder()
+    scheduler = CommitScheduler(recorder)
+    scheduler.submit([make_account(1)])
+    scheduler.submit([make_account(1), make_account(2)])
+    assert recorder.batches == [[1], [1, 2]]
+
+# The 'manual' policy holds commits, coalesced per account, until flush
+def test_manual_policy_coalesces():
+    recorder = Recorder()
+    scheduler = CommitScheduler(recorder, policy='manual')
+    for account_id in (1, 2, 1, 1):
+        scheduler.submit([make_account(account_id)])
+    assert recorder.batches == []
+    assert scheduler.pending == 4
+    scheduler.flush()
+    assert recorder.batches == [[1, 2]]
+    assert scheduler.pending == 0
+    scheduler.flush()
+    assert recorder.batches == [[1, 2]]
+
+# The 'group' policy persists once group_size commits are pending
+def test_group_policy_size():
+    recorder = Recorder()
+    scheduler = CommitScheduler(recorder, policy='group', group_size=3, group_interval_ms=60000)
+    scheduler.submit([make_account(1)])
+    scheduler.submit([make_account(2)])
+    assert not recorder.event.wait(0.05)
+    scheduler.submit([make_account(3)])
+    assert recorder.event.wait(5)
+    assert recorder.batches == [[1, 2, 3]]
+    scheduler.close()
+
+# The 'group' policy persists a lone commit once group_interval_ms has passed
+def test_group_policy_interval():
+    recorder = Recorder()
+    scheduler = CommitScheduler(recorder, policy='group', group_size=1000, group_interval_ms=10)
+    scheduler.submit([make_account(1)])
+    assert recorder.event.wait(5)
+    assert recorder.batches == [[1]]
+    scheduler.close()
+
+# Closing the scheduler persists whatever is still pending
+def test_close_flushes():
+    recorder = Recorder()
+    scheduler = CommitScheduler(recorder, policy='group', group_size=1000, group_interval_ms=60000)
+    scheduler.submit([make_account(1)])
+    scheduler.close()
+    assert recorder.batches == [[1]]
+
+# Changes the background writer failed to persist fail again in the next flush
+def test_writer_error_reraised():
+    def failing(accounts):
+        raise OSError("disk full")
+    scheduler = CommitScheduler(failing, policy='group', group_size=1, group_interval_ms=60000)
+    scheduler.submit([make_account(1)])
+    scheduler._writer.join(0.2) # the writer keeps running, give it time to fail
+    assert isinstance(scheduler.error, OSError)
+    with pytest.raises(OSError, match="disk full"):
+        scheduler.flush()
+    # The commit is still pending, so closing tries it once more
+    with pytest.raises(OSError, match="disk full"):
+        scheduler.close()
+
+# Once the background writer's retry succeeds, its earlier error is not raised by anyone
+def test_writer_recovers():
+    recorder = Recorder()
+    failures = [OSError("disk full")]
+
+    def flaky(accounts):
+        if failures:
+            raise failures.pop()
+        recorder(accounts)
+    scheduler = CommitScheduler(flaky, policy='group', group_size=1, group_interval_ms=20)
+    scheduler.submit([make_account(1)])
+    assert recorder.event.wait(5)
+    scheduler.flush() # waits for the writer's flush to finish
+    assert recorder.batches == [[1]]
+    assert scheduler.error is None
+    scheduler.close()
+
+# Changes whose persist failed stay pending and are persisted by the next flush
+def test_failed_flush_keeps_changes():
+    recorder = Recorder()
+    failures = [OSError("disk full")]
+
+    def flaky(accounts):
+        if failures:
+            raise failures.pop()
+        recorder(accounts)
+    scheduler = CommitScheduler(flaky, policy='manual')
+    scheduler.submit([make_account(1), make_account(2)])
+    with pytest.raises(OSError, match="disk full"):
+        scheduler.flush()
+    assert scheduler.pending == 1
+    scheduler.submit([make_account(2), make_account(3)])
+    scheduler.flush()
+    assert recorder.batches == [[1, 2, 3]]
+    assert scheduler.pending == 0
+
+# With the 'manual' policy, the bank's file only changes on flush
+def test_bank_manual_durability(tmp_path):
+    csv_path = str(tmp_path / "accounts.csv")
+    bank = BankingSystem(csv_path=csv_path, durability='manual', fsync=True)
+    account, _ = bank.create_account("Alice", "100")
+    account.deposit("50")
+    bank.commit(account)
+    assert BankingSystem(csv_path=csv_path).accounts == {}
+
+    bank.flush()
+    assert BankingSystem(csv_path=csv_path).accounts[account.id].balance == Decimal('150')
+
+# With the 'group' policy and a journal, closing the bank persists every commit
+def test_bank_group_durability(tmp_path):
+    csv_path = str(tmp_path / "accounts.csv")
+    bank = BankingSystem(csv_path=csv_path, journal=True, durability='group', group_size=10)
+    account, _ = bank.create_account("Alice", "100")
+    for _ in range(25):
+        account.deposit("1")
+        bank.commit(account)
+    bank.close()
+    assert BankingSystem(csv_path=csv_path, journal=True).accounts[account.id].balance == Decimal('125')
@@ -0,0 +1,57 @@
+import random
+import pytest
+from decimal import Decimal
+from banking_system import BankingSystem
+from reporting import BalanceReport
+
+# Banks with the same random balances, including ties and empty accounts, in every store
+@pytest.fixture(params=['dict', 'columnar', 'binary'])
+def bank(request, tmp_path):
+    rng = random.Random(7)
+    rows = [(f"Customer {i}", str(Decimal(rng.choice([0, 500, rng.randint(0, 10**9)])).scaleb(-2))) for i in range(2000)]
+    suffix = '.bin' if request.param == 'binary' else '.csv'
+    bank = BankingSystem(csv_path=str(tmp_path / f"accounts{suffix}"), columnar=request.param == 'columnar')
+    bank.create_accounts(rows)
+    if request.param == 'binary':
+        bank.get_account(1).deposit("0.25", bank) # written in place
+        bank.create_account("Late", "7.07") # still an added account
+    return bank
+
+# Naive Decimal answers over Account objects
+def decimal_balances(bank):
+    return [(account.id, account.balance) for account in (bank.accounts[i] for i in list(bank.accounts))]
+
+# Every aggregate equals the Decimal answer
+def test_matches_decimal(bank):
+    report = BalanceReport.from_bank(bank)
+    balances = decimal_balances(bank)
+    ordered = sorted(balance for _, balance in balances)
+    assert len(report) == len(balances)
+    assert report.total() == sum(balance for _, balance in balances)
+    assert report.top(25) == sorted(balances, key=lambda row: (-row[1], row[0]))[:25]
+    edges = ["0", "0.01", "5", "5.001", "1000000", "10000000"]
+    assert report.histogram(edges) == [
+        sum(1 for balance in ordered if Decimal(low) <= balance < Decimal(high)) for low, high in zip(edges, edges[1:])
+    ]
+    n = len(ordered)
+    assert report.percentiles([0, 50, "99.9", 100]) == [ordered[0], ordered[(n + 1) // 2 - 1], ordered[-(-999 * n // 1000) - 1], ordered[-1]]
+
+# Totals of balances near the int64 limit do not overflow
+def test_total_does_not_overflow():
+    import numpy as np
+    big = 9 * 10**17
+    report = BalanceReport(np.arange(100, dtype=np.int64), np.full(100, big, dtype=np.int64), 2)
+    assert report.total() == Decimal(big * 100).scaleb(-2)
+
+# Balances with more decimal places than the report keeps are rejected
+def test_scale_too_small(tmp_path):
+    bank = BankingSystem(csv_path=str(tmp_path / "accounts.csv"))
+    bank.create_account("Alice", "1.005")
+    with pytest.raises(ValueError):
+        BalanceReport.from_bank(bank)
+    assert BalanceReport.from_bank(bank, scale=3).total() == Decimal('1.005')
+
+# An empty bank reports nothing
+def test_empty(tmp_path):
+    report = BalanceReport.from_bank(BankingSystem(csv_path=str(tmp_path / "accounts.csv")))
+    assert (report.total(), report.top(), report.percentiles([50]), report.histogram(["0", "1"])) == (0, [], [None], [0])
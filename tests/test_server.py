@@ -0,0 +1,114 @@
+import asyncio
+import json
+import pytest
+from server import BankServer
+from client import BankClient, run_load
+from banking_system import BankingSystem
+from decimal import Decimal
+
+@pytest.fixture
+def bank_system(tmp_path):
+    return BankingSystem(csv_path=str(tmp_path / "accounts.csv"))
+
+# Runs a coroutine against a server listening on a free local port
+def run_with_server(bank, scenario):
+    async def runner():
+        bank_server = BankServer(bank)
+        server = await bank_server.start('127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return await scenario(port)
+        finally:
+            server.close()
+            await server.wait_closed()
+            bank_server.close()
+    return asyncio.run(runner())
+
+# A session can create, login, deposit, withdraw, transfer and check its balance
+def test_session_operations(bank_system, tmp_path):
+    async def scenario(port):
+        client = await BankClient.connect('127.0.0.1', port)
+        alice = await client.request('create', name="Alice", balance="100")
+        bob = await client.request('create', name="Bob", balance="50")
+        responses = [
+            await client.request('deposit', amount="10"), # not logged in yet
+            await client.request('login', id=alice['id']),
+            await client.request('deposit', amount="50"),
+            await client.request('withdraw', amount="500"),
+            await client.request('transfer', to=bob['id'], amount="30"),
+            await client.request('transfer', to=alice['id'], amount="1"),
+            await client.request('transfer', to=999, amount="1"),
+            await client.request('balance'),
+        ]
+        await client.close()
+        return alice, responses
+
+    alice, responses = run_with_server(bank_system, scenario)
+    assert alice['ok'] and alice['id'] == 1
+    assert [response['ok'] for response in responses] == [False, True, True, False, True, False, False, True]
+    assert responses[0]['message'] == "Please login first."
+    assert responses[3]['message'] == "Insufficient balance!"
+    assert responses[5]['message'] == "Cannot transfer to the same account!"
+    assert responses[6]['message'] == "Recipient with ID 999 does not exist."
+    assert responses[7]['balance'] == "120"
+    # Changes were committed before the responses were sent
+    saved = BankingSystem(csv_path=str(tmp_path / "accounts.csv"))
+    assert saved.accounts[1].balance == Decimal('120')
+    assert saved.accounts[2].balance == Decimal('80')
+
+# Malformed lines and unknown operations get an error response instead of closing the session
+def test_invalid_requests(bank_system):
+    async def scenario(port):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b"not json\n[1, 2]\n")
+        lines = [await reader.readline(), await reader.readline()]
+        writer.close()
+        client = await BankClient.connect('127.0.0.1', port)
+        unknown = await client.request('refund')
+        await client.close()
+        return lines, unknown
+
+    lines, unknown = run_with_server(bank_system, scenario)
+    assert all(b'"ok": false' in line for line in lines)
+    assert unknown['message'] == "Unknown operation 'refund'!"
+
+# Missing, huge and non-integer account IDs get an error response instead of closing the session
+def test_invalid_account_ids(bank_system):
+    bank_system.create_accounts([("Alice", "100"), ("Bob", "0")])
+
+    async def scenario(port):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'{"op": "login"}\n{"op": "login", "id": 1e999}\n{"op": "login", "id": NaN}\n{"op": "login", "id": 1}\n'
+                     b'{"op": "transfer", "amount": "1"}\n{"op": "transfer", "to": -1e999, "amount": "1"}\n'
+                     b'{"op": "transfer", "to": 2, "amount": "1"}\n')
+        lines = [await reader.readline() for _ in range(7)]
+        writer.close()
+        return [json.loads(line) for line in lines]
+
+    responses = run_with_server(bank_system, scenario)
+    assert [response['ok'] for response in responses] == [False, False, False, True, False, False, True]
+    assert {responses[i]['message'] for i in (0, 1, 2, 4, 5)} == {"Invalid account ID. Please try again."}
+
+# The stats operation switches recording on and reports operations of every session
+def test_stats_operation(bank_system):
+    async def scenario(port):
+        client = await BankClient.connect('127.0.0.1', port)
+        enabled = await client.request('stats', enabled=True)
+        await client.request('create', name="Alice", balance="100")
+        await client.request('login', id=1)
+        await client.request('deposit', amount="10")
+        stats = await client.request('stats')
+        await client.close()
+        return enabled, stats
+
+    enabled, stats = run_with_server(bank_system, scenario)
+    assert enabled['message'] == "Stats recording is on."
+    assert stats['stats']['deposit']['count'] == 1
+    assert stats['stats']['persist']['count'] == 2
+
+# The bundled load client drives many concurrent sessions without losing money
+def test_run_load(bank_system):
+    report = run_with_server(bank_system, lambda port: run_load('127.0.0.1', port, sessions=10, ops=20))
+    assert report['ops'] == 200
+    assert len(bank_system.accounts) == 10
+    assert all(account.balance >= 0 for account in bank_system.accounts.values())
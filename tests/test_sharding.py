@@ -0,0 +1,127 @@
+import pytest
+from decimal import Decimal
+from banking_system import BankingSystem
+from sharding import ShardedBank, _Shard, shard_path, split_csv
+
+@pytest.fixture
+def sharded(tmp_path):
+    bank = ShardedBank(csv_path=str(tmp_path / "accounts.csv"), shards=3)
+    for name in ("Alice", "Bob", "Carol", "Dave"):
+        bank.create_account(name, "100")
+    yield bank
+    bank.close()
+
+# Accounts are spread over the shards by ID, and each shard persists its own file
+def test_create_and_route(sharded, tmp_path):
+    assert [sharded.get_account(i).name for i in range(1, 5)] == ["Alice", "Bob", "Carol", "Dave"]
+    assert sharded.get_account(99) is None
+    assert sharded.deposit(4, "50") == (True, "Deposited 50 to account 4. New balance: 150.")
+    assert sharded.withdraw(2, "500") == (False, "Insufficient balance!")
+    assert sharded.withdraw(99, "1") == (False, "Account 99 does not exist.")
+    shard = BankingSystem(csv_path=shard_path(str(tmp_path / "accounts.csv"), 1))
+    assert sorted(shard.accounts) == [1, 4]
+    assert shard.accounts[4].balance == Decimal('150')
+
+# Transfers within a shard and across shards move money exactly once
+def test_transfers(sharded):
+    assert sharded.transfer(1, "30", 4)[0] # same shard
+    success, message = sharded.transfer(1, "20", 2) # across shards
+    assert success
+    assert message == "Transferred 20 to account 2. New balance: 50"
+    balances = [sharded.get_account(i).balance for i in range(1, 5)]
+    assert balances == [Decimal('50'), Decimal('120'), Decimal('100'), Decimal('130')]
+
+# A shard voting no aborts a cross-shard transfer without changing anything
+def test_transfer_aborted(sharded):
+    assert sharded.transfer(1, "500", 2) == (False, "Insufficient balance!")
+    assert sharded.transfer(1, "10", 98) == (False, "Recipient with ID 98 does not exist.")
+    assert sharded.transfer(97, "10", 2) == (False, "Account 97 does not exist.")
+    assert sharded.transfer(1, "abc", 2) == (False, "Invalid input, please input numbers only!")
+    assert sharded.transfer(1, "10", 1) == (False, "Cannot transfer to the same account!")
+    # The aborted transfer released its hold, so the whole balance can still be withdrawn
+    assert sharded.withdraw(1, "100")[0]
+
+# An amount a columnar shard cannot store is rejected before the transfer is decided
+def test_transfer_scale_rejected(tmp_path):
+    csv_path = str(tmp_path / "accounts.csv")
+    bank = ShardedBank(csv_path=csv_path, shards=2, columnar=True)
+    bank.create_account("Alice", "100")
+    bank.create_account("Bob", "0")
+    assert bank.transfer(1, "0.001", 2) == (False, "Amount cannot have more than 2 decimal places!")
+    assert bank._call(0, 'prepare_credit', 'a', 2, Decimal('0.001')) == (
+        False, "Amount cannot have more than 2 decimal places!")
+    bank.close()
+    # Nothing was logged, so the bank opens again with its balances unchanged
+    bank = ShardedBank(csv_path=csv_path, shards=2, columnar=True)
+    assert bank.get_account(1).balance == Decimal('100')
+    assert bank.withdraw(1, "100")[0] # no hold left behind
+    bank.close()
+
+# Accounts, IDs and balances survive a restart
+def test_restart(tmp_path):
+    csv_path = str(tmp_path / "accounts.csv")
+    bank = ShardedBank(csv_path=csv_path, shards=2, journal=True)
+    bank.create_account("Alice", "100")
+    bank.create_account("Bob", "0")
+    bank.transfer(1, "40", 2)
+    bank.close()
+    bank = ShardedBank(csv_path=csv_path, shards=2, journal=True)
+    assert bank.get_account(2).balance == Decimal('40')
+    assert bank.create_account("Carol", "1")[0].id == 3
+    bank.close()
+
+# A transfer decided but not applied by both shards is completed on the next start, once
+def test_recover_decided_transfer(tmp_path):
+    csv_path = str(tmp_path / "accounts.csv")
+    bank = ShardedBank(csv_path=csv_path, shards=2)
+    bank.create_account("Alice", "100")
+    bank.create_account("Bob", "0")
+    # Alice's shard already applied transfer 'b', Bob's did not
+    bank._call(1, 'apply_debit', 'b', 1, Decimal('30'), 2)
+    bank.close()
+    with open(f"{csv_path}.2pc", 'w') as f:
+        # A malformed record and a torn last record are skipped
+        f.write("a,commit,1,2,5\na,done\nb,commit,1,2,30\nx,commit,1\nc,commit,1,2,4")
+    bank = ShardedBank(csv_path=csv_path, shards=2)
+    assert bank.get_account(1).balance == Decimal('70')
+    assert bank.get_account(2).balance == Decimal('30')
+    bank.close()
+
+# Each side of a cross-shard transfer is on disk before its ID is, whatever the durability policy,
+# and the IDs are dropped once the transfer is done
+def test_cross_shard_side_persisted(tmp_path):
+    csv_path = str(tmp_path / "accounts.csv")
+    bank = ShardedBank(csv_path=csv_path, shards=2, durability='manual')
+    bank.create_account("Alice", "100")
+    bank.create_account("Bob", "0")
+    bank.flush()
+    assert bank.transfer(1, "30", 2)[0]
+    assert BankingSystem(csv_path=shard_path(csv_path, 1)).accounts[1].balance == Decimal('70')
+    assert BankingSystem(csv_path=shard_path(csv_path, 0)).accounts[2].balance == Decimal('30')
+    bank.close()
+    bank = ShardedBank(csv_path=csv_path, shards=2)
+    bank.close()
+    for shard in range(2):
+        with open(f"{shard_path(csv_path, shard)}.txids") as f:
+            assert f.read() == ""
+
+# An intent without confirmation counts as applied only if its balance reached the disk
+def test_unconfirmed_intent(tmp_path):
+    csv_path = str(tmp_path / "accounts.csv")
+    bank = BankingSystem(csv_path=csv_path)
+    bank.create_accounts([("Alice", "70"), ("Bob", "0")])
+    with open(f"{csv_path}.txids", 'w') as f:
+        f.write("intent,a,1,70\nintent,b,2,30\nintent,c,1,80\napplied,c\nforget,c\n")
+    shard = _Shard(BankingSystem(csv_path=csv_path))
+    assert shard.txids == {'a'}
+    with open(f"{csv_path}.txids") as f:
+        assert f.read() == "applied,a\n"
+
+# An existing CSV file can be split into shard files
+def test_split_csv(tmp_path):
+    csv_path = str(tmp_path / "accounts.csv")
+    BankingSystem(csv_path=csv_path).create_accounts([(f"User {i}", "1") for i in range(5)])
+    assert split_csv(csv_path, 2) == [2, 3]
+    bank = ShardedBank(csv_path=csv_path, shards=2)
+    assert [bank.get_account(i).name for i in range(1, 6)] == [f"User {i}" for i in range(5)]
+    bank.close()
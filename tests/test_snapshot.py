@@ -0,0 +1,51 @@
+import threading
+import pytest
+from decimal import Decimal
+from banking_system import BankingSystem
+
+@pytest.fixture(params=[False, True], ids=['dict', 'columnar'])
+def bank(request, tmp_path):
+    bank = BankingSystem(csv_path=str(tmp_path / "accounts.csv"), columnar=request.param)
+    bank.create_accounts([("Alice", "100"), ("Bob", "50")])
+    return bank
+
+# A snapshot keeps the balances and accounts of the moment it was taken
+def test_point_in_time(bank):
+    alice, bob = bank.get_account(1), bank.get_account(2)
+    with bank.snapshot() as snapshot:
+        alice.deposit("25", bank)
+        alice.transfer("30", 2, bank)
+        bob.withdraw("10", bank)
+        bank.create_account("Carol", "70")
+        bank.apply_batch([('deposit', 1, '5'), ('withdraw', 2, '1000')], atomic=True)
+        assert list(snapshot.rows()) == [(1, "Alice", Decimal('100')), (2, "Bob", Decimal('50'))]
+        assert snapshot.balance(1) == Decimal('100')
+        assert snapshot.balance(3) is None
+        totals = snapshot.totals()
+        assert (totals.total, totals.count, totals.zero) == (Decimal('150'), 2, 0)
+    assert snapshot.closed and bank._snapshots == ()
+    # A new snapshot sees the current state
+    with bank.snapshot() as snapshot:
+        assert [row[2] for row in snapshot.rows()] == [Decimal('95'), Decimal('70'), Decimal('70')]
+
+# Reading snapshots while transfers run always finds the same total
+def test_consistent_under_transfers(bank):
+    bank.create_accounts([(f"Customer {i}", "10") for i in range(50)])
+    total = bank.totals.total
+    stop = threading.Event()
+
+    def transfers(sender, recipient):
+        while not stop.is_set():
+            bank.get_account(sender).transfer("0.5", recipient, bank)
+
+    threads = [threading.Thread(target=transfers, args=(i, 52 - i)) for i in range(1, 5)]
+    for thread in threads:
+        thread.start()
+    try:
+        for _ in range(10):
+            with bank.snapshot() as snapshot:
+                assert snapshot.totals().total == total
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
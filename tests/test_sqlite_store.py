@@ -0,0 +1,113 @@
+import gc
+import sqlite3
+import threading
+import pytest
+from decimal import Decimal
+from banking_system import BankingSystem
+from reporting import BalanceReport
+from sqlite_store import SQLiteStorage, csv_to_sqlite
+
+def open_bank(path, cache=True, **kwargs):
+    return BankingSystem(csv_path=path, storage=SQLiteStorage(path, cache=cache), **kwargs)
+
+def stored(path):
+    with sqlite3.connect(path) as connection:
+        return dict(connection.execute("SELECT id, balance FROM accounts"))
+
+# Accounts and their exact balances survive a reopen; the database is in WAL mode
+@pytest.mark.parametrize('cache', [True, False])
+def test_round_trip(tmp_path, cache):
+    path = str(tmp_path / "accounts.db")
+    bank = open_bank(path, cache)
+    alice, _ = bank.create_account("Alice", "100.10")
+    bob, _ = bank.create_account("Bob", "0")
+    alice.deposit("0.05", bank)
+    bank.commit(alice)
+    assert alice.transfer("50", bob.id, bank)[0]
+    bank.commit(alice, bob)
+    assert stored(path) == {1: '50.15', 2: '50'}
+    bank.close()
+
+    reopened = open_bank(path, cache)
+    assert reopened.get_account(1).balance == Decimal('50.15')
+    assert str(reopened.get_account(1).balance) == '50.15'
+    assert reopened.get_account(2).name == "Bob"
+    assert reopened.get_account(3) is None
+    assert len(reopened.accounts) == 2 and reopened.next_id == 3
+    assert reopened.verify(full=True)[0]
+    with sqlite3.connect(path) as connection:
+        assert connection.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+    reopened.close()
+
+# A '.db' path selects SQLite, and other persistence modes are refused with it
+def test_selected_by_path(tmp_path):
+    path = str(tmp_path / "accounts.db")
+    bank = BankingSystem(csv_path=path)
+    assert isinstance(bank.storage, SQLiteStorage)
+    bank.create_account("Alice", "1")
+    assert stored(path) == {1: '1'}
+    bank.close()
+    with pytest.raises(ValueError):
+        BankingSystem(csv_path=path, journal=True)
+
+# Changes not committed yet are seen by lookups, even after their account object is dropped,
+# and are written by the next commit of the account or by save_state
+def test_unsaved_changes(tmp_path):
+    path = str(tmp_path / "accounts.db")
+    bank = open_bank(path, cache=False, durability='manual')
+    bank.create_accounts([("Alice", "10"), ("Bob", "20")])
+    assert stored(path) == {}
+    bank.flush()
+    assert stored(path) == {1: '10', 2: '20'}
+    bank.get_account(1).deposit("5", bank)
+    gc.collect()
+    assert bank.get_account(1).balance == Decimal('15')
+    assert [row[2] for row in bank.accounts.rows()] == [Decimal('15'), Decimal('20')]
+    assert stored(path)[1] == '10'
+    bank.save_state()
+    assert stored(path)[1] == '15'
+    # The same account object is handed out while someone holds it
+    account = bank.get_account(2)
+    assert bank.get_account(2) is account
+    bank.close()
+
+# Concurrent transfers on pooled connections conserve money, and commit both sides together
+@pytest.mark.parametrize('cache', [True, False])
+def test_concurrent_transfers(tmp_path, cache):
+    path = str(tmp_path / "accounts.db")
+    bank = open_bank(path, cache)
+    bank.create_accounts((f"Customer {i}", "100") for i in range(10))
+
+    def worker(seed):
+        for i in range(50):
+            sender, recipient = (seed + i) % 10 + 1, (seed + 3 * i + 1) % 10 + 1
+            if sender != recipient:
+                account = bank.get_account(sender)
+                if account.transfer("1.5", recipient, bank)[0]:
+                    bank.commit(account, bank.get_account(recipient))
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert 1 <= bank.storage.pool.opened <= 8
+    assert sum(Decimal(balance) for balance in stored(path).values()) == Decimal('1000')
+    assert bank.verify(full=True)[0]
+    bank.close()
+
+# Reports and snapshots read the database with unsaved changes; CSV files can be copied in
+def test_reports_and_import(tmp_path):
+    csv_path = str(tmp_path / "accounts.csv")
+    BankingSystem(csv_path=csv_path).create_accounts([("Alice", "5"), ("Bob", "7.25")])
+    path = str(tmp_path / "accounts.db")
+    assert csv_to_sqlite(csv_path, path) == 2
+    bank = open_bank(path, durability='manual')
+    bank.create_account("Carol", "1")
+    with bank.snapshot() as snapshot:
+        bank.get_account(1).deposit("100", bank)
+        assert [row[2] for row in snapshot.rows()] == [Decimal('5'), Decimal('7.25'), Decimal('1')]
+    report = BalanceReport.from_bank(bank)
+    assert report.total() == Decimal('113.25')
+    assert bank.find_by_name("carol") == [3]
+    bank.close()
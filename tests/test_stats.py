@@ -0,0 +1,32 @@
+import json
+from stats import Stats
+
+# Observations are counted per operation, with bytes and a power-of-two latency histogram
+def test_observe_and_snapshot():
+    stats = Stats(enabled=True)
+    for elapsed_ns in (1000, 1500, 3000, 100000):
+        stats.observe('save_state', elapsed_ns, 10)
+    series = stats.snapshot()['save_state']
+    assert series['count'] == 4
+    assert series['bytes'] == 40
+    assert series['max_us'] == 100.0
+    assert series['mean_us'] == 26.375
+    assert series['histogram'] == {'1.024': 1, '2.048': 1, '4.096': 1, '131.072': 1}
+    assert series['p50_us'] == 2.048
+    assert series['p99_us'] == 100.0 # capped at the largest sample
+
+# A reset snapshot starts the next one from scratch
+def test_snapshot_reset():
+    stats = Stats(enabled=True)
+    stats.observe('persist', 500)
+    assert 'persist' in stats.snapshot(reset=True)
+    assert stats.snapshot() == {}
+
+# The dump thread writes a final snapshot when stopped
+def test_periodic_dump(tmp_path):
+    path = tmp_path / "stats.json"
+    stats = Stats(enabled=True)
+    stats.start_dump(str(path), interval=60)
+    stats.observe('deposit', 2000)
+    stats.stop_dump()
+    assert json.loads(path.read_text())['stats']['deposit']['count'] == 1
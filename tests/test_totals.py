@@ -0,0 +1,42 @@
+from decimal import Decimal
+from totals import Totals
+
+# Building from balances counts accounts, sums balances and counts zero balances
+def test_build():
+    totals = Totals.build([Decimal('10.5'), Decimal('0'), Decimal('0.00')])
+    assert (totals.total, totals.count, totals.zero) == (Decimal('10.5'), 3, 2)
+
+# Records move the total and track balances reaching or leaving zero
+def test_record():
+    totals = Totals.build([Decimal('10'), Decimal('0')])
+    totals.record('withdraw', 1, Decimal('10'), Decimal('0'))
+    assert (totals.total, totals.zero) == (Decimal('0'), 2)
+    totals.record('deposit', 2, Decimal('5'), Decimal('5'))
+    totals.record('transfer_out', 2, Decimal('5'), Decimal('0'), 1)
+    totals.record('transfer_in', 1, Decimal('5'), Decimal('5'), 2)
+    assert (totals.total, totals.zero) == (Decimal('5'), 1)
+    totals.record('rollback', 1, Decimal('-5'), Decimal('0'))
+    assert (totals.total, totals.zero) == (Decimal('0'), 2)
+
+# A batch of records has the same effect as recording them one by one
+def test_record_many():
+    totals = Totals.build([Decimal('10'), Decimal('0')])
+    totals.record_many([
+        ('interest', 1, Decimal('1'), Decimal('11'), None),
+        ('fee', 1, Decimal('11'), Decimal('0'), None),
+        ('deposit', 2, Decimal('3'), Decimal('3'), None),
+    ])
+    assert (totals.total, totals.zero) == (Decimal('3'), 1)
+
+# New accounts are counted with their initial balance
+def test_opened():
+    totals = Totals()
+    totals.opened(Decimal('0'))
+    totals.opened(Decimal('7'))
+    assert (totals.total, totals.count, totals.zero) == (Decimal('7'), 2, 1)
+
+# Totals survive a round trip through as_dict, and diff names the fields that differ
+def test_dict_and_diff():
+    totals = Totals(Decimal('1.50'), 2, 1)
+    assert Totals.from_dict(totals.as_dict()).diff(totals) is None
+    assert totals.diff(Totals(Decimal('1.5'), 3, 1)) == "count 2 != 3"
@@ -1,5 +1,5 @@
 import pytest
-from utils import convert_decimal
+from utils import convert_decimal, set_limits
 from decimal import Decimal
 
 # Convert valid numbers
@@ -26,4 +26,72 @@ def test_convert_decimal_nan():
 # 'Infinity' should raise ValueError
 def test_convert_decimal_infinity():
     with pytest.raises(ValueError, match="Invalid input, please input numbers only!"):
-        convert_decimal("Infinity")
\ No newline at end of file
+        convert_decimal("Infinity")
+
+# Plain decimal strings with a sign or a missing integer part are accepted
+@pytest.mark.parametrize("amount, expected", [
+    ("100", Decimal('100')),
+    ("-12.50", Decimal('-12.50')),
+    ("+0.5", Decimal('0.5')),
+    (".5", Decimal('0.5')),
+    ("5.", Decimal('5')),
+    ("١٢.٥", Decimal('12.5')), # Unicode digits, like Decimal()
+])
+def test_convert_decimal_plain(amount, expected):
+    assert convert_decimal(amount) == expected
+
+# Inputs outside the plain format still go through Decimal's parser
+@pytest.mark.parametrize("amount, expected", [
+    ("1e3", Decimal('1000')),
+    (" 42 ", Decimal('42')),
+    ("1_000", Decimal('1000')),
+    (7, Decimal('7')),
+])
+def test_convert_decimal_fallback(amount, expected):
+    assert convert_decimal(amount) == expected
+
+# Malformed strings are rejected
+@pytest.mark.parametrize("amount", ["", ".", "-", "1.2.3", "12a", "sNaN1", "-Infinity", None])
+def test_convert_decimal_invalid(amount):
+    with pytest.raises(ValueError, match="Invalid input, please input numbers only!"):
+        convert_decimal(amount)
+
+# Amounts beyond the precision and scale limits are rejected
+def test_convert_decimal_limits():
+    with pytest.raises(ValueError, match="Too many decimal places!"):
+        convert_decimal("0.0000000000001") # 13 decimal places
+    with pytest.raises(ValueError, match="Too many digits!"):
+        convert_decimal("1" * 29)
+    # Right at the limits, and one digit past the integer limit
+    assert convert_decimal("9" * 16 + ".000000000001") == Decimal("9" * 16 + ".000000000001")
+    with pytest.raises(ValueError, match="Too many digits!"):
+        convert_decimal("1" * 17)
+    with pytest.raises(ValueError, match="Too many digits!"):
+        convert_decimal("1e30")
+    with pytest.raises(ValueError, match="Invalid input, please input numbers only!"):
+        convert_decimal("1" * 100) # longer than MAX_INPUT_LENGTH
+    # Leading zeros do not count as digits
+    assert convert_decimal("0" * 20 + "1.5") == Decimal('1.5')
+    # The limits can be tightened per call, like a NUMERIC(6, 2) column
+    assert convert_decimal("1234.56", max_precision=6, max_scale=2) == Decimal('1234.56')
+    with pytest.raises(ValueError, match="Too many decimal places!"):
+        convert_decimal("12.345", max_precision=6, max_scale=2)
+    with pytest.raises(ValueError, match="Too many digits!"):
+        convert_decimal("12345", max_precision=6, max_scale=2)
+
+# Changing the default limits also applies to amounts converted before
+def test_set_limits():
+    assert convert_decimal("0.001") == Decimal('0.001')
+    try:
+        set_limits(max_precision=10, max_scale=2)
+        with pytest.raises(ValueError, match="Too many decimal places!"):
+            convert_decimal("0.001")
+    finally:
+        set_limits()
+    assert convert_decimal("0.001") == Decimal('0.001')
+
+# Repeated invalid amounts keep raising the same error
+def test_convert_decimal_cached_error():
+    for _ in range(2):
+        with pytest.raises(ValueError, match="Invalid input, please input numbers only!"):
+            convert_decimal("abc")
@@ -0,0 +1,40 @@
+import pytest
+from collections import Counter
+from banking_system import BankingSystem
+from driver import FIELDS, run_script
+from workload import Zipf, generate, parse_mix
+
+# The same arguments give the same workload, made of valid actions
+def test_generate_deterministic():
+    actions = list(generate(100, 200, seed=7))
+    assert actions == list(generate(100, 200, seed=7))
+    assert actions != list(generate(100, 200, seed=8))
+    for action in actions:
+        assert set(action) == {'op', *FIELDS[action['op']]}
+    assert actions[0]['op'] in ('login', 'create')
+    logins = [action['id'] for action in actions if action['op'] == 'login']
+    assert all(1 <= account_id <= 100 for account_id in logins)
+
+# Popularity follows the skew, and the mix picks the operations
+def test_skew_and_mix():
+    popular = Zipf(1000, 1.2)
+    draws = Counter(popular() for _ in range(20000))
+    assert draws[1] > 0.15 * 20000 > draws[1000] * 100
+    uniform_draw = Zipf(10, 0)
+    uniform = Counter(uniform_draw() for _ in range(20000))
+    assert min(uniform.values()) > 1500
+    ops = Counter(action['op'] for action in generate(50, 500, mix=parse_mix("deposit=1,withdraw=0,transfer=0")))
+    assert ops['withdraw'] == ops['transfer'] == 0 and ops['deposit'] > 0
+    with pytest.raises(ValueError):
+        parse_mix("steal=1")
+    with pytest.raises(ValueError):
+        next(generate(0, 10))
+
+# A generated workload runs through the driver and keeps the totals consistent
+def test_generated_workload(tmp_path):
+    bank = BankingSystem(csv_path=str(tmp_path / "accounts.csv"), durability='manual')
+    bank.create_accounts((f"Customer {i}", "100") for i in range(50))
+    report = run_script(bank, generate(50, 100, create_ratio=0.1, seed=1))
+    assert report['actions'] > 100 and report['skipped'] == 0
+    assert len(bank.accounts) > 50
+    assert bank.verify(full=True)[0]